@@ -1,17 +1,114 @@
+import time
+_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-from SieveAnalysisApp import SieveAnalysisController
-from uscs import USCS_Classifier
+import argparse
+import importlib
 import os
+import subprocess
 import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# The tools pull in matplotlib (pyplot, TkAgg) and are only imported when one is
+# opened, or ahead of that by a background warm-up once the menu is on screen
+TOOL_MODULES = ("SieveAnalysisApp", "uscs")
+
+
+def load_tool(name: str):
+    """Tool module by name; blocks until a warm-up import in progress finishes."""
+    return importlib.import_module(name)
+
+
+def import_breakdown(modules=TOOL_MODULES) -> List[Tuple[str, float, float]]:
+    """
+    Import times of modules in a fresh interpreter, as reported by -X importtime.
+
+    Returns:
+        List of (module, self ms, cumulative ms) in import order
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+                          cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0].split(":")[1]) / 1000, int(parts[1]) / 1000))
+    return rows
+
+
+def startup_report(menu_seconds: Optional[float], warmup_times: Dict[str, Optional[float]],
+                   top: int = 15) -> str:
+    """Text report of the menu start-up time, the tool warm-up and the slowest imports."""
+    lines = ["Start-up report", "==============="]
+    if menu_seconds is not None:
+        lines.append(f"Menu shown after {menu_seconds * 1000:.0f} ms (tool modules not imported)")
+    for name, seconds in warmup_times.items():
+        lines.append(f"Warm-up import of {name}: " + ("failed" if seconds is None else f"{seconds * 1000:.0f} ms"))
+
+    rows = import_breakdown()
+    cumulative = {name: total for name, _, total in rows}
+    lines.append("")
+    # Modules shared by the tools are counted under the first one that imports them
+    lines.append("Cold import cost (-X importtime, fresh interpreter, in opening order):")
+    for name in TOOL_MODULES:
+        if name in cumulative:
+            lines.append(f"  {name:<40} {cumulative[name]:8.1f} ms")
+    lines.append("")
+    lines.append(f"Slowest {top} modules by self time:")
+    lines.append(f"  {'module':<40} {'self ms':>8} {'cumul ms':>9}")
+    for name, own, total in sorted(rows, key=lambda r: -r[1])[:top]:
+        lines.append(f"  {name:<40} {own:8.1f} {total:9.1f}")
+    return "\n".join(lines)
+
 
 class IntegratedSoilApp:
-    def __init__(self, root):
+    def __init__(self, root, report_startup=False, project=None):
         self.root = root
         self.root.title("Unified Soil Analysis Tool")
         self.root.geometry("400x300")
         self.sieve_data = None  # To store sieve analysis results
+        # Project database that finished sieve analyses are saved to (optional)
+        self.project = None
+        if project:
+            from project_store import ProjectStore
+            self.project = ProjectStore(project)
+        self.report_startup = report_startup
+        self.menu_seconds = None
+        self.warmup_times = {}
+        self._warmup = None
         self.create_main_interface()
+        self.root.after_idle(self._on_menu_shown)
+
+    def _on_menu_shown(self):
+        """Start importing the tools in the background once the menu has been drawn."""
+        self.root.update_idletasks()
+        self.menu_seconds = time.perf_counter() - _START
+        self._warmup = threading.Thread(target=self._warm_up, name="tool-warm-up", daemon=True)
+        self._warmup.start()
+        if self.report_startup:
+            self.root.after(100, self._report_when_warm)
+
+    def _warm_up(self):
+        # Imports only: Tk must not be touched off the main thread
+        for name in TOOL_MODULES:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception:
+                # Opening the tool imports it again and shows the error there
+                self.warmup_times[name] = None
+                continue
+            self.warmup_times[name] = time.perf_counter() - start
+
+    def _report_when_warm(self):
+        if self._warmup.is_alive():
+            self.root.after(100, self._report_when_warm)
+            return
+        print(startup_report(self.menu_seconds, self.warmup_times))
+        self.root.destroy()
 
     def create_main_interface(self):
         frame = ttk.Frame(self.root, padding=20,style='Accent.TButton')
@@ -29,7 +126,7 @@ class IntegratedSoilApp:
         sieve_window.title("Sieve Analysis Tool")
         
         # Create and pack the full Sieve Analysis application
-        sieve_app = SieveAnalysisController(sieve_window)
+        sieve_app = load_tool("SieveAnalysisApp").SieveAnalysisController(sieve_window)
         
         # Store a reference to the controller for later access
         self.sieve_controller = sieve_app
@@ -43,17 +140,36 @@ class IntegratedSoilApp:
             # Store the model data before closing
             self.sieve_data = {
                 'model': self.sieve_controller.model,
+                'result': self.sieve_controller.model.result(),
                 'is_valid': self.sieve_controller.model.validate_results()
             }
+            if self.project is not None and self.sieve_data['is_valid']:
+                self.save_to_project()
         window.destroy()
 
+    def save_to_project(self):
+        """Add the finished sieve analysis to the project database as a new sample"""
+        model = self.sieve_data['model']
+        try:
+            sample_id = self.project.add_sample(
+                time.strftime("Sieve %Y-%m-%d %H:%M:%S"),
+                total_weight=model.total_weight,
+                sieve_data=list(zip(model.sieve_sizes, model.sieve_numbers, model.retained_masses)),
+                result=self.sieve_data['result'],
+            )
+        except Exception as e:
+            messagebox.showerror("Project Error", f"Failed to save the sample: {str(e)}")
+            return
+        self.sieve_data['sample_id'] = sample_id
+        print(f"[INFO] Saved sieve analysis as sample {sample_id} in {self.project.path}")
+
     def run_uscs_manual(self):
         """Run the full USCS Classifier in its own window with manual entry"""
         uscs_window = tk.Toplevel(self.root)
         uscs_window.title("USCS Classifier (Manual Entry)")
         
         # Create and pack the full USCS Classifier application
-        USCS_Classifier(uscs_window)
+        load_tool("uscs").USCS_Classifier(uscs_window)
 
     def run_uscs_imported(self):
         """Run USCS Classifier with data imported from sieve analysis"""
@@ -65,39 +181,50 @@ class IntegratedSoilApp:
         uscs_window.title("USCS Classifier (Imported from Sieve)")
         
         # Create the USCS Classifier
-        uscs_app = USCS_Classifier(uscs_window)
+        uscs_app = load_tool("uscs").USCS_Classifier(uscs_window)
         
         # Populate the fields with sieve analysis data
         self.populate_uscs_fields(uscs_app)
 
     def populate_uscs_fields(self, uscs_app):
         """Populate USCS fields with sieve analysis data"""
-        model = self.sieve_data['model']
-        pd = model.particle_distribution
-        dvals = model.intersections
-        coeffs = model.coefficients
+        result = self.sieve_data['result']
 
         # Set particle distribution percentages
-        uscs_app.boulders.set(pd.get("Boulders (> 300 mm)", 0.0))
-        uscs_app.cobbles.set(pd.get("Cobbles (75 - 300 mm)", 0.0))
-        uscs_app.gravel.set(pd.get("Gravel (4.75 - 75 mm)", 0.0))
-        uscs_app.sand.set(pd.get("Sand (0.075 - 4.75 mm)", 0.0))
-        uscs_app.fines.set(pd.get("Fines (< 0.075 mm)", 0.0))
-
-        # Set D-values
-        uscs_app.d10.set(dvals.get("D10", 0.0))
-        uscs_app.d30.set(dvals.get("D30", 0.0))
-        uscs_app.d60.set(dvals.get("D60", 0.0))
+        uscs_app.boulders.set(result.boulders)
+        uscs_app.cobbles.set(result.cobbles)
+        uscs_app.gravel.set(result.gravel)
+        uscs_app.sand.set(result.sand)
+        uscs_app.fines.set(result.fines)
 
-        # Set coefficients
-        uscs_app.cu.set(coeffs.get("Cu", 0.0))
-        uscs_app.cc.set(coeffs.get("Cc", 0.0))
+        # Set D-values and coefficients (missing values shown as 0)
+        for field in ("d10", "d30", "d60", "cu", "cc"):
+            value = getattr(result, field)
+            getattr(uscs_app, field).set(value if value is not None else 0.0)
 
         # Update the total percentage display
         uscs_app.update_total_percentage()
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Soil analysis tools")
+    parser.add_argument("--project", default=None, metavar="PATH",
+                        help="Save finished sieve analyses to a project database")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Show the menu, wait for the warm-up, print the timings and exit")
+    args = parser.parse_args(argv)
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        if not args.startup_report:
+            raise
+        # No display: the import breakdown is still useful
+        print(startup_report(None, {}))
+        return 0
+    IntegratedSoilApp(root, report_startup=args.startup_report, project=args.project)
+    root.mainloop()
+    return 0
+
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = IntegratedSoilApp(root)
-    root.mainloop()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
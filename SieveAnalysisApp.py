@@ -1,16 +1,29 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 import numpy as np
-import pandas as pd
-from scipy import interpolate, optimize
-from shapely.geometry import LineString, Point, MultiPoint
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from scipy import interpolate
+import atexit
 import json
 import os
-from typing import List, Tuple, Dict, Optional
-from tooltip import ToolTip  # Custom tooltip class
+from sieve_core import SieveAnalysisModel, SieveDataError
+from sieve_cache import SieveResultCache
+
+# Results cache shared by all sieve windows, opened by the first one; set
+# SIEVE_CACHE_DB to a file path to keep cached results across sessions
+_result_cache = None
+
+
+def result_cache():
+    """Return the shared results cache, opening it on first use"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = SieveResultCache(db_path=os.environ.get("SIEVE_CACHE_DB"))
+        atexit.register(_result_cache.close)
+    return _result_cache
+
+# Resolution of the plotted grain size curve
+GRAPH_POINTS = 1000
 
 # Predefined sieve sizes and sieve numbers
 SIEVE_SIZES = [
@@ -43,415 +56,6 @@ SAMPLE_DATA = {
     }
 }
 
-class SieveAnalysisModel:
-    """
-    A comprehensive model for sieve analysis calculations with precise D-value determination.
-    Maintains PCHIP interpolation while ensuring accurate curve intersections.
-    """
-
-    def __init__(self):
-        """Initialize the model with default values"""
-        self.reset_data()
-
-    def reset_data(self) -> None:
-        """
-        Reset all data structures to their initial state.
-        Called when starting a new analysis.
-        """
-        self.total_weight: float = 0.0
-        self.sieve_sizes: List[float] = []
-        self.sieve_numbers: List[str] = []
-        self.retained_masses: List[float] = []
-        self.xs: np.ndarray = np.array([])
-        self.ys: np.ndarray = np.array([])
-        self.x_smooth: np.ndarray = np.array([])
-        self.y_smooth: np.ndarray = np.array([])
-        self.intersections: Dict[str, float] = {}
-        self.coefficients: Dict[str, Optional[float]] = {}
-        self.particle_distribution: Dict[str, float] = {}
-        self.plot_type: str = "semi-log"
-        self.pchip_interpolator: Optional[interpolate.PchipInterpolator]
-    def classify_particle_size(self, size: float) -> str:
-        """
-        Classifies particle size into standard categories according to ASTM D2487/USCS.
-        
-        Args:
-            size: Particle size in millimeters (mm)
-            
-        Returns:
-            str: The particle size category description
-            
-        Categories:
-            - Boulders (> 300 mm)
-            - Cobbles (75 - 300 mm)
-            - Gravel (4.75 - 75 mm)
-            - Sand (0.075 - 4.75 mm)
-            - Fines (< 0.075 mm)
-        """
-       
-        if size > 300:
-            return "Boulders (> 300 mm)"
-        elif 75 <= size <= 300:
-            return "Cobbles (75 - 300 mm)"
-        elif 4.75 <= size < 75:
-            return "Gravel (4.75 - 75 mm)"
-        elif 0.075 <= size < 4.75:
-            return "Sand (0.075 - 4.75 mm)"
-        else:  # size <= 0.075
-            return "Fines (< 0.075 mm)"
-
-    def calculate(self, total_weight: float, sieve_data: List[Tuple[float, str, float]]) -> None:
-        """
-        Perform complete sieve analysis calculations.
-        
-        Args:
-            total_weight: Total weight of the sample in grams
-            sieve_data: List of tuples (sieve_size, sieve_number, retained_mass)
-        """
-        self.total_weight = total_weight
-        self.sieve_sizes = [d[0] for d in sieve_data]
-        self.sieve_numbers = [d[1] for d in sieve_data]
-        self.retained_masses = [d[2] for d in sieve_data]
-
-        # Calculate cumulative percentages
-        self._calculate_percentages()
-        
-        # Create smooth PCHIP curve
-        self.create_smooth_curve()
-        
-        # Calculate precise D-values
-        self.calculate_d_values()
-        
-        # Compute derived parameters
-        self.calculate_coefficients()
-        self.calculate_particle_distribution()
-
-    def _calculate_percentages(self) -> None:
-        """Calculate cumulative percentages from retained masses"""
-        # Calculate the cumulative sum of the retained masses
-        cum_rets = np.cumsum(self.retained_masses)
-        # Get the total retained mass
-        total = cum_rets[-1] if len(cum_rets) > 0 else 0
-        
-        # If the total retained mass is greater than 0
-        if total > 0:
-            # Calculate the cumulative percentage
-            self.cum_percent = np.round(cum_rets / total * 100, 4)
-            # Calculate the pass percentage
-            self.pass_percent = np.round(100 - self.cum_percent, 4)
-        else:
-            # If the total retained mass is 0, set the cumulative and pass percentages to 0
-            self.cum_percent = np.zeros_like(cum_rets)
-            self.pass_percent = np.zeros_like(cum_rets)
-        
-        # Convert the sieve sizes to an array
-        self.xs = np.array(self.sieve_sizes)
-        # Convert the pass percentages to an array
-        self.ys = np.array(self.pass_percent)
-
-    def create_smooth_curve(self) -> None:
-        """
-        Create a smooth grain size distribution curve using PCHIP interpolation.
-        Falls back to linear interpolation if PCHIP fails.
-        """
-        if len(self.xs) < 2:
-            raise ValueError("At least two data points required for interpolation")
-            
-        # Sort data by particle size
-        sorted_idx = np.argsort(self.xs)
-        x_sorted = self.xs[sorted_idx]
-        y_sorted = self.ys[sorted_idx]
-        
-        try:
-            # Create PCHIP interpolator and store it for later use
-            self.pchip_interpolator = interpolate.PchipInterpolator(x_sorted, y_sorted)
-            
-            # Generate smooth curve with high resolution (1000 points)
-            self.x_smooth = np.logspace(
-                np.log10(min(x_sorted)), 
-                np.log10(max(x_sorted)), 
-                1000
-            )
-            self.y_smooth = self.pchip_interpolator(self.x_smooth)
-            
-        except Exception as e:
-            print(f"PCHIP interpolation failed, falling back to linear: {e}")
-            self.pchip_interpolator = interpolate.interp1d(
-                x_sorted, y_sorted, 
-                kind='linear', 
-                fill_value='extrapolate'
-            )
-            self.x_smooth = np.logspace(
-                np.log10(min(x_sorted)), 
-                np.log10(max(x_sorted)), 
-                1000
-            )
-            self.y_smooth = self.pchip_interpolator(self.x_smooth)
-
-    def calculate_d_values(self) -> None:
-        """
-        Calculate D10, D30, D60 values with precision guaranteed to lie on the curve.
-        Uses a three-stage approach for robustness:
-        1. Exact root finding
-        2. Refined local search
-        3. Closest point fallback
-        """
-        P_values = [10, 30, 60]
-        self.intersections = {}
-
-        for P in P_values:
-            try:
-                # Stage 1: Try exact root finding
-                root = self._find_exact_intersection(P)
-                if root is not None:
-                    self.intersections[f"D{P}"] = round(root, 4)
-                    continue
-                    
-                # Stage 2: Refined search near closest point
-                refined_val = self._refined_intersection_search(P)
-                if refined_val is not None:
-                    self.intersections[f"D{P}"] = round(refined_val, 4)
-                    continue
-                    
-                # Stage 3: Fallback to closest point
-                closest_idx = np.argmin(np.abs(self.y_smooth - P))
-                self.intersections[f"D{P}"] = round(self.x_smooth[closest_idx], 4)
-                
-            except Exception as e:
-                print(f"Error calculating D{P}: {e}")
-                closest_idx = np.argmin(np.abs(self.y_smooth - P))
-                self.intersections[f"D{P}"] = round(self.x_smooth[closest_idx], 4)
-
-    def _find_exact_intersection(self, P: float) -> Optional[float]:
-        """
-        Find exact intersection point using root finding.
-        
-        Args:
-            P: Percentage value to find (10, 30, or 60)
-            
-        Returns:
-            The particle size (D-value) where the curve intersects P, or None if not found
-        """
-        if self.pchip_interpolator is None:
-            return None
-            
-        # Define the function to find roots for: f(x) = y(x) - P
-        def f(x):
-            return self.pchip_interpolator(x) - P
-            
-        # Get the data bounds
-        x_min, x_max = min(self.xs), max(self.xs)
-        
-        # Find all crossing points where the curve passes through P
-        crossing_points = []
-        for i in range(len(self.y_smooth)-1):
-            if (self.y_smooth[i] - P) * (self.y_smooth[i+1] - P) < 0:
-                x0 = self.x_smooth[i]
-                x1 = self.x_smooth[i+1]
-                try:
-                    root = optimize.brentq(
-                        f, x0, x1, 
-                        xtol=1e-8,  # Very tight tolerance
-                        rtol=1e-8,
-                        maxiter=100
-                    )
-                    if x_min <= root <= x_max:  # Only accept roots within data range
-                        crossing_points.append(root)
-                except:
-                    continue
-                    
-        return min(crossing_points) if crossing_points else None
-
-    def _refined_intersection_search(self, P: float) -> Optional[float]:
-        """
-        Perform a refined search near the closest point to find better intersection.
-        
-        Args:
-            P: Percentage value to find (10, 30, or 60)
-            
-        Returns:
-            The best found particle size near the closest point, or None if search fails
-        """
-        if self.pchip_interpolator is None:
-            return None
-            
-        # Find the closest point on the smooth curve
-        closest_idx = np.argmin(np.abs(self.y_smooth - P))
-        x_closest = self.x_smooth[closest_idx]
-        
-        # Determine search window around the closest point
-        if closest_idx == 0:
-            x0, x1 = x_closest, self.x_smooth[closest_idx+1]
-        elif closest_idx == len(self.x_smooth)-1:
-            x0, x1 = self.x_smooth[closest_idx-1], x_closest
-        else:
-            x0, x1 = self.x_smooth[closest_idx-1], self.x_smooth[closest_idx+1]
-            
-        # Sample many points in this window
-        x_window = np.linspace(x0, x1, 1000)
-        y_window = self.pchip_interpolator(x_window)
-        
-        # Find the point with minimum distance to P
-        best_idx = np.argmin(np.abs(y_window - P))
-        return x_window[best_idx]
-
-    def calculate_coefficients(self) -> None:
-        """
-        Calculate the coefficient of uniformity (Cu) and coefficient of curvature (Cc).
-        Ensures proper handling of edge cases and division by zero.
-        """
-        D10 = self.intersections.get("D10", None)
-        D30 = self.intersections.get("D30", None)
-        D60 = self.intersections.get("D60", None)
-        
-        # Calculate Cu = D60/D10 with safety checks
-        try:
-            Cu = D60 / D10 if all(v is not None for v in [D10, D60]) and D10 != 0 else None
-        except:
-            Cu = None
-            
-        # Calculate Cc = (D30)^2/(D60*D10) with safety checks
-        try:
-            Cc = (D30**2) / (D60 * D10) if all(v is not None for v in [D10, D30, D60]) and (D60 * D10) != 0 else None
-        except:
-            Cc = None
-            
-        self.coefficients = {
-            "Cu": round(Cu, 4) if Cu is not None else None,
-            "Cc": round(Cc, 4) if Cc is not None else None
-        }
-
-    
-    def calculate_particle_distribution(self) -> None: #
-        """
-        Calculates particle distribution based on direct retained masses according to ASTM D2487/USCS.
-        - Boulders: Retained on sieves > 300 mm.
-        - Cobbles: Retained on sieves between 75 mm and 300 mm (inclusive).
-        - Gravel: Retained on sieves between 4.75 mm and < 75 mm.
-        - Sand: Retained on sieves between 0.075 mm and < 4.75 mm.
-        - Fines: Passing 0.075 mm sieve (material on Pan).
-        """
-        # Initialize dictionary with all categories
-        self.particle_distribution = { #
-            "Boulders (> 300 mm)": 0.0, #
-            "Cobbles (75 - 300 mm)": 0.0, #
-            "Gravel (4.75 - 75 mm)": 0.0, #
-            "Sand (0.075 - 4.75 mm)": 0.0, #
-            "Fines (< 0.075 mm)": 0.0, #
-        }
-
-        if not hasattr(self, 'total_weight') or self.total_weight <= 0: #
-            # This check might be better placed in the main 'calculate' method
-            # or handled by the controller to avoid direct UI calls from model.
-            # For now, retaining similar error handling as in the original code.
-            if hasattr(self.view, 'total_weight_entry'): # Check if view is available
-                 messagebox.showerror("Error", "Total weight must be positive to calculate particle distribution.") #
-            return
-
-        if not hasattr(self, 'sieve_sizes') or not hasattr(self, 'retained_masses') or \
-           not self.sieve_sizes or not self.retained_masses: #
-            if hasattr(self.view, 'total_weight_entry'): # Check if view is available
-                messagebox.showerror("Error", "Sieve data (sizes and masses) is missing.") #
-            return
-
-        mass_boulders = 0.0
-        mass_cobbles = 0.0
-        mass_gravel = 0.0
-        mass_sand = 0.0
-        
-        # Sum of masses retained on all actual sieves
-        sum_retained_on_sieves = sum(m for s, m in zip(self.sieve_sizes, self.retained_masses) if s > 0) # Exclude pan if it has size 0.0
-
-        # Calculate mass on pan (fines)
-        # This is the material finer than the smallest sieve (typically 0.075mm)
-        mass_fines_pan = self.total_weight - sum_retained_on_sieves #
-
-        # Check for data consistency: sum of retained masses (including calculated pan) should equal total weight.
-        # A small tolerance is used for floating point comparisons.
-        if mass_fines_pan < -1e-9:  # If sum_retained_on_sieves > self.total_weight #
-            error_msg = (f"Data Error: Sum of retained masses on sieves ({sum_retained_on_sieves:.2f}g) " #
-                         f"exceeds total sample weight ({self.total_weight:.2f}g). " #
-                         "Please check input data.") #
-            if hasattr(self.view, 'total_weight_entry'): # Check if view is available
-                 messagebox.showerror("Data Error", error_msg) #
-            else:
-                print(f"[ERROR] {error_msg}") #
-            # Reset distribution to zeros as it's invalid
-            for key in self.particle_distribution: #
-                self.particle_distribution[key] = 0.0 #
-            return
-        mass_fines_pan = max(0, mass_fines_pan) # Ensure it's not negative due to minor precision issues
-
-        # Iterate through each sieve and its retained mass to categorize particles
-        for size, retained_mass in zip(self.sieve_sizes, self.retained_masses): #
-            if size <= 0: # Skip pan if it was included in sieve_data with size 0
-                continue
-            if size > 300: # Boulders
-                mass_boulders += retained_mass
-            elif 75 <= size <= 300: # Cobbles
-                mass_cobbles += retained_mass
-            elif 4.75 <= size < 75: # Gravel
-                mass_gravel += retained_mass
-            elif 0.075 <= size < 4.75: # Sand
-                mass_sand += retained_mass
-            # Material retained on a sieve smaller than 0.075mm is not standard;
-            # fines are defined as passing 0.075mm.
-
-        # Calculate percentages based on the total weight of the sample
-        if self.total_weight > 0:
-            self.particle_distribution["Boulders (> 300 mm)"] = round((mass_boulders / self.total_weight) * 100, 2) #
-            self.particle_distribution["Cobbles (75 - 300 mm)"] = round((mass_cobbles / self.total_weight) * 100, 2) #
-            self.particle_distribution["Gravel (4.75 - 75 mm)"] = round((mass_gravel / self.total_weight) * 100, 2) #
-            self.particle_distribution["Sand (0.075 - 4.75 mm)"] = round((mass_sand / self.total_weight) * 100, 2) #
-            self.particle_distribution["Fines (< 0.075 mm)"] = round((mass_fines_pan / self.total_weight) * 100, 2) #
-        
-        # Optional: Validate that the sum of percentages is close to 100%
-        current_total_percentage = sum(self.particle_distribution.values()) #
-        if not (99.9 <= current_total_percentage <= 100.1) and self.total_weight > 0: #
-            # This might indicate a slight discrepancy due to rounding or an issue if pan mass was miscalculated.
-            print(f"[INFO] Particle distribution percentages sum to {current_total_percentage:.2f}%. This is usually due to rounding.") #
-            # Adjust Fines to make total 100% if the discrepancy is small and due to rounding.
-            if abs(100.0 - current_total_percentage) < 0.5 : # Small discrepancy threshold
-                diff = 100.0 - current_total_percentage
-                self.particle_distribution["Fines (< 0.075 mm)"] = round(self.particle_distribution["Fines (< 0.075 mm)"] + diff, 2)
-                # Ensure fines percentage is not negative after adjustment
-                if self.particle_distribution["Fines (< 0.075 mm)"] < 0:
-                    # If fines become negative, it implies a larger issue,
-                    # redistribute deficit/surplus proportionally or revert adjustment.
-                    # For simplicity here, we'll just cap at 0 and accept minor total deviation.
-                    self.particle_distribution["Fines (< 0.075 mm)"] = 0.0
-                current_total_percentage = sum(self.particle_distribution.values()) # Re-check
-                print(f"[INFO] Adjusted particle distribution percentages sum to {current_total_percentage:.2f}%.")
-
-    def validate_results(self) -> bool:
-        """
-        Validate that the calculated results are physically reasonable.
-        
-        Returns:
-            True if results are valid, False otherwise
-        """
-        # Check D-values are monotonically increasing
-        Ds = [self.intersections.get(f"D{p}", None) for p in [10, 30, 60]]
-        if None in Ds:
-            return False
-        if not (Ds[0] <= Ds[1] <= Ds[2]):
-            return False
-            
-        # Check coefficients are within reasonable bounds
-        Cu = self.coefficients.get("Cu", None)
-        Cc = self.coefficients.get("Cc", None)
-        if Cu is not None and Cu <= 0:
-            return False
-        if Cc is not None and Cc <= 0:
-            return False
-            
-        # Check percentages sum to 100 ± 0.1%
-        total_percent = sum(self.particle_distribution.values())
-        if abs(total_percent - 100) > 0.1:
-            return False
-            
-        return True
-
 class SieveAnalysisView(ttk.Frame):
     """View class handling all UI components"""
     def __init__(self, parent, controller):
@@ -580,6 +184,13 @@ class SieveAnalysisView(ttk.Frame):
         for size, number in SIEVE_SIZES:
             self.add_row(size, number)
         
+        # Live summary, updated while retained masses are typed
+        self.live_label = tk.Label(
+            self.scrollable_frame, text="", 
+            font=("Arial", 12), fg="#333399", bg="#f0f0f0"
+        )
+        self.live_label.pack(pady=5)
+        
         # Button frame
         self.button_frame = tk.Frame(self.scrollable_frame, bg="#f0f0f0")
         self.button_frame.pack(pady=20)
@@ -635,6 +246,10 @@ class SieveAnalysisView(ttk.Frame):
             entry.bind("<Tab>", lambda e: e.widget.tk_focusNext().focus())
             entry.bind("<Return>", lambda e: e.widget.tk_focusNext().focus())
         
+        # Recalculate live as retained masses are typed
+        index = len(self.entries)
+        ret_entry.bind("<KeyRelease>", lambda e: self.controller.on_retained_edited(index))
+        
         self.entries.append((size_entry, number_entry, ret_entry))
         
     def load_sample_data(self, event):
@@ -657,9 +272,21 @@ class SieveAnalysisView(ttk.Frame):
             # Add sample data rows
             for size, number, retained in sample["data"]:
                 self.add_row(size, number, retained)
+            self.controller.refresh_live_results()
                 
             messagebox.showinfo("Sample Loaded", f"'{sample_name}' sample data loaded successfully")
             
+    def show_live_results(self, intersections, coefficients):
+        """Show the current D-values and coefficients below the input table"""
+        if not hasattr(self, "live_label") or not self.live_label.winfo_exists():
+            return
+        if not intersections:
+            self.live_label.config(text="")
+            return
+        parts = [f"{key} = {value:.4f} mm" for key, value in intersections.items()]
+        parts += [f"{key} = {value:.4f}" for key, value in coefficients.items() if value is not None]
+        self.live_label.config(text="   ".join(parts))
+        
     def show_results_view(self):
         """Show results view after calculation"""
         self.clear_current_view()
@@ -962,6 +589,7 @@ class SieveAnalysisController:
     """Controller class handling user interactions"""
     def __init__(self, root):
         self.model = SieveAnalysisModel()
+        self.cache = result_cache()
         self.view = SieveAnalysisView(root, self)
         self.view.pack(fill=tk.BOTH, expand=True)
         
@@ -969,40 +597,83 @@ class SieveAnalysisController:
         """Add a new row to the input table"""
         self.view.add_row()
         
+    def read_inputs(self):
+        """
+        Parse the total weight and sieve grid.
+        
+        Returns:
+            Tuple (total_weight, sieve_data); raises ValueError for invalid input
+        """
+        # Get total weight
+        total_weight = float(self.view.total_weight_entry.get())
+        if total_weight <= 0:
+            raise ValueError("Total weight must be positive")
+        
+        # Get sieve data
+        sieve_data = []
+        for size_entry, number_entry, ret_entry in self.view.entries:
+            size = float(size_entry.get()) if size_entry.get() else 0
+            number = number_entry.get()
+            retained = float(ret_entry.get()) if ret_entry.get() else 0
+            
+            if retained < 0:
+                raise ValueError("Retained mass cannot be negative")
+            
+            sieve_data.append((size, number, retained))
+        
+        if not sieve_data:
+            raise ValueError("No sieve data entered")
+        return total_weight, sieve_data
+        
     def calculate(self):
         """Perform calcul.ations and show results"""
         try:
-            # Get total weight
-            total_weight = float(self.view.total_weight_entry.get())
-            if total_weight <= 0:
-                raise ValueError("Total weight must be positive")
-            
-            # Get sieve data
-            sieve_data = []
-            for size_entry, number_entry, ret_entry in self.view.entries:
-                size = float(size_entry.get()) if size_entry.get() else 0
-                number = number_entry.get()
-                retained = float(ret_entry.get()) if ret_entry.get() else 0
-                
-                if retained < 0:
-                    raise ValueError("Retained mass cannot be negative")
-                
-                sieve_data.append((size, number, retained))
-            
-            if not sieve_data:
-                raise ValueError("No sieve data entered")
+            total_weight, sieve_data = self.read_inputs()
             
             # Perform calculations
-            self.model.calculate(total_weight, sieve_data)
+            self.model.calculate(total_weight, sieve_data, cache=self.cache)
             
             # Show results view
             self.view.show_results_view()
             
+        except SieveDataError as e:
+            messagebox.showerror("Data Error", str(e))
         except ValueError as e:
             messagebox.showerror("Input Error", f"Invalid input: {str(e)}")
         except Exception as e:
             messagebox.showerror("Calculation Error", f"An error occurred: {str(e)}")
     
+    def on_retained_edited(self, index):
+        """
+        Recalculate while a retained mass is typed.
+        
+        One edited mass moves every knot of the curve, so the grid is analysed in
+        full. While a value does not parse yet (it is still being typed) the
+        previous results stay on screen; data that parses but cannot be analysed
+        clears the live summary.
+        """
+        try:
+            total_weight, sieve_data = self.read_inputs()
+        except ValueError:
+            return
+        try:
+            self.model.calculate(total_weight, sieve_data)
+        except Exception:
+            # Errors are reported by Calculate
+            self.view.show_live_results({}, {})
+            return
+        self.view.show_live_results(self.model.intersections, self.model.coefficients)
+    
+    def refresh_live_results(self):
+        """Analyse the grid as entered and update the live summary (after loading data)"""
+        try:
+            total_weight, sieve_data = self.read_inputs()
+            self.model.calculate(total_weight, sieve_data)
+        except Exception:
+            self.view.show_live_results({}, {})
+            return
+        self.view.show_live_results(self.model.intersections, self.model.coefficients)
+    
     def show_results(self):
         """Show calculation results"""
         self.view.show_results_window(
@@ -1012,9 +683,10 @@ class SieveAnalysisController:
     
     def show_graph(self):
         """Show grain size distribution graph"""
+        x_smooth, y_smooth = self.model.smooth_curve(GRAPH_POINTS)
         self.view.show_graph_window(
-            self.model.x_smooth,
-            self.model.y_smooth,
+            x_smooth,
+            y_smooth,
             self.model.xs,
             self.model.ys,
             self.model.intersections,
@@ -1089,6 +761,7 @@ class SieveAnalysisController:
                         item["number"],
                         item["retained"]
                     )
+                self.refresh_live_results()
                 
                 messagebox.showinfo("Success", f"Data loaded from {file_path}")
                 
@@ -1105,6 +778,19 @@ class SieveAnalysisController:
         self.view.total_weight_entry.delete(0, tk.END)
         messagebox.showinfo("Cleared", "All inputs have been cleared")
     
+    def save_graph(self, fig, extension):
+        """Export the grain size graph to an image or document file"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=[(f"{extension[1:].upper()} files", f"*{extension}"), ("All files", "*.*")]
+        )
+        if file_path:
+            try:
+                fig.savefig(file_path, bbox_inches="tight")
+                messagebox.showinfo("Success", f"Graph saved to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Save Error", f"Failed to save graph: {str(e)}")
+    
     def update_plot_type(self, plot_type):
         """Update plot type and redraw graph"""
         self.model.plot_type = plot_type
@@ -0,0 +1,129 @@
+"""
+Synthetic, seeded inputs for the benchmarks.
+
+Grain size curves are drawn from log-normal particle size distributions, so the
+sieve data look like real tests (smooth, monotone, with a pan fraction) while
+staying reproducible for a given seed.
+"""
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Standard ASTM sieve stack from 75 mm down to the No. 200 sieve
+STANDARD_SIEVES = [
+    (75.0, "3 in"), (50.0, "2 in"), (37.5, "1.5 in"), (25.0, "1 in"), (19.0, "3/4 in"),
+    (12.5, "1/2 in"), (9.5, "3/8 in"), (4.75, "No. 4"), (2.36, "No. 8"), (1.18, "No. 16"),
+    (0.60, "No. 30"), (0.30, "No. 50"), (0.15, "No. 100"), (0.075, "No. 200"),
+]
+
+USCS_CLASSES = ["SW", "SP", "SM", "SC", "ML", "CL", "MH", "CH"]
+
+
+def _percent_finer(sizes: np.ndarray, d50: float, sigma: float) -> np.ndarray:
+    """Percent finer of a log-normal particle size distribution at the given sizes."""
+    z = (np.log(sizes) - math.log(d50)) / (sigma * math.sqrt(2))
+    return 50.0 * (1.0 + np.vectorize(math.erf)(z))
+
+
+def gradation_curves(n: int, seed: int = 0, spanning: bool = False) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Generate (sizes, percent finer) pairs on the standard sieve stack.
+
+    Args:
+        n: Number of curves
+        seed: Random seed
+        spanning: Only keep curves that pass through 10% and 60% finer, as needed
+            by root finders that bracket the whole curve
+
+    Returns:
+        List of (sizes, finer) arrays, coarsest sieve first
+    """
+    rng = np.random.default_rng(seed)
+    sizes = np.array([s for s, _ in STANDARD_SIEVES])
+    curves = []
+    while len(curves) < n:
+        d50 = math.exp(rng.uniform(math.log(0.1), math.log(20.0)))
+        finer = np.round(_percent_finer(sizes, d50, rng.uniform(0.4, 1.8)), 4)
+        if spanning and not (finer[-1] < 10 and finer[0] > 60):
+            continue
+        curves.append((sizes.copy(), finer))
+    return curves
+
+
+def sieve_samples(n: int, seed: int = 0) -> List[Tuple[float, List[Tuple[float, str, float]]]]:
+    """
+    Generate sieve tests in the format taken by SieveAnalysisModel.calculate.
+
+    Returns:
+        List of (total_weight, sieve_data) with sieve_data rows (size, number, retained)
+    """
+    rng = np.random.default_rng(seed + 1)
+    samples = []
+    for sizes, finer in gradation_curves(n, seed):
+        total_weight = float(rng.uniform(300, 5000))
+        # Mass retained on a sieve is the drop in percent finer across it; the rest is pan
+        retained = -np.diff(np.concatenate(([100.0], finer))) * total_weight / 100
+        retained = np.round(np.maximum(retained, 0.0), 1)
+        pan = round(float(finer[-1]) * total_weight / 100, 1)
+        sieve_data = [(float(s), number, float(r)) for (s, number), r in zip(STANDARD_SIEVES, retained)]
+        samples.append((round(float(retained.sum()) + pan, 1), sieve_data))
+    return samples
+
+
+def uscs_inputs(n: int, seed: int = 0) -> Dict[str, List[tuple]]:
+    """
+    Generate argument tuples for USCS_Classifier.classify_fine_grained and
+    classify_coarse_grained, covering every branch of the charts.
+
+    Returns:
+        Dictionary with "fine" tuples (ll, pi, organic, sand, gravel, plus_200) and
+        "coarse" tuples (p200, gravel, sand, cu, cc, ll, pi)
+    """
+    rng = np.random.default_rng(seed + 2)
+    fine, coarse = [], []
+    for _ in range(n):
+        ll = float(rng.uniform(15, 110))
+        pi = float(max(0.0, min(ll - 5, rng.uniform(-5, 0.9 * (ll - 8)))))
+        p200 = float(rng.uniform(50, 100))
+        gravel = float(rng.uniform(0, 100 - p200))
+        sand = 100 - p200 - gravel
+        fine.append((ll, pi, bool(rng.random() < 0.1), sand, gravel, 100 - p200))
+
+        p200 = float(rng.uniform(0, 49.9))
+        gravel = float(rng.uniform(0, 100 - p200))
+        sand = 100 - p200 - gravel
+        cu = float(rng.uniform(1, 20))
+        cc = float(rng.uniform(0.3, 4))
+        coarse.append((p200, gravel, sand, cu, cc, ll, pi))
+    return {"fine": fine, "coarse": coarse}
+
+
+def ml_dataset(n: int, seed: int = 0, classify=None):
+    """
+    Generate a labelled SoilSmart training set (FEATURE_COLUMNS + "USCS").
+
+    Args:
+        n: Number of rows
+        seed: Random seed
+        classify: Rule used to label rows, with the signature of
+            classify_uscs_rule(ll, pl, fines_pct, cu, cc); random labels when None
+
+    Returns:
+        pandas DataFrame
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed + 3)
+    rows = []
+    for sizes, finer in gradation_curves(n, seed):
+        d10, d30, d60 = np.interp([10, 30, 60], finer[::-1], sizes[::-1])
+        d10 = max(d10, 1e-3)
+        cu, cc = d60 / d10, d30 ** 2 / (d60 * d10)
+        ll = float(rng.uniform(15, 90))
+        pl = float(rng.uniform(10, min(ll, 45)))
+        fines = float(finer[-1])
+        label = classify(ll, pl, fines, cu, cc) if classify else USCS_CLASSES[rng.integers(len(USCS_CLASSES))]
+        rows.append([d10, d30, d60, cu, cc, ll, pl, ll - pl, fines, label])
+    columns = ["D10", "D30", "D60", "Cu", "Cc", "LL", "PL", "PI", "FinesPct", "USCS"]
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,159 @@
+"""
+Timing, memory and baseline comparison helpers for the benchmarks.
+"""
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+def measure(name: str, func: Callable, items: Sequence, unit: str = "call",
+            units_per_item: int = 1, memory_items: int = 50, rounds: int = 3) -> Dict[str, object]:
+    """
+    Time func(item) for every item and measure its peak traced memory.
+
+    The timing pass is repeated and the round with the lowest median kept, which
+    filters out interference from other processes. Memory tracing runs in a
+    separate pass because tracemalloc slows allocation-heavy code down considerably.
+
+    Args:
+        name: Benchmark name
+        func: Callable invoked once per item
+        items: Inputs; their count sets the number of timed calls
+        unit: What one unit of throughput is (e.g. "sample", "row")
+        units_per_item: Units processed per call (e.g. rows in a predicted batch)
+        memory_items: Number of items replayed under tracemalloc
+        rounds: Number of timing passes over the items
+
+    Returns:
+        Dictionary with calls, throughput (units/s), mean/p50/p90/p99/max latency
+        in microseconds and peak memory in KiB
+    """
+    best = None
+    for _ in range(max(1, rounds)):
+        gc.collect()
+        run = []
+        start = time.perf_counter()
+        for item in items:
+            t0 = time.perf_counter_ns()
+            func(item)
+            run.append(time.perf_counter_ns() - t0)
+        run_elapsed = time.perf_counter() - start
+        run.sort()
+        if best is None or percentile(run, 50) < percentile(best, 50):
+            best, elapsed = run, run_elapsed
+    latencies = best
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for item in list(items)[:memory_items]:
+            func(item)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "calls": len(latencies),
+        "unit": unit,
+        "throughput": len(latencies) * units_per_item / elapsed if elapsed > 0 else float("inf"),
+        "mean_us": sum(latencies) / len(latencies) / 1e3,
+        "p50_us": percentile(latencies, 50) / 1e3,
+        "p90_us": percentile(latencies, 90) / 1e3,
+        "p99_us": percentile(latencies, 99) / 1e3,
+        "max_us": latencies[-1] / 1e3,
+        "peak_kib": peak / 1024,
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    pos = (len(sorted_values) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def environment() -> Dict[str, str]:
+    """Describe the interpreter and library versions the results were taken with."""
+    info = {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+    for module in ("numpy", "scipy", "pandas", "sklearn"):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = "missing"
+    return info
+
+
+def load_baseline(path: str) -> Optional[Dict[str, object]]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: List[Dict[str, object]], mode: str) -> None:
+    """Store results as the new baseline."""
+    data = {"mode": mode, "environment": environment(), "results": {r["name"]: r for r in results}}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def compare(results: List[Dict[str, object]], baseline: Dict[str, object],
+            tolerance: float = 0.25, memory_tolerance: float = 0.5) -> List[Dict[str, object]]:
+    """
+    Flag benchmarks that got slower or hungrier than the baseline.
+
+    The median latency is compared because it is far less sensitive to scheduler
+    noise than the mean or the tail.
+
+    Args:
+        results: Output of measure() for the current run
+        baseline: Baseline loaded with load_baseline()
+        tolerance: Allowed relative p50 latency increase (0.25 = 25 %)
+        memory_tolerance: Allowed relative peak memory increase
+
+    Returns:
+        One entry per benchmark present in both runs, with the ratios and a
+        "regression" flag
+    """
+    reference = baseline.get("results", {})
+    report = []
+    for result in results:
+        base = reference.get(result["name"])
+        if not base:
+            continue
+        time_ratio = result["p50_us"] / base["p50_us"] if base["p50_us"] else float("inf")
+        # Ignore memory noise below a few KiB
+        memory_ratio = (result["peak_kib"] + 4) / (base["peak_kib"] + 4)
+        report.append({
+            "name": result["name"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": time_ratio > 1 + tolerance or memory_ratio > 1 + memory_tolerance,
+        })
+    return report
+
+
+def format_table(results: List[Dict[str, object]], report: Optional[List[Dict[str, object]]] = None) -> str:
+    """Render results (and the baseline comparison, if any) as a text table."""
+    ratios = {r["name"]: r for r in report or []}
+    header = (f"{'benchmark':<42} {'calls':>6} {'throughput':>18} {'p50 us':>10} {'p90 us':>10} "
+              f"{'p99 us':>10} {'peak KiB':>9} {'vs base':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        ratio = ratios.get(r["name"])
+        flag = ""
+        if ratio:
+            flag = f"{ratio['time_ratio']:.2f}x" + (" !" if ratio["regression"] else "")
+        lines.append(
+            f"{r['name']:<42} {r['calls']:>6} {r['throughput']:>11.1f} {r['unit'] + '/s':<6} "
+            f"{r['p50_us']:>10.1f} {r['p90_us']:>10.1f} {r['p99_us']:>10.1f} {r['peak_kib']:>9.1f} {flag:>8}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,267 @@
+"""
+Benchmark suite for the sieve, USCS and ML hot paths.
+
+Times SieveAnalysisModel.calculate and each of its stages, the batch engine, the
+grain_curve D-value kernel (single curve and batch), the SoilSmart
+compute_d_values, the USCS classifiers and build_pipeline fit/predict
+for every algorithm in ML_ALGOS on seeded synthetic data. Reports throughput,
+latency percentiles and peak memory, and flags regressions against a stored
+baseline (exit status 1 when any benchmark regressed).
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # compare with benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --quick --only sieve
+    python benchmarks/run_benchmarks.py --save-baseline  # record a new baseline
+"""
+import argparse
+import contextlib
+import importlib.machinery
+import importlib.util
+import io
+import os
+import sys
+import warnings
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np
+
+import generators
+import harness
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Problem sizes per mode
+SIZES = {
+    "full": {"sieve": 2000, "stage": 500, "batch": 20, "uscs": 20000, "ml_rows": 2000, "fits": 3, "predicts": 200},
+    "quick": {"sieve": 300, "stage": 100, "batch": 5, "uscs": 3000, "ml_rows": 500, "fits": 1, "predicts": 50},
+}
+
+
+_soilsmart = None
+
+
+def load_soilsmart():
+    """Import the SoilSmart ML script, whose file name is not a valid module name."""
+    global _soilsmart
+    if _soilsmart is not None:
+        return _soilsmart
+    path = os.path.join(REPO_DIR, "using mechine algorithm")
+    loader = importlib.machinery.SourceFileLoader("soilsmart_app", path)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    _soilsmart = module
+    return module
+
+
+def sieve_benchmarks(sizes: Dict[str, int]) -> List[Dict[str, object]]:
+    import grain_curve
+    from sieve_core import SieveAnalysisModel
+    from sieve_batch import calculate_batch
+
+    samples = generators.sieve_samples(sizes["sieve"], seed=1)
+    results = []
+
+    model = SieveAnalysisModel()
+
+    def calculate(sample):
+        model.reset_data()
+        model.calculate(*sample)
+
+    results.append(harness.measure("sieve.calculate", _uncached(calculate), samples, unit="sample"))
+
+    # Stages, each timed on models that already hold a calculated sample (whose
+    # fitted curve calculate_d_values finds in grain_curve's memo, as in calculate)
+    models = []
+    for sample in samples[:sizes["stage"]]:
+        m = SieveAnalysisModel()
+        m.calculate(*sample)
+        models.append(m)
+
+    def smooth_curve(m):
+        m._smooth_cache = {}
+        m.smooth_curve(1000)
+
+    stages = [
+        ("percentages", lambda m: m._calculate_percentages()),
+        ("create_smooth_curve", _uncached(lambda m: m.create_smooth_curve())),
+        ("calculate_d_values", lambda m: m.calculate_d_values()),
+        ("calculate_coefficients", lambda m: m.calculate_coefficients()),
+        ("calculate_particle_distribution", lambda m: m.calculate_particle_distribution()),
+        ("smooth_curve_1000", smooth_curve),
+    ]
+    for stage, func in stages:
+        results.append(harness.measure(f"sieve.stage.{stage}", func, models, unit="sample"))
+
+    def edit(m):
+        index = len(m.retained_masses) // 2
+        m.update_retained(index, m.retained_masses[index] * 0.9)
+
+    results.append(harness.measure("sieve.update_retained", edit, models, unit="edit"))
+
+    # Batch engine on chunks of samples
+    chunk = max(1, len(samples) // sizes["batch"])
+    chunks = []
+    for start in range(0, chunk * sizes["batch"], chunk):
+        part = samples[start:start + chunk]
+        chunks.append((
+            [s[0] for s in part],
+            [[row[0] for row in s[1]] for s in part],
+            [[row[2] for row in s[1]] for s in part],
+        ))
+    results.append(harness.measure("sieve.calculate_batch", lambda c: calculate_batch(*c), chunks,
+                                   unit="sample", units_per_item=chunk, memory_items=2))
+
+    # Shared D-value kernel, one curve per call and whole arrays of curves
+    curves = generators.gradation_curves(sizes["sieve"], seed=3)
+    results.append(harness.measure("curve.d_values", _uncached(lambda c: grain_curve.d_values(*c)), curves,
+                                   unit="sample"))
+    curve_chunks = [(np.stack([c[0] for c in curves[start:start + chunk]]),
+                     np.stack([c[1] for c in curves[start:start + chunk]]))
+                    for start in range(0, chunk * sizes["batch"], chunk)]
+    results.append(harness.measure("curve.d_values_batch", lambda c: grain_curve.d_values_batch(*c),
+                                   curve_chunks, unit="sample", units_per_item=chunk, memory_items=2))
+    return results
+
+
+def _uncached(func: Callable) -> Callable:
+    """Wrap func so every call fits its curves again instead of hitting grain_curve's memo."""
+    import grain_curve
+
+    def call(item):
+        grain_curve.clear_cache()
+        return func(item)
+    return call
+
+
+def _runnable(func: Callable, args_list: List[tuple]) -> List[tuple]:
+    """Keep the inputs the function accepts (some branches raise on odd inputs)."""
+    runnable = []
+    for args in args_list:
+        try:
+            func(None, *args)
+            runnable.append(args)
+        except Exception:
+            pass
+    return runnable
+
+
+def uscs_benchmarks(sizes: Dict[str, int]) -> List[Dict[str, object]]:
+    from uscs import USCS_Classifier
+
+    inputs = generators.uscs_inputs(sizes["uscs"], seed=2)
+    results = []
+    for name, func, args_list in [
+        ("classify_fine_grained", USCS_Classifier.classify_fine_grained, inputs["fine"]),
+        ("classify_coarse_grained", USCS_Classifier.classify_coarse_grained, inputs["coarse"]),
+    ]:
+        # The classifiers do not use the instance, so no window is needed
+        runnable = _runnable(func, args_list)
+        skipped = len(args_list) - len(runnable)
+        if skipped:
+            print(f"[INFO] {name}: skipped {skipped} of {len(args_list)} inputs that raise", file=sys.stderr)
+        results.append(harness.measure(f"uscs.{name}", lambda args: func(None, *args), runnable,
+                                       unit="call", memory_items=500))
+    return results
+
+
+def ml_benchmarks(sizes: Dict[str, int]) -> List[Dict[str, object]]:
+    app = load_soilsmart()
+    results = []
+
+    curves = generators.gradation_curves(sizes["sieve"], seed=3, spanning=True)
+    results.append(harness.measure("ml.compute_d_values", _uncached(lambda c: app.compute_d_values(*c)), curves,
+                                   unit="sample"))
+
+    df = generators.ml_dataset(sizes["ml_rows"], seed=4, classify=app.classify_uscs_rule)
+    X = df[app.FEATURE_COLUMNS].values
+    y = df["USCS"].values
+    batch = X[:1000]
+    for algo in app.ML_ALGOS:
+        key = algo.lower().replace(" ", "_").replace("(", "").replace(")", "")
+        pipes = []
+
+        def fit(_):
+            pipe = app.build_pipeline(algo)
+            pipe.fit(X, y)
+            pipes.append(pipe)
+
+        results.append(harness.measure(f"ml.{key}.fit", fit, range(sizes["fits"]), unit="fit",
+                                       memory_items=1, rounds=1))
+        pipe = pipes[0]
+        rows = [X[i:i + 1] for i in range(sizes["predicts"])]
+        results.append(harness.measure(f"ml.{key}.predict_one", pipe.predict, rows, unit="row",
+                                       memory_items=20))
+        results.append(harness.measure(f"ml.{key}.predict_batch", lambda _: pipe.predict(batch),
+                                       range(max(3, sizes["fits"] * 3)), unit="row",
+                                       units_per_item=len(batch), memory_items=1))
+    return results
+
+
+SUITES = {"sieve": sieve_benchmarks, "uscs": uscs_benchmarks, "ml": ml_benchmarks}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the sieve, USCS and ML hot paths")
+    parser.add_argument("--quick", action="store_true", help="Smaller problem sizes for a fast check")
+    parser.add_argument("--only", action="append", choices=sorted(SUITES), help="Run only these suites")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative p50 latency increase before flagging (default 0.25)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.5,
+                        help="Allowed relative peak memory increase before flagging (default 0.5)")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    mode = "quick" if args.quick else "full"
+    # Library deprecation notices are not part of the report
+    warnings.simplefilter("ignore", FutureWarning)
+    np.random.seed(0)
+    suites = args.only or list(SUITES)
+    if "ml" in suites:
+        # The script selects the TkAgg backend, which must happen before pyplot is imported
+        load_soilsmart()
+    results = []
+    for name in suites:
+        # Keep the models' informational prints out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.extend(SUITES[name](SIZES[mode]))
+
+    report = None
+    baseline = harness.load_baseline(args.baseline)
+    if baseline and not args.save_baseline:
+        if baseline.get("mode") != mode:
+            print(f"[WARN] Baseline was recorded in {baseline.get('mode')} mode; not comparing")
+        else:
+            if baseline.get("environment") != harness.environment():
+                print("[WARN] Baseline was recorded with a different environment:", baseline.get("environment"))
+            report = harness.compare(results, baseline, args.tolerance, args.memory_tolerance)
+
+    print(harness.format_table(results, report))
+
+    if args.json:
+        harness.save_baseline(args.json, results, mode)
+    if args.save_baseline:
+        if baseline and baseline.get("mode") == mode and args.only:
+            # Keep the entries of suites that were not run
+            merged = dict(baseline["results"])
+            merged.update({r["name"]: r for r in results})
+            results = list(merged.values())
+        harness.save_baseline(args.baseline, results, mode)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = [r["name"] for r in report or [] if r["regression"]]
+    if regressions:
+        print(f"Regressions ({len(regressions)}): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Compiled random forest for SoilSmart models.
+
+compile_pipeline() flattens a fitted StandardScaler + RandomForestClassifier
+pipeline into a handful of contiguous NumPy arrays: the scaler's mean and scale,
+and for all trees together the split feature, threshold, left/right child and
+leaf value of every node. CompiledForest scores rows by walking all (row, tree)
+pairs at once, one tree level per step, with vectorized gathers, and drops the
+pairs that have reached a leaf; it needs only NumPy, and the arrays are saved to
+a .npz file that loads without pickle.
+
+The results are bit-for-bit those of the pipeline's predict_proba:
+
+    - rows are scaled in float64 and cast to float32, as the forest does
+    - thresholds are stored as the largest float32 not above sklearn's float64
+      threshold, so a float32 feature goes left exactly when sklearn sends it left
+    - rows with a missing value follow each split's missing_go_to_left flag
+    - leaf probabilities are summed tree by tree in forest order and divided by
+      the number of trees
+
+Usage:
+    python compiled_forest.py soil_model.pkl -o soil_model.npz
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+class CompiledForest:
+    """Random forest pipeline flattened into node arrays, scored without sklearn."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Args:
+            arrays: Node and scaler arrays as produced by compile_pipeline() or stored by save()
+        """
+        self.mean = np.ascontiguousarray(arrays["mean"], dtype=np.float64)
+        self.scale = np.ascontiguousarray(arrays["scale"], dtype=np.float64)
+        self.roots = np.ascontiguousarray(arrays["roots"], dtype=np.int32)
+        self.feature = np.ascontiguousarray(arrays["feature"], dtype=np.int32)
+        self.threshold = np.ascontiguousarray(arrays["threshold"], dtype=np.float32)
+        self.left = np.ascontiguousarray(arrays["left"], dtype=np.int32)
+        self.right = np.ascontiguousarray(arrays["right"], dtype=np.int32)
+        self.missing_left = np.ascontiguousarray(arrays["missing_left"], dtype=bool)
+        self.leaf = np.ascontiguousarray(arrays["leaf"], dtype=np.int32)
+        self.values = np.ascontiguousarray(arrays["values"], dtype=np.float64)
+        # Python strings, like the classes_ of a forest fitted on string labels
+        self.classes_ = np.asarray(arrays["classes"]).astype(object)
+        self.depth = int(arrays["depth"])
+        # Traversal copies: children side by side (2 * node + went_right) in native index width
+        self._children = np.stack([self.left, self.right], axis=1).ravel().astype(np.intp)
+        self._feature = self.feature.astype(np.intp)
+        self._is_leaf = self.left == np.arange(len(self.left))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.mean)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays."""
+        return sum(a.nbytes for a in (self.mean, self.scale, self.roots, self.feature, self.threshold,
+                                      self.left, self.right, self.missing_left, self.leaf, self.values))
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {"mean": self.mean, "scale": self.scale, "roots": self.roots, "feature": self.feature,
+                "threshold": self.threshold, "left": self.left, "right": self.right,
+                "missing_left": self.missing_left, "leaf": self.leaf, "values": self.values,
+                "classes": self.classes_.astype(str), "depth": np.int64(self.depth)}
+
+    def save(self, path: str) -> None:
+        """Write the arrays to an uncompressed .npz file."""
+        with open(path, "wb") as f:
+            np.savez(f, format_version=np.int64(FORMAT_VERSION), **self._arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        """
+        Read a file written by save().
+
+        Raises:
+            ValueError: If the file is not a compiled forest of this format version
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if "format_version" not in data.files or int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a compiled forest (format {FORMAT_VERSION})")
+            return cls({name: data[name] for name in data.files})
+
+    def _leaves(self, X32: np.ndarray) -> np.ndarray:
+        """Leaf index (into values) reached in every tree, shape (rows, trees)."""
+        n, n_features = X32.shape
+        flat = X32.ravel()
+        check_missing = np.isnan(flat).any()
+        # One entry per (row, tree) pair still descending
+        pair = np.arange(n * self.n_trees)
+        nodes = np.tile(self.roots.astype(np.intp), n)
+        row_start = np.repeat(np.arange(n, dtype=np.intp) * n_features, self.n_trees)
+        reached = np.empty(n * self.n_trees, dtype=np.intp)
+        # Single-leaf trees
+        done = self._is_leaf[nodes]
+        while len(pair):
+            if done.any():
+                reached[pair[done]] = nodes[done]
+                keep = ~done
+                pair, nodes, row_start = pair[keep], nodes[keep], row_start[keep]
+                if not len(pair):
+                    break
+            x = flat[row_start + self._feature[nodes]]
+            went_right = ~(x <= self.threshold[nodes])
+            if check_missing:
+                went_right &= ~(np.isnan(x) & self.missing_left[nodes])
+            nodes = self._children[2 * nodes + went_right]
+            done = self._is_leaf[nodes]
+        return self.leaf[reached].reshape(n, self.n_trees)
+
+    def predict_proba(self, X, chunk_size: int = 2048) -> np.ndarray:
+        """
+        Class probabilities, identical to the compiled pipeline's predict_proba.
+
+        Args:
+            X: Feature rows (FEATURE_COLUMNS order)
+            chunk_size: Rows walked through the trees at a time (bounds the working memory)
+
+        Returns:
+            Array of shape (rows, classes) in classes_ order
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected rows of {self.n_features} features, got shape {X.shape}")
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            X32 = ((X[start:start + chunk_size] - self.mean) / self.scale).astype(np.float32)
+            leaves = self._leaves(X32)
+            out = np.zeros((len(X32), len(self.classes_)), dtype=np.float64)
+            for t in range(self.n_trees):
+                out += self.values[leaves[:, t]]
+            out /= self.n_trees
+            proba[start:start + len(X32)] = out
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _float32_at_most(threshold: np.ndarray) -> np.ndarray:
+    """Largest float32 not above each float64 threshold."""
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def compile_pipeline(pipe) -> CompiledForest:
+    """
+    Flatten a fitted pipeline of an optional StandardScaler and a random forest.
+
+    Args:
+        pipe: Fitted Pipeline (as built by build_pipeline("Random Forest")) or a bare forest
+
+    Returns:
+        CompiledForest
+
+    Raises:
+        ValueError: If the pipeline holds other steps or the forest is not a single-output classifier
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    steps = [step for _, step in pipe.steps if step not in (None, "passthrough")] \
+        if isinstance(pipe, Pipeline) else [pipe]
+    scaler = steps[0] if len(steps) == 2 else None
+    forest = steps[-1]
+    if len(steps) > 2 or (scaler is not None and not isinstance(scaler, StandardScaler)):
+        raise ValueError("Only a StandardScaler followed by a random forest can be compiled")
+    if not isinstance(forest, (RandomForestClassifier, ExtraTreesClassifier)):
+        raise ValueError(f"Only random forests can be compiled, not {type(forest).__name__}")
+    if forest.n_outputs_ != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    n_features = forest.n_features_in_
+    mean = np.zeros(n_features)
+    scale = np.ones(n_features)
+    if scaler is not None:
+        if scaler.with_mean:
+            mean = scaler.mean_
+        if scaler.with_std:
+            scale = scaler.scale_
+
+    n_classes = forest.n_classes_
+    roots, feature, threshold, left, right, missing_left, leaf, values = [], [], [], [], [], [], [], []
+    offset = n_leaves = depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left < 0
+        own = np.arange(offset, offset + n)
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, own, tree.children_left + offset))
+        right.append(np.where(is_leaf, own, tree.children_right + offset))
+        missing_left.append(np.asarray(tree.missing_go_to_left, dtype=bool) & ~is_leaf)
+        tree_leaf = np.full(n, -1)
+        tree_leaf[is_leaf] = np.arange(n_leaves, n_leaves + is_leaf.sum())
+        leaf.append(tree_leaf)
+        # Per-tree class fractions, as DecisionTreeClassifier.predict_proba returns them
+        values.append(tree.value[is_leaf, 0, :n_classes])
+        offset += n
+        n_leaves += int(is_leaf.sum())
+        depth = max(depth, tree.max_depth)
+
+    return CompiledForest({
+        "mean": mean,
+        "scale": scale,
+        "roots": np.array(roots),
+        "feature": np.concatenate(feature),
+        "threshold": _float32_at_most(np.concatenate(threshold)),
+        "left": np.concatenate(left),
+        "right": np.concatenate(right),
+        "missing_left": np.concatenate(missing_left),
+        "leaf": np.concatenate(leaf),
+        "values": np.concatenate(values),
+        "classes": np.array([str(c) for c in forest.classes_]),
+        "depth": depth,
+    })
+
+
+def export(model_path: str, output: str) -> CompiledForest:
+    """Compile a pipeline saved with joblib and write it to output (.npz)."""
+    import joblib
+
+    compiled = compile_pipeline(joblib.load(model_path))
+    compiled.save(output)
+    return compiled
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a SoilSmart random forest model to NumPy arrays")
+    parser.add_argument("model", help="Random forest model saved by SoilSmart (.pkl)")
+    parser.add_argument("-o", "--output", default=None, help="Output file (default: model name with .npz)")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.model)[0] + ".npz"
+    start = time.perf_counter()
+    compiled = export(args.model, output)
+    print(f"Compiled {compiled.n_trees} trees ({len(compiled.feature)} nodes, depth {compiled.depth}) "
+          f"in {time.perf_counter() - start:.2f}s -> {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""
+Vectorized PCHIP kernel for grain-size distribution curves.
+
+All functions work on 2-D arrays of shape (samples, sieves) so that whole batches
+of sieve tests can be interpolated and inverted with array operations. The slopes
+reproduce ``scipy.interpolate.PchipInterpolator`` exactly, so a batch row gives the
+same curve as the single-sample model.
+
+This is the one place D-values are computed: d_values() for a single curve and
+d_values_batch() for many, both returning the smallest size at which the curve
+passes each percentage, and coefficients() for Cu and Cc. The sieve model, the
+batch sieve engine, the SoilSmart features and the USCS classifier all use them,
+so a percentage a curve never reaches gets the same D_VALUE_FALLBACK everywhere.
+The single-curve path solves each segment cubic with the math module and the
+batch path with NumPy; the two agree to within a couple of units in the last
+place. fit_curve() memoizes single-curve fits on their knots, so the model and
+d_values() share one fit of the same data.
+"""
+import math
+from functools import lru_cache
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+# Percentages of the D-values used for Cu and Cc
+D_PERCENTS = (10.0, 30.0, 60.0)
+
+# What a percentage the curve never reaches gives: NaN, or the size of the knot
+# whose percentage is closest to it (every PCHIP segment is monotone, so the
+# closest point of the curve is a knot)
+FALLBACKS = ("nan", "nearest")
+
+# The fallback of d_values() and d_values_batch(): every caller needs a number to
+# carry on with (Cu, Cc, model features), and the sieve model has always reported
+# the nearest knot for a curve that stops short of 10 %
+D_VALUE_FALLBACK = "nearest"
+
+
+def sort_curves(sizes: np.ndarray, percents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sort every curve of a batch by ascending particle size.
+
+    Args:
+        sizes: Array (samples x sieves) of sieve openings in mm
+        percents: Array (samples x sieves) of percent passing
+
+    Returns:
+        Tuple (x, y) of float arrays sorted row-wise by x
+    """
+    x = np.atleast_2d(np.asarray(sizes, dtype=float))
+    y = np.atleast_2d(np.asarray(percents, dtype=float))
+    order = np.argsort(x, axis=1, kind="stable")
+    return np.take_along_axis(x, order, axis=1), np.take_along_axis(y, order, axis=1)
+
+
+def _edge_slopes(h0: np.ndarray, h1: np.ndarray, m0: np.ndarray, m1: np.ndarray) -> np.ndarray:
+    """One-sided three-point end slopes with the PCHIP shape-preserving limits."""
+    d = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    mask = np.sign(d) != np.sign(m0)
+    mask2 = (np.sign(m0) != np.sign(m1)) & (np.abs(d) > 3.0 * np.abs(m0))
+    d = np.where(mask, 0.0, d)
+    return np.where(~mask & mask2, 3.0 * m0, d)
+
+
+def pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Compute PCHIP knot derivatives for every curve of a batch.
+
+    Args:
+        x: Sorted sizes, shape (samples, sieves), strictly increasing per row
+        y: Percent passing at each size, same shape as x
+
+    Returns:
+        Array of knot derivatives with the same shape as x
+    """
+    h = np.diff(x, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m = np.diff(y, axis=1) / h
+
+    if x.shape[1] == 2:
+        # Two points only: the curve is the straight line between them
+        return np.concatenate([m, m], axis=1)
+
+    sm = np.sign(m)
+    flat = (sm[:, 1:] != sm[:, :-1]) | (m[:, 1:] == 0) | (m[:, :-1] == 0)
+    w1 = 2 * h[:, 1:] + h[:, :-1]
+    w2 = h[:, 1:] + 2 * h[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        whmean = (w1 / m[:, :-1] + w2 / m[:, 1:]) / (w1 + w2)
+        interior = np.where(flat, 0.0, 1.0 / whmean)
+
+    d = np.empty_like(y)
+    d[:, 1:-1] = interior
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d[:, 0] = _edge_slopes(h[:, 0], h[:, 1], m[:, 0], m[:, 1])
+        d[:, -1] = _edge_slopes(h[:, -1], h[:, -2], m[:, -1], m[:, -2])
+    return d
+
+
+def hermite_coefficients(x: np.ndarray, y: np.ndarray, d: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Express every PCHIP segment as a cubic in the local coordinate t in [0, 1].
+
+    On segment i, y(t) = c0 + c1*t + c2*t**2 + c3*t**3 with x = x[i] + t*h[i].
+
+    Returns:
+        Tuple (h, c0, c1, c2, c3), each of shape (samples, sieves - 1)
+    """
+    h = np.diff(x, axis=1)
+    y0, y1 = y[:, :-1], y[:, 1:]
+    hd0, hd1 = h * d[:, :-1], h * d[:, 1:]
+    c2 = 3 * (y1 - y0) - 2 * hd0 - hd1
+    c3 = 2 * (y0 - y1) + hd0 + hd1
+    return h, y0, hd0, c2, c3
+
+
+def solve_unit_cubic(c0, c1, c2, c3, newton_steps: int = 2):
+    """
+    Solve c0 + c1*t + c2*t**2 + c3*t**3 = 0 for the root in [0, 1], elementwise.
+
+    Intended for monotone segments whose end values bracket zero, which have exactly
+    one root there. All real roots are computed in closed form (Cardano or the
+    trigonometric form for the cubic, the stable quadratic formula when the cubic
+    term vanishes) alongside the segment ends, the candidate closest to a root in
+    [0, 1] is kept and a couple of Newton steps, accepted only where they reduce the
+    residual, remove the rounding error of the closed-form expressions.
+
+    Returns:
+        Array of roots t in [0, 1] broadcast from the coefficient shapes
+    """
+    c0, c1, c2, c3 = np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in (c0, c1, c2, c3)))
+
+    def f(t):
+        return ((c3 * t + c2) * t + c1) * t + c0
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Cubic term: depressed cubic u**3 + p*u + q = 0 with t = u - b/3
+        b, c, d = c2 / c3, c1 / c3, c0 / c3
+        p = c - b * b / 3
+        q = 2 * b ** 3 / 27 - b * c / 3 + d
+        disc = (q / 2) ** 2 + (p / 3) ** 3
+        sq = np.sqrt(np.where(disc > 0, disc, np.nan))
+        one_real = np.cbrt(-q / 2 + sq) + np.cbrt(-q / 2 - sq) - b / 3
+        r = np.sqrt(np.where(disc <= 0, -p / 3, np.nan))
+        phi = np.arccos(np.clip(-q / (2 * r ** 3), -1.0, 1.0)) / 3
+        three_real = [2 * r * np.cos(phi - 2 * np.pi * k / 3) - b / 3 for k in range(3)]
+
+        # Quadratic (and, through the second root, linear) when the cubic term vanishes
+        qd = np.sqrt(np.maximum(c1 * c1 - 4 * c2 * c0, 0.0))
+        qq = -0.5 * (c1 + np.where(c1 >= 0, qd, -qd))
+        quadratic = [qq / c2, c0 / qq]
+
+    # The segment ends come first so that roots sitting exactly on a knot win ties
+    ends = [np.zeros_like(c0), np.ones_like(c0)]
+    candidates = np.stack(ends + [one_real] + three_real + quadratic)
+    clipped = np.clip(np.nan_to_num(candidates, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+    score = np.abs(f(clipped)) + np.where(np.isfinite(candidates), np.abs(candidates - clipped), np.inf)
+    t = np.take_along_axis(clipped, np.argmin(score, axis=0)[None], axis=0)[0]
+
+    for _ in range(newton_steps):
+        slope = (3 * c3 * t + 2 * c2) * t + c1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(slope != 0, f(t) / slope, 0.0)
+        t_new = np.clip(t - np.nan_to_num(step), 0.0, 1.0)
+        t = np.where(np.abs(f(t_new)) < np.abs(f(t)), t_new, t)
+    return t
+
+
+def _unit_cubic_root(c0: float, c1: float, c2: float, c3: float, newton_steps: int = 2) -> float:
+    """
+    Scalar counterpart of solve_unit_cubic using the math module, for single curves
+    where the per-call overhead of numpy on 0-d arrays dominates.
+    """
+    def f(t):
+        return ((c3 * t + c2) * t + c1) * t + c0
+
+    candidates = [0.0, 1.0]
+    if c3 != 0:
+        b, c, d = c2 / c3, c1 / c3, c0 / c3
+        p = c - b * b / 3
+        q = 2 * b ** 3 / 27 - b * c / 3 + d
+        disc = (q / 2) ** 2 + (p / 3) ** 3
+        if disc > 0:
+            sq = math.sqrt(disc)
+            u = -q / 2 + sq
+            v = -q / 2 - sq
+            candidates.append(math.copysign(abs(u) ** (1 / 3), u) + math.copysign(abs(v) ** (1 / 3), v) - b / 3)
+        else:
+            r = math.sqrt(-p / 3)
+            phi = math.acos(max(-1.0, min(1.0, -q / (2 * r ** 3)))) / 3 if r > 0 else 0.0
+            candidates.extend(2 * r * math.cos(phi - 2 * math.pi * k / 3) - b / 3 for k in range(3))
+    qd = math.sqrt(max(c1 * c1 - 4 * c2 * c0, 0.0))
+    qq = -0.5 * (c1 + (qd if c1 >= 0 else -qd))
+    if c2 != 0:
+        candidates.append(qq / c2)
+    if qq != 0:
+        candidates.append(c0 / qq)
+
+    best, best_score = 0.0, math.inf
+    for cand in candidates:
+        if not math.isfinite(cand):
+            continue
+        clipped = min(1.0, max(0.0, cand))
+        score = abs(f(clipped)) + abs(cand - clipped)
+        if score < best_score:
+            best, best_score = clipped, score
+
+    t = best
+    for _ in range(newton_steps):
+        slope = (3 * c3 * t + 2 * c2) * t + c1
+        if slope != 0:
+            t_new = min(1.0, max(0.0, t - f(t) / slope))
+            if abs(f(t_new)) < abs(f(t)):
+                t = t_new
+    return t
+
+
+def bracketing_segments(y: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locate, for every curve and target, the first segment whose ends bracket it.
+
+    Each PCHIP segment is monotone, so a segment contains a crossing exactly when
+    its two knot values bracket the target.
+
+    Args:
+        y: Knot values, shape (samples, sieves)
+        targets: Target percentages, shape (percentiles,)
+
+    Returns:
+        Tuple (segment, found) of shape (samples, percentiles)
+    """
+    lo = y[:, None, :-1] - targets[None, :, None]
+    hi = y[:, None, 1:] - targets[None, :, None]
+    crosses = lo * hi <= 0
+    return np.argmax(crosses, axis=2), crosses.any(axis=2)
+
+
+def _fill_unreached(sizes: np.ndarray, found: np.ndarray, x: np.ndarray, y: np.ndarray,
+                    targets: np.ndarray, fallback: str) -> np.ndarray:
+    """Replace the sizes of unreached targets (found False) according to fallback."""
+    if fallback == "nan":
+        return np.where(found, sizes, np.nan)
+    if fallback == "nearest":
+        nearest = np.argmin(np.abs(y[:, None, :] - targets[None, :, None]), axis=2)
+        return np.where(found, sizes, np.take_along_axis(x, nearest, axis=1))
+    raise ValueError(f"fallback must be one of {FALLBACKS}")
+
+
+def invert_curves(x: np.ndarray, y: np.ndarray, d: np.ndarray, targets, fallback: str = "nearest") -> np.ndarray:
+    """
+    Find the particle sizes at which each curve passes the target percentages.
+
+    When several crossings exist the smallest size is returned.
+
+    Args:
+        x: Sorted sizes, shape (samples, sieves)
+        y: Percent passing, same shape as x
+        d: Knot derivatives from pchip_slopes
+        targets: Sequence of target percentages (e.g. [10, 30, 60])
+        fallback: Result for a target a curve never reaches, one of FALLBACKS
+
+    Returns:
+        Array of sizes with shape (samples, len(targets))
+    """
+    targets = np.asarray(targets, dtype=float)
+    h, c0, c1, c2, c3 = hermite_coefficients(x, y, d)
+    seg, found = bracketing_segments(y, targets)
+
+    def pick(a):
+        return np.take_along_axis(a, seg, axis=1)
+
+    t = solve_unit_cubic(pick(c0) - targets, pick(c1), pick(c2), pick(c3))
+    roots = pick(x[:, :-1]) + t * pick(h)
+    return _fill_unreached(roots, found, x, y, targets, fallback)
+
+
+class PchipCurve:
+    """
+    A single grain size curve with PCHIP interpolation and closed-form inversion.
+
+    Calling the curve evaluates it like ``scipy.interpolate.PchipInterpolator``
+    (extrapolating the end cubics); crossing() inverts it without any sampling grid.
+    """
+
+    def __init__(self, x, y):
+        """
+        Args:
+            x: Particle sizes, strictly increasing
+            y: Percent passing at each size
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.ndim != 1 or x.shape != y.shape or len(x) < 2:
+            raise ValueError("x and y must be 1-D arrays of the same length (at least 2)")
+        if not (np.all(np.isfinite(x)) and np.all(np.isfinite(y))):
+            raise ValueError("x and y must be finite")
+        if np.any(np.diff(x) <= 0):
+            raise ValueError("x must be strictly increasing")
+
+        self.x = x
+        self.y = y
+        self.d = pchip_slopes(x[None], y[None])[0]
+        self.h, self.c0, self.c1, self.c2, self.c3 = (
+            c[0] for c in hermite_coefficients(x[None], y[None], self.d[None])
+        )
+        self.monotone = bool(np.all(np.diff(y) >= 0))
+
+    def __call__(self, x_new):
+        """Evaluate the curve at the given sizes."""
+        x_new = np.asarray(x_new, dtype=float)
+        i = np.clip(np.searchsorted(self.x, x_new, side="right") - 1, 0, len(self.h) - 1)
+        t = (x_new - self.x[i]) / self.h[i]
+        return ((self.c3[i] * t + self.c2[i]) * t + self.c1[i]) * t + self.c0[i]
+
+    def bracket(self, target: float) -> Optional[int]:
+        """
+        Find the first segment whose knot values bracket a target percentage.
+
+        Uses a binary search on the knot values when the data are monotone and a
+        scan of the knots otherwise.
+
+        Returns:
+            Segment index, or None if the curve never reaches the target
+        """
+        if self.monotone:
+            i = int(np.searchsorted(self.y, target, side="left"))
+            if i == len(self.y) or (i == 0 and self.y[0] != target):
+                return None
+            return max(i - 1, 0)
+        segs, found = bracketing_segments(self.y[None], np.array([target], dtype=float))
+        return int(segs[0, 0]) if found[0, 0] else None
+
+    def segment_root(self, seg: int, target: float) -> float:
+        """Solve the cubic of one segment for the size at which it passes target."""
+        t = _unit_cubic_root(float(self.c0[seg]) - target, float(self.c1[seg]),
+                             float(self.c2[seg]), float(self.c3[seg]))
+        return float(self.x[seg]) + t * float(self.h[seg])
+
+    def crossings(self, targets, fallback: str = "nan") -> np.ndarray:
+        """
+        Find the smallest crossing of every target percentage.
+
+        Each target is bracketed with bracket() and its segment cubic solved with
+        segment_root(); for the handful of targets of a single curve this scalar
+        path is much cheaper than the array solver.
+
+        Args:
+            targets: Sequence of target percentages (e.g. [5, 15, 50, 85, 90])
+            fallback: Result for a target the curve never reaches, one of FALLBACKS
+
+        Returns:
+            Array of particle sizes
+        """
+        if fallback not in FALLBACKS:
+            raise ValueError(f"fallback must be one of {FALLBACKS}")
+        sizes = []
+        for target in np.asarray(targets, dtype=float).reshape(-1).tolist():
+            seg = self.bracket(target)
+            if seg is not None:
+                sizes.append(self.segment_root(seg, target))
+            elif fallback == "nearest":
+                sizes.append(float(self.x[np.argmin(np.abs(self.y - target))]))
+            else:
+                sizes.append(math.nan)
+        return np.array(sizes, dtype=float)
+
+    def crossing(self, target: float) -> Optional[float]:
+        """
+        Find the smallest size at which the curve passes a target percentage.
+
+        The bracketing segment is located with bracket(), then its cubic is solved
+        analytically.
+
+        Args:
+            target: Percentage value to find (e.g. 10, 30 or 60)
+
+        Returns:
+            The particle size at the crossing, or None if the curve never reaches it
+        """
+        seg = self.bracket(target)
+        return None if seg is None else self.segment_root(seg, target)
+
+
+def fit_curve(sizes, finer) -> PchipCurve:
+    """
+    PCHIP curve through one grain size curve, memoized on the input values.
+
+    The sieve model fits its curve here and d_values() looks the same curve up, so
+    the repeated lookups of an interactive session (compute, classify, add to
+    dataset, predict) fit each curve once. The returned curve is shared: do not
+    modify it.
+
+    Args:
+        sizes: Particle sizes in mm, any order, all different
+        finer: Percent finer (passing) at each size
+
+    Raises:
+        ValueError: If the sizes and percentages do not form a curve (fewer than two
+            points, repeated sizes, non-finite values)
+    """
+    return _memo_curve(tuple(np.asarray(sizes, dtype=float).ravel().tolist()),
+                       tuple(np.asarray(finer, dtype=float).ravel().tolist()))
+
+
+@lru_cache(maxsize=1024)
+def _memo_curve(sizes: Tuple[float, ...], finer: Tuple[float, ...]) -> PchipCurve:
+    x = np.array(sizes)
+    y = np.array(finer)
+    if x.shape != y.shape:
+        raise ValueError("Sizes and percent finer must have the same length")
+    order = np.argsort(x, kind="stable")
+    return PchipCurve(x[order], y[order])
+
+
+def clear_cache() -> None:
+    """Forget the memoized curves (for timing the uncached path)."""
+    _memo_curve.cache_clear()
+
+
+def d_values(sizes, finer, percents: Sequence[float] = D_PERCENTS) -> np.ndarray:
+    """
+    D-values of a single grain size curve, on the curve fitted by fit_curve().
+
+    Args:
+        sizes: Particle sizes in mm, any order, all different
+        finer: Percent finer (passing) at each size
+        percents: Percentages to invert (default D10, D30, D60)
+
+    Returns:
+        Array of sizes in mm, one per percentage; a percentage the curve never
+        reaches gives the size of the nearest knot (D_VALUE_FALLBACK)
+
+    Raises:
+        ValueError: If the sizes and percentages do not form a curve (fewer than two
+            points, repeated sizes, non-finite values)
+    """
+    return fit_curve(sizes, finer).crossings(percents, D_VALUE_FALLBACK)
+
+
+def d_values_batch(sizes, finer, percents: Sequence[float] = D_PERCENTS) -> np.ndarray:
+    """
+    D-values of many grain size curves at once.
+
+    Args:
+        sizes: Particle sizes, shape (samples, sieves), any order within a row
+        finer: Percent finer, same shape
+        percents: Percentages to invert (default D10, D30, D60)
+
+    Returns:
+        Array (samples x len(percents)) of sizes in mm, with d_values()'s fallback
+        for unreached percentages; NaN for every percentage of a row whose sizes
+        and percentages do not form a curve
+    """
+    x, y = sort_curves(sizes, finer)
+    valid = np.isfinite(x).all(axis=1) & np.isfinite(y).all(axis=1)
+    if x.shape[1] >= 2:
+        valid &= np.all(np.diff(x, axis=1) > 0, axis=1)
+    else:
+        valid[:] = False
+    out = np.full((x.shape[0], len(percents)), np.nan)
+    if valid.any():
+        xv, yv = x[valid], y[valid]
+        out[valid] = invert_curves(xv, yv, pchip_slopes(xv, yv), percents, D_VALUE_FALLBACK)
+    return out
+
+
+def coefficients(d10, d30, d60, undefined: float = np.nan) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coefficients of uniformity and curvature from D-values, elementwise.
+
+    Cu = D60 / D10 and Cc = D30**2 / (D60 * D10).
+
+    Args:
+        d10, d30, d60: D-values (scalars or arrays)
+        undefined: Value where the denominator is zero
+
+    Returns:
+        Tuple (cu, cc): floats for Python float or int input, float arrays otherwise
+    """
+    if all(isinstance(v, (int, float)) for v in (d10, d30, d60)):
+        # Single sample (the sieve model, the GUI classifiers): plain float arithmetic
+        # is several times faster than going through 0-d arrays
+        d10, d30, d60 = float(d10), float(d30), float(d60)
+        cu = d60 / d10 if d10 != 0 else undefined
+        cc = d30 * d30 / (d60 * d10) if d60 * d10 != 0 else undefined
+        return cu, cc
+    d10, d30, d60 = (np.asarray(v, dtype=float) for v in (d10, d30, d60))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cu = np.where(d10 != 0, d60 / d10, undefined)
+        cc = np.where(d60 * d10 != 0, d30 ** 2 / (d60 * d10), undefined)
+    return cu, cc
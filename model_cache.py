@@ -0,0 +1,276 @@
+"""
+Shared, memory-mapped cache of saved SoilSmart models.
+
+ModelCache.get(path) returns the model saved at path, loading it once per
+process. Entries are keyed by the file's absolute path, modification time and
+SHA-256 content hash, so a model rewritten in place (a new training run) is
+picked up on the next get(), while touching or copying a file does not cause a
+reload under a new name.
+
+On the first load a model is written, uncompressed, to a content-addressed
+artifact (``<cache_dir>/<sha256>.joblib``) and loaded from there with
+``joblib.load(mmap_mode="c")``: its NumPy arrays become copy-on-write memory maps
+of that file, so every process serving the same model shares one physical copy
+through the page cache (copy-on-write rather than read-only because libsvm
+insists on writable buffers; prediction never writes, so the pages stay shared).
+Artifacts never change once written (they are created under a temporary name and
+renamed into place), which keeps the maps valid even while the app overwrites the
+original model file.
+
+Loading an artifact unpickles it, so only artifacts this user wrote are trusted:
+the default cache_dir is per user (``<tmp>/soilsmart-models-<uid>``, created with
+mode 0o700), the directory and each artifact must be owned by the user and not
+writable by group or others, and every artifact is checked against the SHA-256
+recorded next to it (``<sha256>.joblib.sha256``) before it is loaded. A missing,
+stale or mismatching artifact is written again; when cache_dir itself is not
+private, models are loaded as private copies instead of shared maps.
+
+Arrays that an estimator copies while being unpickled stay private to each
+process; this is the case for the nodes of sklearn trees, so random forests are
+best shared as a compiled forest (.npz, see compiled_forest), whose arrays are
+all mapped.
+
+The cache holds at most ``budget_bytes`` of models (measured by artifact size)
+and evicts the least recently used ones beyond that. stats() reports hits,
+misses, evictions and the mapped and resident sizes.
+"""
+import hashlib
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from soil_ml import load_model
+
+DEFAULT_BUDGET_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    """Per-user artifact directory under the temporary directory."""
+    getuid = getattr(os, "getuid", None)
+    # Without uids (Windows) the temporary directory is already per user
+    name = f"soilsmart-models-{getuid()}" if getuid else "soilsmart-models"
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def is_private(path: str) -> bool:
+    """
+    Whether path is a directory or regular file (not a symlink) owned by this user
+    and not writable by group or others. Always true where there are no uids.
+    """
+    if not hasattr(os, "getuid"):
+        return os.path.lexists(path) and not os.path.islink(path)
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    if not (stat.S_ISDIR(st.st_mode) or stat.S_ISREG(st.st_mode)):
+        return False
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mapped_bytes(obj) -> int:
+    """Bytes of the memory-mapped NumPy arrays reachable from obj's attributes and containers."""
+    total = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if isinstance(item, np.memmap) or isinstance(item.base, np.memmap):
+                total += item.nbytes
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.extend(vars(item).values())
+    return total
+
+
+class ModelCache:
+    """Process-wide cache of loaded models with a memory budget."""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES, cache_dir: Optional[str] = None,
+                 mmap: bool = True):
+        """
+        Args:
+            budget_bytes: Largest total size of the cached models before the least recently
+                used ones are dropped (the most recent model is always kept)
+            cache_dir: Directory of the shared artifacts (default: default_cache_dir(), a
+                per-user directory created with mode 0o700)
+            mmap: Memory-map models from shared artifacts; False loads private copies
+        """
+        self.budget_bytes = budget_bytes
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.mmap = mmap
+        self._entries = OrderedDict()  # (path, mtime_ns, sha256) -> (model, size, mapped)
+        self._digests = {}  # path -> (mtime_ns, size, sha256)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.artifact_writes = 0
+        self.stale_artifacts = 0
+        self._warned_dir = False
+        self.load_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def _key(self, path: str) -> Tuple[str, int, str]:
+        """Cache key of the file at path; the content is only hashed again when its stat changes."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        known = self._digests.get(path)
+        if known is None or known[:2] != (st.st_mtime_ns, st.st_size):
+            start = time.perf_counter()
+            known = (st.st_mtime_ns, st.st_size, file_digest(path))
+            self.hash_seconds += time.perf_counter() - start
+            self._digests[path] = known
+        return path, known[0], known[2]
+
+    def _verified(self, artifact: str) -> bool:
+        """Whether artifact and its recorded hash are private and the content matches the hash."""
+        recorded = f"{artifact}.sha256"
+        if not (is_private(artifact) and is_private(recorded)):
+            return False
+        with open(recorded) as f:
+            expected = f.read().strip()
+        return file_digest(artifact) == expected
+
+    def _artifact(self, digest: str, model) -> Optional[str]:
+        """
+        Path of the verified shared artifact for digest, writing it from model when no
+        process has yet or the one present does not verify; None when cache_dir is not
+        private to this user (the model is then not shared).
+        """
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        if not is_private(self.cache_dir):
+            if not self._warned_dir:
+                print(f"[WARN] {self.cache_dir} is not a private directory of this user; "
+                      "models are loaded without sharing", file=sys.stderr)
+                self._warned_dir = True
+            return None
+        artifact = os.path.join(self.cache_dir, f"{digest}.joblib")
+        if self._verified(artifact):
+            return artifact
+        if os.path.lexists(artifact):
+            self.stale_artifacts += 1
+
+        tmp_path = f"{artifact}.{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump(model, tmp_path)
+        os.chmod(tmp_path, 0o600)
+        tmp_recorded = f"{tmp_path}.sha256"
+        with open(tmp_recorded, "w") as f:
+            f.write(file_digest(tmp_path))
+        os.chmod(tmp_recorded, 0o600)
+        os.replace(tmp_path, artifact)
+        os.replace(tmp_recorded, f"{artifact}.sha256")
+        self.artifact_writes += 1
+        return artifact
+
+    def _store(self, key: Tuple[str, int, str], model, size: int) -> None:
+        # An older version of the same file is not coming back
+        for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+            del self._entries[stale]
+        self._entries[key] = (model, size, mapped_bytes(model))
+        self._entries.move_to_end(key)
+        while len(self._entries) > 1 and self.resident_bytes > self.budget_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, path: str):
+        """
+        Model saved at path (.pkl or compiled .npz), from the cache when possible.
+
+        The returned model is shared: use it for prediction only.
+        """
+        with self._lock:
+            key = self._key(path)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+
+            self.misses += 1
+            start = time.perf_counter()
+            model = load_model(path)
+            size = os.path.getsize(path)
+            artifact = self._artifact(key[2], model) if self.mmap else None
+            if artifact is not None:
+                model = joblib.load(artifact, mmap_mode="c")
+                size = os.path.getsize(artifact)
+            self.load_seconds += time.perf_counter() - start
+            self._store(key, model, size)
+            return model
+
+    def put(self, path: str, model) -> None:
+        """Cache a model that was just saved to path, so the next get() does not reload it."""
+        with self._lock:
+            key = self._key(path)
+            self._store(key, model, os.path.getsize(path))
+
+    def evict(self, path: Optional[str] = None) -> None:
+        """Drop every cached version of path, or everything without a path."""
+        with self._lock:
+            drop = [k for k in self._entries if path is None or k[0] == os.path.abspath(path)]
+            for key in drop:
+                del self._entries[key]
+            self.evictions += len(drop)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries.values())
+
+    def stats(self) -> Dict[str, object]:
+        """Counters and sizes of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "artifact_writes": self.artifact_writes,
+                "stale_artifacts": self.stale_artifacts,
+                "resident_bytes": self.resident_bytes,
+                "mapped_bytes": sum(mapped for _, _, mapped in self._entries.values()),
+                "budget_bytes": self.budget_bytes,
+                "load_seconds": round(self.load_seconds, 4),
+                "hash_seconds": round(self.hash_seconds, 4),
+                "models": [{"path": k[0], "sha256": k[2][:12], "bytes": size, "mapped_bytes": mapped}
+                           for k, (_, size, mapped) in self._entries.items()],
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> ModelCache:
+    """The process-wide cache used by the app and the inference server."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModelCache()
+        return _shared
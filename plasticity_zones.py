@@ -0,0 +1,160 @@
+"""
+Zone index for the USCS plasticity chart.
+
+Classifies (LL, PI) points into the regions of the chart drawn by
+``USCS_Classifier.draw_blank_plasticity_chart``: CL, ML, CL-ML, CH and MH (or
+OL/OH for organic soils), with the boundaries the USCS classifiers use. A lookup table over the chart is built once at import;
+points in cells that lie entirely inside one region are classified by a single
+array index, and only cells crossed by a boundary fall back to the exact region
+tests. Points outside the table use the exact tests directly.
+
+Regions:
+    A-line      PI = 4 up to LL = 25.5, then PI = 0.73 (LL - 20)
+    U-line      PI = max(7, 0.9 (LL - 8))
+    CL-ML       4 <= PI <= 7 on or above the A-line
+    ML          LL < 50, PI below the A-line
+    CL          LL < 50, PI above 7 (and on or above the A-line) up to the U-line
+    MH          LL >= 50, PI below the A-line
+    CH          LL >= 50, from the A-line up to the U-line
+"Below the A-line" is below_a_line(), the strict test the USCS classifiers use, so
+a point on the line belongs to the zone above it. The chart hatches CL-ML only
+from LL = 10, but the classifiers name every soil in the 4-7 PI band CL-ML, and
+so does the index. Points above the U-line and negative values are NONE.
+"""
+import numpy as np
+
+NONE, CL, ML, CL_ML, CH, MH, OL, OH = range(8)
+ZONE_NAMES = ["", "CL", "ML", "CL-ML", "CH", "MH", "OL", "OH"]
+
+# Extent and resolution of the lookup table (chart area plus margin)
+LL_MAX = 120.0
+PI_MAX = 80.0
+CELL = 0.25
+_MIXED = 255
+
+# PI band of CL-ML
+_CLML_PI_MIN = 4.0
+_CLML_PI_MAX = 7.0
+
+# A-line: PI = 4 up to LL = 25.5, then PI = 0.73 (LL - 20)
+A_LINE_PI_MIN = 4.0
+A_LINE_LL_CORNER = 25.5
+A_LINE_SLOPE = 0.73
+A_LINE_LL_ZERO = 20.0
+# U-line: PI = max(7, 0.9 (LL - 8))
+U_LINE_PI_MIN = 7.0
+U_LINE_SLOPE = 0.9
+U_LINE_LL_ZERO = 8.0
+
+# Corners of the region boundaries; cells containing one are always resolved exactly
+_VERTICES = [
+    (0.0, 4.0), (0.0, 7.0), (25.5, 4.0), (29.589, 7.0), (U_LINE_LL_ZERO + U_LINE_PI_MIN / U_LINE_SLOPE, U_LINE_PI_MIN),
+    (50.0, A_LINE_SLOPE * (50.0 - A_LINE_LL_ZERO)), (50.0, U_LINE_SLOPE * (50.0 - U_LINE_LL_ZERO)),
+    (50.0, 0.0), (25.5, 7.0),
+]
+
+
+def a_line(ll):
+    """PI of the A-line at the given liquid limits."""
+    ll = np.asarray(ll, dtype=float)
+    return np.maximum(0, np.where(ll <= A_LINE_LL_CORNER, A_LINE_PI_MIN, A_LINE_SLOPE * (ll - A_LINE_LL_ZERO)))
+
+
+def u_line(ll):
+    """PI of the U-line at the given liquid limits."""
+    return np.maximum(U_LINE_PI_MIN, U_LINE_SLOPE * (np.asarray(ll, dtype=float) - U_LINE_LL_ZERO))
+
+
+def below_a_line(ll, pi):
+    """
+    Whether points lie strictly below the A-line (PI < a_line(LL)), the test the USCS
+    classifiers use to tell silts from clays.
+
+    Works on scalars without NumPy overhead (returning a bool) and on arrays
+    (returning a boolean array).
+    """
+    return (pi < A_LINE_PI_MIN) | ((ll > A_LINE_LL_CORNER) & (pi < A_LINE_SLOPE * (ll - A_LINE_LL_ZERO)))
+
+
+def classify_exact(ll, pi) -> np.ndarray:
+    """
+    Zone codes from the region definitions, without the lookup table.
+
+    Args:
+        ll: Liquid limits
+        pi: Plasticity indices (same shape as ll, or broadcastable)
+
+    Returns:
+        Array of zone codes (uint8)
+    """
+    ll, pi = np.broadcast_arrays(np.asarray(ll, dtype=float), np.asarray(pi, dtype=float))
+    u = u_line(ll)
+    valid = (ll >= 0) & (pi >= 0)
+
+    below = below_a_line(ll, pi)
+
+    clml = (pi >= _CLML_PI_MIN) & (pi <= _CLML_PI_MAX) & ~below
+    high = ll >= 50
+    zone = np.select(
+        [~valid, clml,
+         high & below, high & (pi <= u),
+         ~high & below, ~high & (pi <= u)],
+        [NONE, CL_ML, MH, CH, ML, CL],
+        NONE,
+    )
+    return zone.astype(np.uint8)
+
+
+def _build_table() -> np.ndarray:
+    """Zone of every table cell, or _MIXED where a boundary crosses it."""
+    ll_edges = np.arange(0.0, LL_MAX + CELL / 2, CELL)
+    pi_edges = np.arange(0.0, PI_MAX + CELL / 2, CELL)
+    corners = classify_exact(ll_edges[:, None], pi_edges[None, :])
+    table = corners[:-1, :-1].copy()
+    mixed = ((corners[1:, :-1] != table) | (corners[:-1, 1:] != table) | (corners[1:, 1:] != table))
+    for vl, vp in _VERTICES:
+        i, j = int(vl // CELL), int(vp // CELL)
+        # Vertices on a cell edge touch the neighbouring cells as well
+        mixed[max(i - 1, 0):i + 1, max(j - 1, 0):j + 1] = True
+    table[mixed] = _MIXED
+    return table
+
+
+_TABLE = _build_table()
+
+
+def classify_points(ll, pi, organic=None) -> np.ndarray:
+    """
+    Classify points on the plasticity chart.
+
+    Args:
+        ll: Liquid limits
+        pi: Plasticity indices (same shape as ll, or broadcastable)
+        organic: Optional boolean array; organic points in the CL/ML/CL-ML zones
+            become OL and those in the CH/MH zones OH
+
+    Returns:
+        Array of zone codes (uint8); ZONE_NAMES maps them to labels
+    """
+    ll, pi = np.broadcast_arrays(np.asarray(ll, dtype=float), np.asarray(pi, dtype=float))
+    with np.errstate(invalid="ignore"):
+        inside = (ll >= 0) & (ll < LL_MAX) & (pi >= 0) & (pi < PI_MAX)
+    zone = np.full(ll.shape, _MIXED, dtype=np.uint8)
+    i = (ll[inside] / CELL).astype(np.intp)
+    j = (pi[inside] / CELL).astype(np.intp)
+    zone[inside] = _TABLE[i, j]
+
+    exact = zone == _MIXED
+    if exact.any():
+        zone[exact] = classify_exact(ll[exact], pi[exact])
+
+    if organic is not None:
+        organic = np.broadcast_to(np.asarray(organic, dtype=bool), zone.shape)
+        zone = np.where(organic & ((zone == CL) | (zone == ML) | (zone == CL_ML)), OL,
+                        np.where(organic & ((zone == CH) | (zone == MH)), OH, zone)).astype(np.uint8)
+    return zone
+
+
+def zone_names(codes) -> np.ndarray:
+    """Map zone codes to labels ("CL", "CL-ML", ...; "" for NONE)."""
+    return np.array(ZONE_NAMES, dtype=object)[np.asarray(codes)]
@@ -0,0 +1,202 @@
+"""
+Project overlay for the USCS plasticity chart.
+
+Plots the LL/PI pairs of a whole project (up to hundreds of thousands of
+samples) on the plasticity chart, coloured by the chart zone (USCS group) each
+point falls in. While the current view holds more than ``zoom_threshold``
+points they are aggregated into a 2-D histogram image: every bin takes the
+colour of its most common group, with an opacity that grows with the log of
+its count. Zoomed in below the threshold, the points in view are drawn
+individually as a single scatter collection. The view is re-binned whenever
+the axis limits change, so the navigation toolbar (zoom, pan, home) keeps
+working on the full data set.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from matplotlib.colors import to_rgba
+from matplotlib.legend import Legend
+from matplotlib.patches import Patch
+
+import plasticity_zones as zones
+
+# Darker than the chart's region fills so the points stay visible on top of them
+ZONE_COLORS = {
+    zones.NONE: '#7f7f7f',
+    zones.CL: '#2e8b57',
+    zones.ML: '#1f5fa8',
+    zones.CL_ML: '#8b008b',
+    zones.CH: '#b22222',
+    zones.MH: '#b8860b',
+    zones.OL: '#556b2f',
+    zones.OH: '#8b4513',
+}
+_RGBA = np.array([to_rgba(ZONE_COLORS[code]) for code in range(len(zones.ZONE_NAMES))])
+_N_ZONES = len(zones.ZONE_NAMES)
+
+
+def load_points(path: str) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Read project LL/PI pairs from a CSV file.
+
+    Column names are matched case-insensitively. PI is taken from a "PI" column,
+    or computed as LL - PL when only "PL" is present. An optional "Organic"
+    column (1/0, true/false, yes/no) marks organic samples.
+
+    Args:
+        path: CSV file path
+
+    Returns:
+        Tuple of (ll, pi, organic) arrays; organic is None without the column.
+        Rows with a missing or non-numeric LL or PI are dropped.
+
+    Raises:
+        ValueError: If the file lacks an LL column or both PI and PL columns
+    """
+    import pandas as pd
+
+    columns = {str(c).strip().lower(): c for c in pd.read_csv(path, nrows=0).columns}
+    if 'll' not in columns:
+        raise ValueError("The file needs an LL column")
+    if 'pi' not in columns and 'pl' not in columns:
+        raise ValueError("The file needs a PI or PL column")
+
+    df = pd.read_csv(path, usecols=[columns[k] for k in ('ll', 'pi', 'pl', 'organic') if k in columns])
+    ll = pd.to_numeric(df[columns['ll']], errors='coerce').to_numpy(dtype=float)
+    if 'pi' in columns:
+        pi = pd.to_numeric(df[columns['pi']], errors='coerce').to_numpy(dtype=float)
+    else:
+        pi = ll - pd.to_numeric(df[columns['pl']], errors='coerce').to_numpy(dtype=float)
+
+    organic = None
+    if 'organic' in columns:
+        flags = df[columns['organic']].astype(str).str.strip().str.lower()
+        organic = flags.isin(['1', '1.0', 'true', 'yes', 'y']).to_numpy()
+
+    keep = np.isfinite(ll) & np.isfinite(pi)
+    return ll[keep], pi[keep], organic[keep] if organic is not None else None
+
+
+class ProjectOverlay:
+    """Density/scatter overlay of a project's LL/PI points on a plasticity chart axes."""
+
+    def __init__(self, ll, pi, organic=None, zoom_threshold: int = 5000, bins: Tuple[int, int] = (160, 120)):
+        """
+        Args:
+            ll: Liquid limits
+            pi: Plasticity indices
+            organic: Optional boolean array marking organic samples (OL/OH groups)
+            zoom_threshold: Largest number of points in view drawn individually
+            bins: Histogram bins (LL, PI) across the current view
+        """
+        ll = np.asarray(ll, dtype=float).ravel()
+        pi = np.asarray(pi, dtype=float).ravel()
+        # Sorted by LL so the points in view are found by binary search
+        order = np.argsort(ll, kind='stable')
+        self.ll = ll[order]
+        self.pi = pi[order]
+        if organic is not None:
+            organic = np.asarray(organic, dtype=bool).ravel()[order]
+        self.zone = zones.classify_points(self.ll, self.pi, organic)
+        self.zoom_threshold = zoom_threshold
+        self.bins = bins
+        self.mode = None
+        self.ax = None
+        self._image = None
+        self._scatter = None
+        self._legend = None
+        self._callbacks = []
+        self._view = None
+
+    def __len__(self) -> int:
+        return len(self.ll)
+
+    def group_counts(self) -> Dict[str, int]:
+        """Number of points per chart group ("" for points outside every zone)."""
+        counts = np.bincount(self.zone, minlength=_N_ZONES)
+        return {zones.ZONE_NAMES[code]: int(n) for code, n in enumerate(counts) if n}
+
+    def attach(self, ax) -> None:
+        """Add the overlay artists and the limit callbacks to ax, then draw the current view."""
+        self.detach()
+        self.ax = ax
+        # Creating artists may autoscale an axes that still has it enabled
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        self._image = ax.imshow(np.zeros((1, 1, 4)), extent=(0, 1, 0, 1), origin='lower', aspect='auto',
+                                interpolation='nearest', zorder=4, visible=False)
+        self._scatter = ax.scatter([], [], s=8, linewidths=0, zorder=4, visible=False)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+
+        counts = np.bincount(self.zone, minlength=_N_ZONES)
+        present = [code for code in range(_N_ZONES) if counts[code]]
+        handles = [Patch(color=ZONE_COLORS[code]) for code in present]
+        labels = [f"{zones.ZONE_NAMES[code] or 'Off chart'} ({counts[code]})" for code in present]
+        # A separate Legend artist leaves the chart's own legend in place
+        self._legend = Legend(ax, handles, labels, loc='upper left', fontsize=8, framealpha=0.9,
+                              title=f"Project ({len(self)} samples)", title_fontsize=8)
+        ax.add_artist(self._legend)
+
+        self._callbacks = [ax.callbacks.connect('xlim_changed', self._on_limits_changed),
+                           ax.callbacks.connect('ylim_changed', self._on_limits_changed)]
+        self._view = None
+        self.refresh()
+
+    def detach(self) -> None:
+        """Remove the overlay artists and callbacks from the axes."""
+        if self.ax is None:
+            return
+        for cid in self._callbacks:
+            self.ax.callbacks.disconnect(cid)
+        for artist in (self._image, self._scatter, self._legend):
+            # Artists are already gone when the axes was cleared
+            if artist is not None and artist.axes is not None:
+                artist.remove()
+        self.ax = self._image = self._scatter = self._legend = None
+        self._callbacks = []
+        self.mode = None
+
+    def _on_limits_changed(self, ax) -> None:
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-aggregate or re-select the points for the current view limits."""
+        if self.ax is None:
+            return
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        view = (x0, x1, y0, y1)
+        if view == self._view:
+            return
+        self._view = view
+
+        lo = np.searchsorted(self.ll, x0, side='left')
+        hi = np.searchsorted(self.ll, x1, side='right')
+        pi = self.pi[lo:hi]
+        inside = (pi >= y0) & (pi <= y1)
+        ll = self.ll[lo:hi][inside]
+        pi = pi[inside]
+        zone = self.zone[lo:hi][inside]
+
+        if len(ll) <= self.zoom_threshold or x1 <= x0 or y1 <= y0:
+            self.mode = 'scatter'
+            self._scatter.set_offsets(np.column_stack((ll, pi)))
+            self._scatter.set_facecolors(_RGBA[zone])
+            self._scatter.set_visible(True)
+            self._image.set_visible(False)
+            return
+
+        self.mode = 'density'
+        nx, ny = self.bins
+        ix = np.minimum(((ll - x0) * (nx / (x1 - x0))).astype(np.intp), nx - 1)
+        iy = np.minimum(((pi - y0) * (ny / (y1 - y0))).astype(np.intp), ny - 1)
+        counts = np.bincount((iy * nx + ix) * _N_ZONES + zone,
+                             minlength=ny * nx * _N_ZONES).reshape(ny, nx, _N_ZONES)
+        total = counts.sum(axis=2)
+        rgba = _RGBA[counts.argmax(axis=2)]
+        rgba[..., 3] = np.where(total > 0, 0.3 + 0.6 * np.log1p(total) / np.log1p(total.max()), 0.0)
+
+        self._image.set_data(rgba)
+        self._image.set_extent((x0, x1, y0, y1))
+        self._image.set_visible(True)
+        self._scatter.set_visible(False)
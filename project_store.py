@@ -0,0 +1,555 @@
+"""
+SQLite project database shared by the sieve, USCS and SoilSmart tools.
+
+A project is one SQLite file with a table per kind of record:
+
+    boreholes   name, location and ground level
+    samples     one row per sample: borehole, name, depth range, total sieve weight
+    sieve_rows  size, sieve number and retained mass per sieve of a sample
+    atterberg   liquid and plastic limit (and the oven/air-dried LL pair) per sample
+    results     D-values, Cu/Cc, size fractions and USCS symbol per sample
+    models      versions of trained models: path, content hash, algorithm, metrics
+
+Every foreign key and the columns queries filter on (borehole, sample name, USCS
+symbol, model) are indexed, so opening a project and looking up a borehole or a
+soil group stays in the millisecond range with millions of samples.
+
+The database runs in WAL mode: one writer and any number of readers (the tools,
+a batch run, the inference server) work on the same file at once without
+blocking each other. Bulk imports go through ``executemany`` with one
+transaction per chunk; import_samples() assigns the sample ids itself while it
+holds the write lock, so samples, sieve rows, limits and results of a chunk are
+each written with a single statement.
+
+Usage:
+    python project_store.py project.db import sieve_files/ uscs_inputs/
+    python project_store.py project.db stats
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sieve_results import FIELD_NAMES, SieveResult, SieveResultSet
+
+SCHEMA_VERSION = 1
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS boreholes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    x REAL,
+    y REAL,
+    ground_level REAL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    borehole_id INTEGER REFERENCES boreholes(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    depth_top REAL,
+    depth_bottom REAL,
+    total_weight REAL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_borehole ON samples(borehole_id, depth_top);
+CREATE INDEX IF NOT EXISTS idx_samples_name ON samples(name);
+CREATE TABLE IF NOT EXISTS sieve_rows (
+    sample_id INTEGER NOT NULL REFERENCES samples(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    size REAL NOT NULL,
+    number TEXT,
+    retained REAL NOT NULL,
+    PRIMARY KEY (sample_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS atterberg (
+    sample_id INTEGER PRIMARY KEY REFERENCES samples(id) ON DELETE CASCADE,
+    ll REAL,
+    pl REAL,
+    air_dry_ll REAL,
+    oven_dry_ll REAL
+);
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    algorithm TEXT,
+    metrics TEXT,
+    created REAL NOT NULL,
+    UNIQUE (name, version)
+);
+CREATE TABLE IF NOT EXISTS results (
+    sample_id INTEGER PRIMARY KEY REFERENCES samples(id) ON DELETE CASCADE,
+    {", ".join(f"{name} REAL" for name in FIELD_NAMES)},
+    uscs_symbol TEXT,
+    group_name TEXT,
+    model_id INTEGER REFERENCES models(id) ON DELETE SET NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_symbol ON results(uscs_symbol);
+CREATE INDEX IF NOT EXISTS idx_results_model ON results(model_id);
+"""
+
+TABLES = ("boreholes", "samples", "sieve_rows", "atterberg", "results", "models")
+ATTERBERG_FIELDS = ("ll", "pl", "air_dry_ll", "oven_dry_ll")
+RESULT_COLUMNS = FIELD_NAMES + ("uscs_symbol", "group_name", "model_id")
+
+
+class ProjectStore:
+    """One project database; safe to share between threads of a process."""
+
+    def __init__(self, path: str, cache_mb: int = 64, readonly: bool = False):
+        """
+        Args:
+            path: SQLite file (created with the schema when it does not exist)
+            cache_mb: Page cache of this connection in MiB
+            readonly: Open for queries only (other processes may still write)
+        """
+        self.path = path
+        self.readonly = readonly
+        uri = f"file:{os.path.abspath(path)}{'?mode=ro' if readonly else ''}"
+        # Autocommit mode: transactions are opened explicitly by transaction()
+        self._db = sqlite3.connect(uri, uri=True, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        if not readonly:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed transactions durable across crashes at NORMAL; only a
+        # power loss can drop the last commits
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.execute("PRAGMA temp_store=MEMORY")
+        self._db.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")
+        self._db.execute(f"PRAGMA mmap_size={256 * 1024 * 1024}")
+        if not readonly:
+            self._migrate()
+
+    def _migrate(self) -> None:
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{self.path} was written by a newer version (schema {version})")
+        if version < SCHEMA_VERSION:
+            with self.transaction() as db:
+                for statement in SCHEMA.split(";"):
+                    if statement.strip():
+                        db.execute(statement)
+                db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the write lock for the block and commit at its end (roll back on error).
+
+        Yields:
+            The connection, for execute/executemany
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    # Boreholes and samples
+
+    def borehole_id(self, name: str, create: bool = True, **location: Optional[float]) -> Optional[int]:
+        """
+        Id of the borehole called name.
+
+        Args:
+            name: Borehole name
+            create: Add the borehole when it does not exist yet
+            **location: x, y and ground_level of a new borehole
+
+        Returns:
+            Borehole id, or None when it does not exist and create is False
+        """
+        row = self._query("SELECT id FROM boreholes WHERE name = ?", (name,))
+        if row or not create:
+            return row[0][0] if row else None
+        with self.transaction() as db:
+            db.execute("INSERT OR IGNORE INTO boreholes (name, x, y, ground_level, created) VALUES (?, ?, ?, ?, ?)",
+                       (name, location.get("x"), location.get("y"), location.get("ground_level"), time.time()))
+            return db.execute("SELECT id FROM boreholes WHERE name = ?", (name,)).fetchone()[0]
+
+    def import_samples(self, samples: Iterable[Dict[str, object]], chunk_size: int = 10000) -> List[int]:
+        """
+        Add samples with their sieve rows, limits and results in bulk.
+
+        Each chunk of samples is written in one transaction with one executemany
+        per table. A sample is a dict with:
+
+            name            sample name (required)
+            borehole        borehole name (created when new), optional
+            depth_top, depth_bottom, total_weight
+            sieve_data      list of (size, number, retained) as SieveAnalysisModel takes it
+            atterberg       dict with ll, pl, air_dry_ll, oven_dry_ll (missing keys are NULL)
+            result          SieveResult, or dict with its field names plus uscs_symbol/group_name
+
+        Args:
+            samples: Samples to add (any iterable; consumed chunk by chunk)
+            chunk_size: Samples per transaction
+
+        Returns:
+            Ids of the new samples, in input order
+        """
+        ids = []
+        chunk = []
+        for sample in samples:
+            chunk.append(sample)
+            if len(chunk) >= chunk_size:
+                ids.extend(self._import_chunk(chunk))
+                chunk = []
+        if chunk:
+            ids.extend(self._import_chunk(chunk))
+        return ids
+
+    def _import_chunk(self, chunk: List[Dict[str, object]]) -> List[int]:
+        now = time.time()
+        boreholes = {}
+        for name in {s["borehole"] for s in chunk if s.get("borehole") is not None}:
+            boreholes[name] = self.borehole_id(name)
+
+        with self.transaction() as db:
+            # The write lock is held, so no other writer can take these ids
+            first = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM samples").fetchone()[0]
+            ids = list(range(first, first + len(chunk)))
+            db.executemany(
+                "INSERT INTO samples (id, borehole_id, name, depth_top, depth_bottom, total_weight, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(sample_id, boreholes.get(s.get("borehole")), s["name"], s.get("depth_top"),
+                  s.get("depth_bottom"), s.get("total_weight"), now) for sample_id, s in zip(ids, chunk)])
+            db.executemany(
+                "INSERT INTO sieve_rows (sample_id, position, size, number, retained) VALUES (?, ?, ?, ?, ?)",
+                [(sample_id, position, float(size), str(number), float(retained))
+                 for sample_id, s in zip(ids, chunk)
+                 for position, (size, number, retained) in enumerate(s.get("sieve_data") or ())])
+            db.executemany(
+                f"INSERT INTO atterberg (sample_id, {', '.join(ATTERBERG_FIELDS)}) VALUES (?, ?, ?, ?, ?)",
+                [(sample_id,) + tuple(s["atterberg"].get(f) for f in ATTERBERG_FIELDS)
+                 for sample_id, s in zip(ids, chunk) if s.get("atterberg")])
+            self._write_results(db, [(sample_id, s["result"]) for sample_id, s in zip(ids, chunk)
+                                     if s.get("result") is not None], now)
+        return ids
+
+    def add_sample(self, name: str, borehole: Optional[str] = None, **fields) -> int:
+        """Add one sample (same fields as import_samples) and return its id."""
+        return self.import_samples([dict(fields, name=name, borehole=borehole)])[0]
+
+    def delete_samples(self, sample_ids: Iterable[int]) -> None:
+        """Delete samples together with their sieve rows, limits and results."""
+        with self.transaction() as db:
+            db.executemany("DELETE FROM samples WHERE id = ?", [(int(i),) for i in sample_ids])
+
+    def samples(self, borehole: Optional[str] = None, name: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Samples ordered by id, optionally of one borehole or with one name.
+
+        Returns:
+            List of dicts with id, borehole, name, depth_top, depth_bottom, total_weight
+        """
+        sql = ("SELECT s.id, b.name, s.name, s.depth_top, s.depth_bottom, s.total_weight "
+               "FROM samples s LEFT JOIN boreholes b ON b.id = s.borehole_id")
+        where, params = [], []
+        if borehole is not None:
+            where.append("b.name = ?")
+            params.append(borehole)
+        if name is not None:
+            where.append("s.name = ?")
+            params.append(name)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        keys = ("id", "borehole", "name", "depth_top", "depth_bottom", "total_weight")
+        return [dict(zip(keys, row)) for row in self._query(sql + " ORDER BY s.id", params)]
+
+    # Sieve rows, limits and results of one sample
+
+    def sieve_data(self, sample_id: int) -> Tuple[Optional[float], List[Tuple[float, str, float]]]:
+        """
+        Sieve input of a sample.
+
+        Returns:
+            Tuple (total_weight, sieve_data) ready for SieveAnalysisModel.calculate
+        """
+        total = self._query("SELECT total_weight FROM samples WHERE id = ?", (sample_id,))
+        if not total:
+            raise KeyError(f"No sample with id {sample_id}")
+        rows = self._query("SELECT size, number, retained FROM sieve_rows WHERE sample_id = ? ORDER BY position",
+                           (sample_id,))
+        return total[0][0], [tuple(row) for row in rows]
+
+    def save_sieve_data(self, sample_id: int, total_weight: float,
+                        sieve_data: Sequence[Tuple[float, str, float]]) -> None:
+        """Replace the sieve input of a sample."""
+        with self.transaction() as db:
+            db.execute("UPDATE samples SET total_weight = ? WHERE id = ?", (total_weight, sample_id))
+            db.execute("DELETE FROM sieve_rows WHERE sample_id = ?", (sample_id,))
+            db.executemany(
+                "INSERT INTO sieve_rows (sample_id, position, size, number, retained) VALUES (?, ?, ?, ?, ?)",
+                [(sample_id, position, float(size), str(number), float(retained))
+                 for position, (size, number, retained) in enumerate(sieve_data)])
+
+    def atterberg(self, sample_id: int) -> Optional[Dict[str, Optional[float]]]:
+        """Limits of a sample (ll, pl, air_dry_ll, oven_dry_ll), or None when none were saved."""
+        row = self._query(f"SELECT {', '.join(ATTERBERG_FIELDS)} FROM atterberg WHERE sample_id = ?", (sample_id,))
+        return dict(zip(ATTERBERG_FIELDS, row[0])) if row else None
+
+    def save_atterberg(self, sample_id: int, ll: Optional[float], pl: Optional[float],
+                       air_dry_ll: Optional[float] = None, oven_dry_ll: Optional[float] = None) -> None:
+        """Set the limits of a sample."""
+        with self.transaction() as db:
+            db.execute(f"INSERT OR REPLACE INTO atterberg (sample_id, {', '.join(ATTERBERG_FIELDS)}) "
+                       "VALUES (?, ?, ?, ?, ?)", (sample_id, ll, pl, air_dry_ll, oven_dry_ll))
+
+    def _write_results(self, db: sqlite3.Connection, results: List[Tuple[int, object]], now: float) -> None:
+        rows = []
+        for sample_id, result in results:
+            if isinstance(result, SieveResult):
+                values = tuple(result) + (None, None, None)
+            else:
+                values = tuple(result.get(c) for c in RESULT_COLUMNS)
+            rows.append((sample_id,) + tuple(_sql_value(v) for v in values) + (now,))
+        db.executemany(
+            f"INSERT OR REPLACE INTO results (sample_id, {', '.join(RESULT_COLUMNS)}, updated) "
+            f"VALUES ({', '.join('?' * (len(RESULT_COLUMNS) + 2))})", rows)
+
+    def save_results(self, results: Iterable[Tuple[int, object]], chunk_size: int = 10000) -> int:
+        """
+        Store or replace derived results in bulk.
+
+        Args:
+            results: (sample_id, result) pairs; a result is a SieveResult or a dict with
+                its field names plus uscs_symbol, group_name and model_id
+            chunk_size: Results per transaction
+
+        Returns:
+            Number of results written
+        """
+        count = 0
+        chunk = []
+        for item in results:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                with self.transaction() as db:
+                    self._write_results(db, chunk, time.time())
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            with self.transaction() as db:
+                self._write_results(db, chunk, time.time())
+            count += len(chunk)
+        return count
+
+    def results(self, borehole: Optional[str] = None,
+                uscs_symbol: Optional[str] = None) -> Tuple[np.ndarray, SieveResultSet, List[Optional[str]]]:
+        """
+        Derived results, optionally of one borehole or one USCS symbol.
+
+        Returns:
+            Tuple (sample ids, SieveResultSet, USCS symbols), in sample id order
+        """
+        sql = f"SELECT r.sample_id, {', '.join('r.' + f for f in FIELD_NAMES)}, r.uscs_symbol FROM results r"
+        where, params = [], []
+        if borehole is not None:
+            sql += " JOIN samples s ON s.id = r.sample_id JOIN boreholes b ON b.id = s.borehole_id"
+            where.append("b.name = ?")
+            params.append(borehole)
+        if uscs_symbol is not None:
+            where.append("r.uscs_symbol = ?")
+            params.append(uscs_symbol)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._query(sql + " ORDER BY r.sample_id", params)
+        # None (no value) becomes NaN; from_columns stores missing size fractions as 0.0
+        values = np.array([row[1:-1] for row in rows], dtype=np.float64).reshape(len(rows), len(FIELD_NAMES))
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        result_set = SieveResultSet.from_columns({name: values[:, i] for i, name in enumerate(FIELD_NAMES)})
+        return ids, result_set, [row[-1] for row in rows]
+
+    def uscs_inputs(self, sample_id: int) -> Dict[str, float]:
+        """
+        Inputs of a sample in the layout of USCS_Classifier.save_data (missing values 0).
+        """
+        row = self._query(
+            "SELECT r.boulders, r.cobbles, r.gravel, r.sand, r.fines, a.ll, a.pl, r.d10, r.d30, r.d60, "
+            "a.air_dry_ll, a.oven_dry_ll FROM samples s "
+            "LEFT JOIN results r ON r.sample_id = s.id LEFT JOIN atterberg a ON a.sample_id = s.id "
+            "WHERE s.id = ?", (sample_id,))
+        if not row:
+            raise KeyError(f"No sample with id {sample_id}")
+        keys = ("boulders", "cobbles", "gravel", "sand", "fines", "ll", "pl", "d10", "d30", "d60",
+                "air_dry_ll", "oven_dry_ll")
+        return {k: (v if v is not None else 0) for k, v in zip(keys, row[0])}
+
+    def training_frame(self):
+        """
+        Classified samples with limits as a SoilSmart training table.
+
+        Returns:
+            DataFrame with the FEATURE_COLUMNS of soil_ml (D10, D30, D60, Cu, Cc, LL, PL,
+            PI, FinesPct) and USCS
+        """
+        import pandas as pd
+
+        rows = self._query(
+            "SELECT r.d10, r.d30, r.d60, r.cu, r.cc, a.ll, a.pl, a.ll - a.pl, r.fines, r.uscs_symbol "
+            "FROM results r JOIN atterberg a ON a.sample_id = r.sample_id "
+            "WHERE r.uscs_symbol IS NOT NULL ORDER BY r.sample_id")
+        return pd.DataFrame(rows, columns=["D10", "D30", "D60", "Cu", "Cc", "LL", "PL", "PI", "FinesPct", "USCS"])
+
+    # Model versions
+
+    def register_model(self, name: str, path: str, algorithm: Optional[str] = None,
+                       metrics: Optional[Dict[str, object]] = None) -> int:
+        """
+        Record a saved model as the next version of name.
+
+        Args:
+            name: Model name (e.g. "soil_model")
+            path: Saved model file; its SHA-256 is stored with the version
+            algorithm: ML_ALGOS name of the model
+            metrics: JSON-serializable scores (accuracy, macro-F1, ...)
+
+        Returns:
+            Id of the new version
+        """
+        from model_cache import file_digest
+
+        digest = file_digest(path)
+        with self.transaction() as db:
+            version = db.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM models WHERE name = ?",
+                                 (name,)).fetchone()[0]
+            cur = db.execute(
+                "INSERT INTO models (name, version, path, sha256, algorithm, metrics, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, version, os.path.abspath(path), digest, algorithm,
+                 json.dumps(metrics) if metrics is not None else None, time.time()))
+            return cur.lastrowid
+
+    def models(self, name: Optional[str] = None) -> List[Dict[str, object]]:
+        """Model versions, newest first, optionally of one name."""
+        sql = "SELECT id, name, version, path, sha256, algorithm, metrics, created FROM models"
+        params = ()
+        if name is not None:
+            sql += " WHERE name = ?"
+            params = (name,)
+        keys = ("id", "name", "version", "path", "sha256", "algorithm", "metrics", "created")
+        found = [dict(zip(keys, row)) for row in self._query(sql + " ORDER BY created DESC, id DESC", params)]
+        for model in found:
+            model["metrics"] = json.loads(model["metrics"]) if model["metrics"] else None
+        return found
+
+    def latest_model(self, name: str) -> Optional[Dict[str, object]]:
+        """Newest version of a model, or None."""
+        found = self.models(name)
+        return found[0] if found else None
+
+    # Housekeeping
+
+    def stats(self) -> Dict[str, int]:
+        """Row count of every table."""
+        return {table: self._query(f"SELECT COUNT(*) FROM {table}")[0][0] for table in TABLES}
+
+    def checkpoint(self) -> None:
+        """Fold the write-ahead log back into the database file."""
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "ProjectStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _sql_value(value):
+    """Plain Python value for SQLite: NumPy scalars unwrapped, NaN stored as NULL."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def sample_from_file(path: str) -> Dict[str, object]:
+    """
+    Sample from a file saved by the Sieve Analysis or USCS Classifier tool.
+
+    Sieve files (total_weight and sieve_data) give the sieve input; USCS files
+    (gravel, sand, fines, ll, pl, d10, ...) give the limits and the entered size
+    fractions and D-values. The sample is named after the file.
+    """
+    from sieve_runner import load_sieve_file
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    sample = {"name": os.path.splitext(os.path.basename(path))[0]}
+    if "sieve_data" in data:
+        sample["total_weight"], sample["sieve_data"] = load_sieve_file(path)
+    elif "ll" in data:
+        sample["atterberg"] = {f: data.get(f) for f in ATTERBERG_FIELDS}
+        result = {f: data.get(f) for f in ("boulders", "cobbles", "gravel", "sand", "fines", "d10", "d30", "d60")}
+        sample["result"] = result
+    else:
+        raise ValueError("Not a sieve analysis or USCS input file")
+    return sample
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage a soil project database")
+    parser.add_argument("project", help="Project database file (created when missing)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imp = commands.add_parser("import", help="Import files saved by the Sieve Analysis and USCS tools")
+    imp.add_argument("paths", nargs="+", help="Files or directories (searched recursively for *.json)")
+    imp.add_argument("--borehole", default=None, help="Borehole to file the samples under")
+    commands.add_parser("stats", help="Print the number of rows per table")
+    args = parser.parse_args(argv)
+
+    with ProjectStore(args.project) as store:
+        if args.command == "import":
+            from sieve_runner import discover_files
+
+            skipped = []
+
+            def file_samples():
+                # Read while importing, so only one chunk of samples is held at a time
+                for path in discover_files(args.paths):
+                    try:
+                        yield dict(sample_from_file(path), borehole=args.borehole)
+                    except (OSError, ValueError, KeyError) as e:
+                        skipped.append(path)
+                        print(f"[WARN] {path}: {e}", file=sys.stderr)
+
+            start = time.perf_counter()
+            ids = store.import_samples(file_samples())
+            print(f"[INFO] Imported {len(ids)} samples in {time.perf_counter() - start:.2f}s"
+                  f"{f' ({len(skipped)} files skipped)' if skipped else ''}")
+        else:
+            for table, count in store.stats().items():
+                print(f"{table:<12} {count:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Content-addressed cache for sieve analysis results.
+
+Results are keyed by a canonical hash of the inputs (total weight, sieve sizes and
+retained masses), so re-opening or re-importing the same test skips the analysis.
+The cache has an in-memory LRU tier and an optional SQLite tier that persists
+results across sessions and processes. The key includes CACHE_VERSION, so records
+written before a change to the analysis are never returned for it.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Version of the analysis behind a cached record. Bump it whenever the stored
+# results of the same inputs change (D-value algorithm, rounding, record layout).
+# 2: D-values a curve never reaches take the nearest knot on every path
+CACHE_VERSION = 2
+
+
+def canonical_key(total_weight: float, sieve_data: List[Tuple[float, str, float]]) -> str:
+    """
+    Hash the inputs that determine a sieve analysis result.
+
+    Sieve numbers are labels only and do not take part in the key; numbers are
+    normalized to floats so "500", 500 and 500.0 hash the same. CACHE_VERSION is
+    part of the key.
+
+    Args:
+        total_weight: Total weight of the sample in grams
+        sieve_data: List of tuples (sieve_size, sieve_number, retained_mass)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = [CACHE_VERSION, repr(float(total_weight)), [(repr(float(d[0])), repr(float(d[2]))) for d in sieve_data]]
+    payload = json.dumps(canonical, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SieveResultCache:
+    """
+    Two-tier (memory LRU + optional SQLite) cache of sieve analysis result records.
+
+    A record is a JSON-serializable dict, e.g. the one returned by
+    ``SieveAnalysisModel.results_record()``.
+
+    Disk hits only note the time of use; the notes are written to the
+    last_used column in batches of TOUCH_BATCH (and before every eviction, on
+    flush() and on close()), so a read does not cost a write transaction.
+    """
+
+    TOUCH_BATCH = 64
+
+    def __init__(self, max_entries: int = 4096, db_path: Optional[str] = None,
+                 max_disk_entries: Optional[int] = None):
+        """
+        Args:
+            max_entries: Maximum number of records kept in memory
+            db_path: SQLite file for the persistent tier (None keeps the cache in memory only)
+            max_disk_entries: Maximum number of records kept on disk (None for unlimited)
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._touched: Dict[str, float] = {}
+        self._disk_count = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sieve_results ("
+                "key TEXT PRIMARY KEY, record TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_sieve_results_used ON sieve_results(last_used)")
+            self._db.commit()
+            self._disk_count = self._count_disk()
+
+    key = staticmethod(canonical_key)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached record for key, or None on a miss."""
+        with self._lock:
+            record = self._memory.get(key)
+            if record is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return record
+
+            if self._db is not None:
+                row = self._db.execute("SELECT record FROM sieve_results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._touched[key] = time.time()
+                    if len(self._touched) >= self.TOUCH_BATCH:
+                        self._flush_touches()
+                        self._db.commit()
+                    record = json.loads(row[0])
+                    self._remember(key, record)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return record
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, record: Dict) -> None:
+        """Store a record in memory and, when configured, on disk."""
+        with self._lock:
+            self._remember(key, record)
+            if self._db is not None:
+                payload, now = json.dumps(record), time.time()
+                cur = self._db.execute(
+                    "INSERT OR IGNORE INTO sieve_results (key, record, last_used) VALUES (?, ?, ?)",
+                    (key, payload, now)
+                )
+                if cur.rowcount > 0:
+                    self._disk_count += 1
+                else:
+                    self._db.execute("UPDATE sieve_results SET record = ?, last_used = ? WHERE key = ?",
+                                     (payload, now, key))
+                if self.max_disk_entries is not None and self._disk_count > self.max_disk_entries:
+                    self._evict_disk()
+                self._db.commit()
+
+    def _count_disk(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM sieve_results").fetchone()[0]
+
+    def _flush_touches(self) -> None:
+        """Write the noted times of use to the last_used column (commit left to the caller)."""
+        if self._touched:
+            self._db.executemany("UPDATE sieve_results SET last_used = ? WHERE key = ?",
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict_disk(self) -> None:
+        """Drop the least recently used records beyond max_disk_entries."""
+        self._flush_touches()
+        cur = self._db.execute(
+            "DELETE FROM sieve_results WHERE key IN ("
+            "SELECT key FROM sieve_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+        evicted = max(cur.rowcount, 0)
+        self.disk_evictions += evicted
+        # The count is kept by this process; other processes sharing the file
+        # change the table too, so count again when the estimate was off
+        self._disk_count = self._disk_count - evicted if evicted else self._count_disk()
+
+    def _remember(self, key: str, record: Dict) -> None:
+        self._memory[key] = record
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every record from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sieve_results")
+                self._db.commit()
+                self._disk_count = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = self.disk_evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._count_disk()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+    def flush(self) -> None:
+        """Write the pending times of use to the SQLite tier, if any."""
+        with self._lock:
+            if self._db is not None and self._touched:
+                self._flush_touches()
+                self._db.commit()
+
+    def close(self) -> None:
+        """Write pending times of use and close the SQLite tier, if any."""
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
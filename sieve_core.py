@@ -0,0 +1,503 @@
+"""
+Headless computational core for sieve analysis.
+
+Contains the SieveAnalysisModel (percentages, PCHIP curve, D-values, coefficients,
+particle distribution and validation) without any GUI dependency, so it can run in
+worker processes and on headless compute nodes. Problems are reported by raising
+SieveDataError instead of showing message boxes.
+"""
+import math
+import numpy as np
+from typing import List, Tuple, Dict, Optional
+
+from grain_curve import PchipCurve, coefficients, d_values, fit_curve
+from sieve_results import SieveResult
+
+
+class SieveDataError(ValueError):
+    """Raised when sieve data cannot produce a valid analysis."""
+
+
+class SieveAnalysisModel:
+    """
+    A comprehensive model for sieve analysis calculations with precise D-value determination.
+    Maintains PCHIP interpolation while ensuring accurate curve intersections.
+    """
+
+    def __init__(self):
+        """Initialize the model with default values"""
+        self.reset_data()
+
+    def reset_data(self) -> None:
+        """
+        Reset all data structures to their initial state.
+        Called when starting a new analysis.
+        """
+        self.total_weight: float = 0.0
+        self.sieve_sizes: List[float] = []
+        self.sieve_numbers: List[str] = []
+        self.retained_masses: List[float] = []
+        self.xs: np.ndarray = np.array([])
+        self.ys: np.ndarray = np.array([])
+        self._smooth_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.intersections: Dict[str, float] = {}
+        self.coefficients: Dict[str, Optional[float]] = {}
+        self.particle_distribution: Dict[str, float] = {}
+        self.plot_type: str = "semi-log"
+        self.pchip_interpolator: Optional[PchipCurve] = None
+        # Set when results came from the cache; the curve is then built on demand
+        self._curve_pending: bool = False
+    def classify_particle_size(self, size: float) -> str:
+        """
+        Classifies particle size into standard categories according to ASTM D2487/USCS.
+        
+        Args:
+            size: Particle size in millimeters (mm)
+            
+        Returns:
+            str: The particle size category description
+            
+        Categories:
+            - Boulders (> 300 mm)
+            - Cobbles (75 - 300 mm)
+            - Gravel (4.75 - 75 mm)
+            - Sand (0.075 - 4.75 mm)
+            - Fines (< 0.075 mm)
+        """
+       
+        if size > 300:
+            return "Boulders (> 300 mm)"
+        elif 75 <= size <= 300:
+            return "Cobbles (75 - 300 mm)"
+        elif 4.75 <= size < 75:
+            return "Gravel (4.75 - 75 mm)"
+        elif 0.075 <= size < 4.75:
+            return "Sand (0.075 - 4.75 mm)"
+        else:  # size <= 0.075
+            return "Fines (< 0.075 mm)"
+
+    def calculate(self, total_weight: float, sieve_data: List[Tuple[float, str, float]],
+                  cache=None) -> None:
+        """
+        Perform complete sieve analysis calculations.
+        
+        Args:
+            total_weight: Total weight of the sample in grams
+            sieve_data: List of tuples (sieve_size, sieve_number, retained_mass)
+            cache: Optional SieveResultCache; on a hit the stored D-values,
+                coefficients and distribution are reused, and the percentages and
+                curve are only computed when smooth_curve() or
+                calculate_percentiles() needs them
+        """
+        self.total_weight = total_weight
+        self.sieve_sizes = [d[0] for d in sieve_data]
+        self.sieve_numbers = [d[1] for d in sieve_data]
+        self.retained_masses = [d[2] for d in sieve_data]
+
+        if cache is not None:
+            key = cache.key(total_weight, sieve_data)
+            record = cache.get(key)
+            if record is not None:
+                self.restore_results(record)
+                self.xs, self.ys = np.array([]), np.array([])
+                self.pchip_interpolator = None
+                self._smooth_cache = {}
+                self._curve_pending = True
+                return
+
+        # Calculate cumulative percentages
+        self._calculate_percentages()
+        
+        # Fit the PCHIP curve (the plotted curve is sampled lazily)
+        self.create_smooth_curve()
+        
+        # Calculate precise D-values
+        self.calculate_d_values()
+        
+        # Compute derived parameters
+        self.calculate_coefficients()
+        self.calculate_particle_distribution()
+        
+        if cache is not None:
+            cache.put(key, self.results_record())
+
+    def results_record(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Return the calculated results as a JSON-serializable record.
+        """
+        return {
+            "intersections": {k: float(v) for k, v in self.intersections.items()},
+            "coefficients": {k: (float(v) if v is not None else None) for k, v in self.coefficients.items()},
+            "particle_distribution": {k: float(v) for k, v in self.particle_distribution.items()},
+        }
+
+    def result(self) -> SieveResult:
+        """
+        Return the calculated results as a compact SieveResult record.
+        """
+        return SieveResult.from_model(self)
+
+    def restore_results(self, record: Dict[str, Dict[str, Optional[float]]]) -> None:
+        """
+        Restore results previously produced by results_record().
+        """
+        self.intersections = dict(record["intersections"])
+        self.coefficients = dict(record["coefficients"])
+        self.particle_distribution = dict(record["particle_distribution"])
+
+    def update_retained(self, index: int, mass: float) -> None:
+        """
+        Change the mass retained on one sieve and recalculate.
+        
+        Percent passing is normalized by the total retained mass, so one edited
+        mass moves every knot of the curve; the analysis is therefore run again
+        in full on the edited data.
+        
+        Args:
+            index: Row of the edited sieve, in the order of the sieve data
+            mass: New retained mass in grams
+            
+        Raises:
+            SieveDataError: If index is not a row of the sieve data or mass is negative
+        """
+        if not 0 <= index < len(self.retained_masses):
+            raise SieveDataError(f"No sieve row {index}")
+        if mass < 0:
+            raise SieveDataError("Retained mass cannot be negative")
+        self.retained_masses[index] = mass
+        sieve_data = list(zip(self.sieve_sizes, self.sieve_numbers, self.retained_masses))
+        self.calculate(self.total_weight, sieve_data)
+
+    def _calculate_percentages(self) -> None:
+        """Calculate cumulative percentages from retained masses"""
+        # Calculate the cumulative sum of the retained masses
+        cum_rets = np.cumsum(self.retained_masses)
+        # Get the total retained mass
+        total = cum_rets[-1] if len(cum_rets) > 0 else 0
+        
+        # If the total retained mass is greater than 0
+        if total > 0:
+            # Calculate the cumulative percentage
+            self.cum_percent = np.round(cum_rets / total * 100, 4)
+            # Calculate the pass percentage
+            self.pass_percent = np.round(100 - self.cum_percent, 4)
+        else:
+            # If the total retained mass is 0, set the cumulative and pass percentages to 0
+            self.cum_percent = np.zeros_like(cum_rets)
+            self.pass_percent = np.zeros_like(cum_rets)
+        
+        # Convert the sieve sizes to an array
+        self.xs = np.array(self.sieve_sizes)
+        # Convert the pass percentages to an array
+        self.ys = np.array(self.pass_percent)
+
+    def create_smooth_curve(self) -> None:
+        """
+        Create a smooth grain size distribution curve using PCHIP interpolation.
+        Falls back to linear interpolation if PCHIP fails.
+        Only the interpolator is built here; the sampled curve is materialized on
+        demand by smooth_curve(), so callers that only need D-values never pay for it.
+        """
+        if len(self.xs) < 2:
+            raise ValueError("At least two data points required for interpolation")
+            
+        # Sort data by particle size
+        sorted_idx = np.argsort(self.xs)
+        x_sorted = self.xs[sorted_idx]
+        y_sorted = self.ys[sorted_idx]
+        
+        try:
+            # Create PCHIP interpolator and store it for later use (shared with
+            # grain_curve.d_values, which finds it in the same memo)
+            self.pchip_interpolator = fit_curve(self.xs, self.ys)
+            
+        except Exception as e:
+            print(f"PCHIP interpolation failed, falling back to linear: {e}")
+            from scipy import interpolate  # Only needed for degenerate data
+            self.pchip_interpolator = interpolate.interp1d(
+                x_sorted, y_sorted, 
+                kind='linear', 
+                fill_value='extrapolate'
+            )
+        self._smooth_cache = {}
+        self._curve_pending = False
+
+    def _ensure_curve(self) -> None:
+        """Compute the percentages and fit the curve skipped by a cache hit."""
+        if self._curve_pending:
+            self._calculate_percentages()
+            self.create_smooth_curve()
+
+    def smooth_curve(self, points: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sample the grain size curve on a logarithmic grid, caching each resolution.
+        
+        Args:
+            points: Number of points between the smallest and largest sieve size
+            
+        Returns:
+            Tuple (x_smooth, y_smooth); empty arrays before a curve has been fitted
+        """
+        self._ensure_curve()
+        if self.pchip_interpolator is None:
+            return np.array([]), np.array([])
+        if points not in self._smooth_cache:
+            x_smooth = np.logspace(
+                np.log10(min(self.xs)), 
+                np.log10(max(self.xs)), 
+                points
+            )
+            self._smooth_cache[points] = (x_smooth, self.pchip_interpolator(x_smooth))
+        return self._smooth_cache[points]
+
+    @property
+    def x_smooth(self) -> np.ndarray:
+        """Particle sizes of the default-resolution smooth curve"""
+        return self.smooth_curve()[0]
+
+    @property
+    def y_smooth(self) -> np.ndarray:
+        """Percent passing of the default-resolution smooth curve"""
+        return self.smooth_curve()[1]
+
+    def calculate_d_values(self) -> None:
+        """
+        Calculate D10, D30, D60 values with precision guaranteed to lie on the curve.
+        On the PCHIP curve this is grain_curve.d_values, as in the batch engine: the
+        closed-form crossing, or the closest knot where the curve never reaches the
+        percentage. The linear fallback curve (degenerate
+        data) uses a refined search near its closest point.
+        """
+        P_values = [10, 30, 60]
+        self.intersections = {}
+
+        if isinstance(self.pchip_interpolator, PchipCurve):
+            sizes = d_values(self.xs, self.ys, P_values)
+            self.intersections = {f"D{P}": round(float(size), 4) for P, size in zip(P_values, sizes)}
+            return
+
+        for P in P_values:
+            self._calculate_d_value(P)
+
+    def calculate_percentiles(self, percents) -> Dict[str, float]:
+        """
+        Calculate any set of Dxx values (e.g. D5, D15, D50, D85, D90) in one pass.
+        
+        All percentages are inverted together on the fitted curve; a percentage the
+        curve never reaches falls back to the closest point, as in calculate_d_values.
+        
+        Args:
+            percents: Sequence of percentages passing
+            
+        Returns:
+            Dictionary keyed "D{percent}" (e.g. "D15", "D2.5") of sizes in mm, rounded to 4 decimals
+        """
+        self._ensure_curve()
+        if self.pchip_interpolator is None:
+            raise ValueError("No grain size curve; run calculate() first")
+        percents = np.asarray(percents, dtype=float).reshape(-1)
+        
+        if isinstance(self.pchip_interpolator, PchipCurve):
+            sizes = d_values(self.xs, self.ys, percents)
+        else:
+            sizes = np.array([self._refined_intersection_search(P) for P in percents], dtype=float)
+            
+        return {f"D{P:g}": round(float(size), 4) for P, size in zip(percents, sizes)}
+
+    def _calculate_d_value(self, P: float) -> None:
+        """
+        Calculate a single D-value on the linear fallback curve.
+        
+        Args:
+            P: Percentage value to find (10, 30, or 60)
+        """
+        key = f"D{P}"
+        try:
+            # Stage 1: Refined search near closest point
+            refined_val = self._refined_intersection_search(P)
+            if refined_val is not None:
+                self.intersections[key] = round(refined_val, 4)
+                return
+                
+            # Stage 2: Fallback to closest point
+            closest_idx = np.argmin(np.abs(self.y_smooth - P))
+            self.intersections[key] = round(self.x_smooth[closest_idx], 4)
+            
+        except Exception as e:
+            print(f"Error calculating D{P}: {e}")
+            closest_idx = np.argmin(np.abs(self.y_smooth - P))
+            self.intersections[key] = round(self.x_smooth[closest_idx], 4)
+
+    def _refined_intersection_search(self, P: float) -> Optional[float]:
+        """
+        Perform a refined search near the closest point to find better intersection.
+        
+        Args:
+            P: Percentage value to find (10, 30, or 60)
+            
+        Returns:
+            The best found particle size near the closest point, or None if search fails
+        """
+        if self.pchip_interpolator is None:
+            return None
+            
+        # Find the closest point on the smooth curve
+        closest_idx = np.argmin(np.abs(self.y_smooth - P))
+        x_closest = self.x_smooth[closest_idx]
+        
+        # Determine search window around the closest point
+        if closest_idx == 0:
+            x0, x1 = x_closest, self.x_smooth[closest_idx+1]
+        elif closest_idx == len(self.x_smooth)-1:
+            x0, x1 = self.x_smooth[closest_idx-1], x_closest
+        else:
+            x0, x1 = self.x_smooth[closest_idx-1], self.x_smooth[closest_idx+1]
+            
+        # Sample many points in this window
+        x_window = np.linspace(x0, x1, 1000)
+        y_window = self.pchip_interpolator(x_window)
+        
+        # Find the point with minimum distance to P
+        best_idx = np.argmin(np.abs(y_window - P))
+        return x_window[best_idx]
+
+    def calculate_coefficients(self) -> None:
+        """
+        Calculate the coefficient of uniformity (Cu) and coefficient of curvature (Cc).
+        Ensures proper handling of edge cases and division by zero.
+        """
+        D10 = self.intersections.get("D10", None)
+        D30 = self.intersections.get("D30", None)
+        D60 = self.intersections.get("D60", None)
+        
+        # Missing D-values and zero denominators leave the coefficient undefined
+        if D10 is None or D60 is None:
+            Cu = Cc = None
+        else:
+            cu, cc = coefficients(D10, math.nan if D30 is None else D30, D60)
+            Cu = cu if math.isfinite(cu) else None
+            Cc = cc if math.isfinite(cc) else None
+            
+        self.coefficients = {
+            "Cu": round(Cu, 4) if Cu is not None else None,
+            "Cc": round(Cc, 4) if Cc is not None else None
+        }
+
+    
+    def calculate_particle_distribution(self) -> None: #
+        """
+        Calculates particle distribution based on direct retained masses according to ASTM D2487/USCS.
+        Raises SieveDataError when the total weight or sieve data make it impossible.
+        - Boulders: Retained on sieves > 300 mm.
+        - Cobbles: Retained on sieves between 75 mm and 300 mm (inclusive).
+        - Gravel: Retained on sieves between 4.75 mm and < 75 mm.
+        - Sand: Retained on sieves between 0.075 mm and < 4.75 mm.
+        - Fines: Passing 0.075 mm sieve (material on Pan).
+        """
+        # Initialize dictionary with all categories
+        self.particle_distribution = { #
+            "Boulders (> 300 mm)": 0.0, #
+            "Cobbles (75 - 300 mm)": 0.0, #
+            "Gravel (4.75 - 75 mm)": 0.0, #
+            "Sand (0.075 - 4.75 mm)": 0.0, #
+            "Fines (< 0.075 mm)": 0.0, #
+        }
+
+        if not hasattr(self, 'total_weight') or self.total_weight <= 0: #
+            raise SieveDataError("Total weight must be positive to calculate particle distribution.")
+
+        if not hasattr(self, 'sieve_sizes') or not hasattr(self, 'retained_masses') or \
+           not self.sieve_sizes or not self.retained_masses: #
+            raise SieveDataError("Sieve data (sizes and masses) is missing.")
+
+        mass_boulders = 0.0
+        mass_cobbles = 0.0
+        mass_gravel = 0.0
+        mass_sand = 0.0
+        
+        # Sum of masses retained on all actual sieves
+        sum_retained_on_sieves = sum(m for s, m in zip(self.sieve_sizes, self.retained_masses) if s > 0) # Exclude pan if it has size 0.0
+
+        # Calculate mass on pan (fines)
+        # This is the material finer than the smallest sieve (typically 0.075mm)
+        mass_fines_pan = self.total_weight - sum_retained_on_sieves #
+
+        # Check for data consistency: sum of retained masses (including calculated pan) should equal total weight.
+        # A small tolerance is used for floating point comparisons.
+        if mass_fines_pan < -1e-9:  # If sum_retained_on_sieves > self.total_weight #
+            error_msg = (f"Data Error: Sum of retained masses on sieves ({sum_retained_on_sieves:.2f}g) " #
+                         f"exceeds total sample weight ({self.total_weight:.2f}g). " #
+                         "Please check input data.") #
+            # Distribution stays at zeros as it's invalid
+            raise SieveDataError(error_msg)
+        mass_fines_pan = max(0, mass_fines_pan) # Ensure it's not negative due to minor precision issues
+
+        # Iterate through each sieve and its retained mass to categorize particles
+        for size, retained_mass in zip(self.sieve_sizes, self.retained_masses): #
+            if size <= 0: # Skip pan if it was included in sieve_data with size 0
+                continue
+            if size > 300: # Boulders
+                mass_boulders += retained_mass
+            elif 75 <= size <= 300: # Cobbles
+                mass_cobbles += retained_mass
+            elif 4.75 <= size < 75: # Gravel
+                mass_gravel += retained_mass
+            elif 0.075 <= size < 4.75: # Sand
+                mass_sand += retained_mass
+            # Material retained on a sieve smaller than 0.075mm is not standard;
+            # fines are defined as passing 0.075mm.
+
+        # Calculate percentages based on the total weight of the sample
+        if self.total_weight > 0:
+            self.particle_distribution["Boulders (> 300 mm)"] = round((mass_boulders / self.total_weight) * 100, 2) #
+            self.particle_distribution["Cobbles (75 - 300 mm)"] = round((mass_cobbles / self.total_weight) * 100, 2) #
+            self.particle_distribution["Gravel (4.75 - 75 mm)"] = round((mass_gravel / self.total_weight) * 100, 2) #
+            self.particle_distribution["Sand (0.075 - 4.75 mm)"] = round((mass_sand / self.total_weight) * 100, 2) #
+            self.particle_distribution["Fines (< 0.075 mm)"] = round((mass_fines_pan / self.total_weight) * 100, 2) #
+        
+        # Optional: Validate that the sum of percentages is close to 100%
+        current_total_percentage = sum(self.particle_distribution.values()) #
+        if not (99.9 <= current_total_percentage <= 100.1) and self.total_weight > 0: #
+            # This might indicate a slight discrepancy due to rounding or an issue if pan mass was miscalculated.
+            print(f"[INFO] Particle distribution percentages sum to {current_total_percentage:.2f}%. This is usually due to rounding.") #
+            # Adjust Fines to make total 100% if the discrepancy is small and due to rounding.
+            if abs(100.0 - current_total_percentage) < 0.5 : # Small discrepancy threshold
+                diff = 100.0 - current_total_percentage
+                self.particle_distribution["Fines (< 0.075 mm)"] = round(self.particle_distribution["Fines (< 0.075 mm)"] + diff, 2)
+                # Ensure fines percentage is not negative after adjustment
+                if self.particle_distribution["Fines (< 0.075 mm)"] < 0:
+                    # If fines become negative, it implies a larger issue,
+                    # redistribute deficit/surplus proportionally or revert adjustment.
+                    # For simplicity here, we'll just cap at 0 and accept minor total deviation.
+                    self.particle_distribution["Fines (< 0.075 mm)"] = 0.0
+                current_total_percentage = sum(self.particle_distribution.values()) # Re-check
+                print(f"[INFO] Adjusted particle distribution percentages sum to {current_total_percentage:.2f}%.")
+
+    def validate_results(self) -> bool:
+        """
+        Validate that the calculated results are physically reasonable.
+        
+        Returns:
+            True if results are valid, False otherwise
+        """
+        # Check D-values are monotonically increasing
+        Ds = [self.intersections.get(f"D{p}", None) for p in [10, 30, 60]]
+        if None in Ds:
+            return False
+        if not (Ds[0] <= Ds[1] <= Ds[2]):
+            return False
+            
+        # Check coefficients are within reasonable bounds
+        Cu = self.coefficients.get("Cu", None)
+        Cc = self.coefficients.get("Cc", None)
+        if Cu is not None and Cu <= 0:
+            return False
+        if Cc is not None and Cc <= 0:
+            return False
+            
+        # Check percentages sum to 100 ± 0.1%
+        total_percent = sum(self.particle_distribution.values())
+        if abs(total_percent - 100) > 0.1:
+            return False
+            
+        return True
@@ -0,0 +1,206 @@
+"""
+Compact containers for sieve analysis results.
+
+SieveResult is a slotted record with one fixed field per D-value, coefficient and
+size fraction, so a result costs a handful of attributes instead of three
+string-keyed dicts. SieveResultSet keeps many results as a struct of arrays (one
+float64 column per field), which is what large in-memory collections and the
+batch engine should use. Both convert to the model's dict layout only on request.
+
+Both follow the model's missing-value convention: a D-value or coefficient that
+could not be computed is missing (None in a record, NaN in a set), while a size
+fraction is always a number, 0.0 when the sample has nothing in that range.
+"""
+import math
+import numpy as np
+from typing import Dict, Iterator, Optional
+
+# Field name -> (model dict, key in that dict)
+FIELDS = {
+    "d10": ("intersections", "D10"),
+    "d30": ("intersections", "D30"),
+    "d60": ("intersections", "D60"),
+    "cu": ("coefficients", "Cu"),
+    "cc": ("coefficients", "Cc"),
+    "boulders": ("particle_distribution", "Boulders (> 300 mm)"),
+    "cobbles": ("particle_distribution", "Cobbles (75 - 300 mm)"),
+    "gravel": ("particle_distribution", "Gravel (4.75 - 75 mm)"),
+    "sand": ("particle_distribution", "Sand (0.075 - 4.75 mm)"),
+    "fines": ("particle_distribution", "Fines (< 0.075 mm)"),
+}
+FIELD_NAMES = tuple(FIELDS)
+
+# What a set stores for a field a record leaves out: NaN for D-values and
+# coefficients, 0.0 for size fractions
+_MISSING = tuple(0.0 if group == "particle_distribution" else np.nan for group, _ in FIELDS.values())
+_FRACTIONS = [i for i, (group, _) in enumerate(FIELDS.values()) if group == "particle_distribution"]
+
+
+class SieveResult:
+    """
+    D-values, coefficients and particle distribution of one sieve analysis.
+
+    Missing D-values and coefficients (e.g. Cu when D10 is zero) are None; size
+    fractions are never missing, and None given for one is stored as 0.0.
+    """
+    __slots__ = FIELD_NAMES
+
+    def __init__(self, d10=None, d30=None, d60=None, cu=None, cc=None,
+                 boulders=0.0, cobbles=0.0, gravel=0.0, sand=0.0, fines=0.0):
+        self.d10 = d10
+        self.d30 = d30
+        self.d60 = d60
+        self.cu = cu
+        self.cc = cc
+        self.boulders = 0.0 if boulders is None else boulders
+        self.cobbles = 0.0 if cobbles is None else cobbles
+        self.gravel = 0.0 if gravel is None else gravel
+        self.sand = 0.0 if sand is None else sand
+        self.fines = 0.0 if fines is None else fines
+
+    @classmethod
+    def from_dicts(cls, intersections: Dict[str, float], coefficients: Dict[str, Optional[float]],
+                   particle_distribution: Dict[str, float]) -> "SieveResult":
+        """
+        Build a result from the model's intersections/coefficients/particle_distribution dicts.
+        """
+        sources = {
+            "intersections": intersections,
+            "coefficients": coefficients,
+            "particle_distribution": particle_distribution,
+        }
+        result = cls()
+        for name, (group, key) in FIELDS.items():
+            value = sources[group].get(key)
+            if value is not None:
+                setattr(result, name, float(value))
+            elif group == "particle_distribution":
+                setattr(result, name, 0.0)
+            else:
+                setattr(result, name, None)
+        return result
+
+    @classmethod
+    def from_model(cls, model) -> "SieveResult":
+        """Build a result from a calculated SieveAnalysisModel."""
+        return cls.from_dicts(model.intersections, model.coefficients, model.particle_distribution)
+
+    def to_dict(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Return the result in the model's layout.
+
+        Returns:
+            Dictionary with "intersections", "coefficients" and "particle_distribution"
+            dicts keyed like SieveAnalysisModel (e.g. "D10", "Sand (0.075 - 4.75 mm)")
+        """
+        record = {"intersections": {}, "coefficients": {}, "particle_distribution": {}}
+        for name, (group, key) in FIELDS.items():
+            record[group][key] = getattr(self, name)
+        return record
+
+    def __iter__(self) -> Iterator[Optional[float]]:
+        return (getattr(self, name) for name in FIELD_NAMES)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SieveResult):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in FIELD_NAMES)
+        return f"SieveResult({fields})"
+
+
+class SieveResultSet:
+    """
+    Struct-of-arrays collection of sieve analysis results.
+
+    Each field is a column of a single float64 array, so a result costs 80 bytes
+    and columns can be used directly in numpy code. Missing D-values and
+    coefficients are NaN; a missing size fraction is stored as 0.0, as in
+    SieveResult, so a column and the records read from it agree.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Args:
+            capacity: Number of rows to allocate up front; the storage grows as needed
+        """
+        self._data = np.full((max(1, capacity), len(FIELD_NAMES)), np.nan)
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> "SieveResultSet":
+        """
+        Build a set from columnar arrays keyed by field name or by model key.
+
+        Accepts the output of ``sieve_batch.calculate_batch`` (keys "D10", "Cu",
+        "Sand (0.075 - 4.75 mm)", ...) as well as field names ("d10", "cu", "sand", ...).
+        NaN in a size fraction column is stored as 0.0.
+        """
+        arrays = []
+        for name, (_, key) in FIELDS.items():
+            column = columns[name] if name in columns else columns[key]
+            arrays.append(np.asarray(column, dtype=float).reshape(-1))
+        data = np.column_stack(arrays)
+        fractions = data[:, _FRACTIONS]
+        data[:, _FRACTIONS] = np.where(np.isnan(fractions), 0.0, fractions)
+        result_set = cls(len(arrays[0]))
+        result_set._data[:len(arrays[0])] = data
+        result_set._size = len(arrays[0])
+        return result_set
+
+    def _reserve(self, size: int) -> None:
+        if size > len(self._data):
+            grown = np.full((max(size, 2 * len(self._data)), len(FIELD_NAMES)), np.nan)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+    def append(self, result: SieveResult) -> None:
+        """Add one result."""
+        self._reserve(self._size + 1)
+        self._data[self._size] = [missing if v is None else v for v, missing in zip(result, _MISSING)]
+        self._size += 1
+
+    def extend(self, other: "SieveResultSet") -> None:
+        """Add every result of another set."""
+        self._reserve(self._size + len(other))
+        self._data[self._size:self._size + len(other)] = other.values
+        self._size += len(other)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> SieveResult:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("SieveResultSet index out of range")
+        row = self._data[index]
+        return SieveResult(*(None if math.isnan(v) else float(v) for v in row))
+
+    def __iter__(self) -> Iterator[SieveResult]:
+        return (self[i] for i in range(self._size))
+
+    @property
+    def values(self) -> np.ndarray:
+        """All results as an array (results x fields), in FIELD_NAMES order."""
+        return self._data[:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Return one field for every result, without copying.
+
+        Args:
+            name: Field name ("d10", "cu", "sand", ...)
+        """
+        return self._data[:self._size, FIELD_NAMES.index(name)]
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """Return the columns keyed like SieveAnalysisModel ("D10", "Cu", "Sand (0.075 - 4.75 mm)", ...)."""
+        return {key: self.column(name).copy() for name, (_, key) in FIELDS.items()}
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the stored results."""
+        return self.values.nbytes
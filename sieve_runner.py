@@ -0,0 +1,249 @@
+"""
+Command-line batch runner for saved sieve analysis files.
+
+Discovers the JSON files written by ``SieveAnalysisController.save_data``
+(``total_weight`` plus a ``sieve_data`` list of size/number/retained), analyses
+them in chunks on a process pool and streams one result row per file, in sorted
+file order, to a CSV or Parquet output. A file that fails to load or analyse produces an error row
+instead of stopping the run.
+
+Usage:
+    python sieve_runner.py DATA_DIR [MORE_PATHS ...] -o results.csv
+    python sieve_runner.py DATA_DIR -o results.parquet --workers 8 --chunk-size 500
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sieve_cache import SieveResultCache
+from sieve_core import SieveAnalysisModel
+
+RESULT_COLUMNS = [
+    "file", "status", "error",
+    "D10", "D30", "D60", "Cu", "Cc",
+    "Boulders (> 300 mm)", "Cobbles (75 - 300 mm)", "Gravel (4.75 - 75 mm)",
+    "Sand (0.075 - 4.75 mm)", "Fines (< 0.075 mm)",
+    "valid",
+]
+TEXT_COLUMNS = {"file", "status", "error"}
+
+
+def discover_files(paths: List[str], pattern: str = "*.json") -> List[str]:
+    """
+    Expand files and directories (searched recursively) into a sorted list of files.
+
+    Args:
+        paths: Files or directories given on the command line
+        pattern: Glob pattern for files inside directories
+
+    Returns:
+        Sorted list of file paths
+    """
+    found = set()
+    for path in paths:
+        p = Path(path)
+        if p.is_dir():
+            found.update(str(f) for f in p.rglob(pattern) if f.is_file())
+        elif p.is_file():
+            found.add(str(p))
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return sorted(found)
+
+
+def load_sieve_file(path: str) -> Tuple[float, List[Tuple[float, str, float]]]:
+    """
+    Read a saved sieve file and parse it the way the controller parses the input grid.
+
+    Returns:
+        Tuple (total_weight, sieve_data) ready for SieveAnalysisModel.calculate
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    total_weight = float(data["total_weight"])
+    if total_weight <= 0:
+        raise ValueError("Total weight must be positive")
+
+    sieve_data = []
+    for item in data["sieve_data"]:
+        size = float(item["size"]) if item.get("size") not in ("", None) else 0
+        retained = float(item["retained"]) if item.get("retained") not in ("", None) else 0
+        if retained < 0:
+            raise ValueError("Retained mass cannot be negative")
+        sieve_data.append((size, str(item.get("number", "")), retained))
+
+    if not sieve_data:
+        raise ValueError("No sieve data entered")
+    return total_weight, sieve_data
+
+
+def analyse_file(path: str, model: Optional[SieveAnalysisModel] = None,
+                 cache: Optional[SieveResultCache] = None) -> Dict[str, object]:
+    """
+    Run the full sieve analysis on one file, reusing cached results when a cache is given.
+
+    Returns:
+        Result row with status "ok", or status "error" and the error message
+    """
+    row = dict.fromkeys(RESULT_COLUMNS)
+    row["file"] = path
+    model = model or SieveAnalysisModel()
+    try:
+        total_weight, sieve_data = load_sieve_file(path)
+        model.reset_data()
+        model.calculate(total_weight, sieve_data, cache=cache)
+        row.update(model.intersections)
+        row.update(model.coefficients)
+        row.update(model.particle_distribution)
+        row["valid"] = model.validate_results()
+        row["status"] = "ok"
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+_worker_caches: Dict[str, SieveResultCache] = {}
+
+
+def analyse_chunk(paths: List[str], cache_path: Optional[str] = None) -> List[Dict[str, object]]:
+    """Worker entry point: analyse a chunk of files with a single model instance."""
+    model = SieveAnalysisModel()
+    cache = None
+    if cache_path:
+        # One SQLite connection per worker process, reused across chunks
+        cache = _worker_caches.get(cache_path)
+        if cache is None:
+            cache = _worker_caches[cache_path] = SieveResultCache(db_path=cache_path)
+    # The model reports rounding adjustments with print; keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = [analyse_file(path, model, cache) for path in paths]
+    if cache is not None:
+        # Workers exit without closing their cache
+        cache.flush()
+    return rows
+
+
+class CsvResultWriter:
+    """Streams result rows to a CSV file."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows: List[Dict[str, object]]) -> None:
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """Streams result rows to a Parquet file, one row group per chunk (needs pyarrow)."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.schema = pa.schema([
+            (c, pa.string() if c in TEXT_COLUMNS else pa.bool_() if c == "valid" else pa.float64())
+            for c in RESULT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows: List[Dict[str, object]]) -> None:
+        columns = {c: [row[c] for row in rows] for c in RESULT_COLUMNS}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def open_writer(path: str):
+    """Pick the output writer from the file extension."""
+    if Path(path).suffix.lower() in (".parquet", ".pq"):
+        return ParquetResultWriter(path)
+    return CsvResultWriter(path)
+
+
+def chunked(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run(paths: List[str], output: str, workers: Optional[int] = None, chunk_size: int = 256,
+        pattern: str = "*.json", progress: bool = True, cache_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Analyse every discovered file on a process pool and stream the results to output.
+
+    Args:
+        paths: Files or directories to process
+        output: Output path; ".parquet" selects Parquet, anything else CSV
+        workers: Number of worker processes (default: all cores)
+        chunk_size: Number of files sent to a worker at a time
+        pattern: Glob pattern for files inside directories
+        progress: Report progress on stderr
+        cache_path: SQLite result cache shared by the workers (None disables caching)
+
+    Returns:
+        Dictionary with "files", "ok" and "failed" counts
+    """
+    files = discover_files(paths, pattern)
+    counts = {"files": len(files), "ok": 0, "failed": 0}
+    writer = open_writer(output)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            # map() hands out every chunk at once but yields the results in input order
+            chunks = chunked(files, max(1, chunk_size))
+            for rows in pool.map(analyse_chunk, chunks, repeat(cache_path)):
+                writer.write(rows)
+                failed = sum(row["status"] != "ok" for row in rows)
+                counts["failed"] += failed
+                counts["ok"] += len(rows) - failed
+                if progress:
+                    done = counts["ok"] + counts["failed"]
+                    rate = done / max(time.perf_counter() - start, 1e-9)
+                    print(f"\r{done}/{len(files)} files ({counts['failed']} failed, {rate:.0f} files/s)",
+                          end="", file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+        if progress:
+            print(file=sys.stderr)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch sieve analysis of saved JSON files")
+    parser.add_argument("paths", nargs="+", help="JSON files or directories to search recursively")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv or .parquet)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=256, help="Files per worker task")
+    parser.add_argument("--pattern", default="*.json", help="File pattern inside directories")
+    parser.add_argument("--cache", default=None, help="SQLite result cache reused across runs")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not report progress")
+    args = parser.parse_args(argv)
+
+    counts = run(args.paths, args.output, args.workers, args.chunk_size, args.pattern, not args.quiet,
+                 args.cache)
+    print(f"Analysed {counts['files']} files: {counts['ok']} ok, {counts['failed']} failed -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Append-only store for the SoilSmart training dataset.
+
+The dataset stays a plain CSV file (so it can still be opened, browsed and
+edited elsewhere), but rows are appended to the end of the file instead of
+re-reading and rewriting it: the header is written once, when the file is
+created, and every append writes and fsyncs only the new lines.
+
+A crash during an append can leave at most one incomplete last line. Before
+reading or appending, the store checks for a file that does not end with a line
+terminator and truncates that last line back to the last complete row, so a torn
+write never reaches training. The store cannot tell a torn row from a complete one
+(a row cut inside its last field, "SW" -> "S", has all its fields), so every
+unterminated row is dropped, including one saved by an editor without a final
+newline; the dropped text is reported.
+"""
+import csv
+import io
+import os
+from typing import Dict, Iterable, List, Tuple
+
+
+class DatasetStore:
+    """Append-only CSV dataset with a fixed header."""
+
+    def __init__(self, path: str, columns: List[str]):
+        """
+        Args:
+            path: CSV file path (created on the first append)
+            columns: Columns every row must provide; an existing file may order them
+                differently or carry extra columns
+        """
+        self.path = path
+        self.columns = list(columns)
+
+    def _create(self) -> None:
+        """Write the header to a temporary file and move it into place atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(self.columns)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _read_header(self) -> Tuple[List[str], str]:
+        """Header of the existing file and its line terminator."""
+        with open(self.path, "r", newline="") as f:
+            line = f.readline()
+        terminator = "\r\n" if line.endswith("\r\n") else "\n"
+        header = next(csv.reader([line.rstrip("\r\n")]), [])
+        missing = [c for c in self.columns if c not in header]
+        if missing:
+            raise ValueError(f"Dataset missing columns: {missing}")
+        return header, terminator
+
+    def repair(self) -> bool:
+        """
+        Drop an unterminated last row.
+
+        Every append ends its rows with a line terminator, so a last row without
+        one is treated as the remainder of an interrupted append and truncated
+        away, even when it has as many fields as the header. An unterminated
+        header (a file holding nothing else) is terminated instead.
+
+        Returns:
+            True if the file was changed
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return False
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return False
+            # Scan back to the start of the last line
+            start = size
+            while start > 0:
+                step = min(65536, start)
+                start -= step
+                f.seek(start)
+                newline = f.read(step).rfind(b"\n")
+                if newline >= 0:
+                    start += newline + 1
+                    break
+            if start == 0:
+                f.seek(0, os.SEEK_END)
+                f.write(b"\n")
+            else:
+                f.seek(start)
+                last = f.read().decode("utf-8", errors="replace")
+                f.truncate(start)
+                print(f"[INFO] Dropped an incomplete last row from {self.path}: {last!r}")
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def append(self, row: Dict[str, object]) -> None:
+        """Append one row (a dict keyed by column name)."""
+        self.append_many([row])
+
+    def append_many(self, rows: Iterable[Dict[str, object]]) -> int:
+        """
+        Append rows with a single write and fsync.
+
+        Args:
+            rows: Dicts keyed by column name; columns of the file they lack are left empty
+
+        Returns:
+            Number of rows appended
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        for row in rows:
+            missing = [c for c in self.columns if c not in row]
+            if missing:
+                raise ValueError(f"Row missing columns: {missing}")
+
+        self.repair()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            self._create()
+        header, terminator = self._read_header()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator=terminator)
+        for row in rows:
+            writer.writerow(["" if row.get(c) is None else row.get(c) for c in header])
+        with open(self.path, "a", newline="") as f:
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        return len(rows)
+
+    def read(self, **kwargs):
+        """
+        Load the whole dataset with pandas.
+
+        Args:
+            **kwargs: Passed on to pandas.read_csv
+
+        Returns:
+            pandas DataFrame
+        """
+        import pandas as pd
+
+        self.repair()
+        return pd.read_csv(self.path, **kwargs)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
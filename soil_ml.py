@@ -0,0 +1,561 @@
+"""
+Machine learning helpers for SoilSmart: pipelines, progress-aware fitting,
+model selection and batch prediction.
+
+select_model() runs stratified k-fold cross-validation for every algorithm in
+ML_ALGOS over a hyperparameter grid, spreading the (configuration, fold) fits
+across all cores with joblib, and ranks the configurations in a leaderboard of
+accuracy, macro-F1, fit time and predict latency. persist_winner() refits the
+best configuration on the whole dataset and saves it where the app loads
+models from, next to the leaderboard.
+
+predict_batch() scores many samples with one predict_proba call and derives the
+labels and top-k classes from it; predict_file() streams a CSV through it chunk
+by chunk.
+
+Usage:
+    python soil_ml.py select soil_data.csv -o soil_model.pkl
+    python soil_ml.py select soil_data.csv -o soil_model.pkl --folds 10 --grid grid.json
+    python soil_ml.py predict soil_model.pkl samples.csv -o predictions.csv --top 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.svm import SVC
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+
+import joblib
+from joblib import Parallel, delayed
+
+import grain_curve
+
+ML_ALGOS = {
+    "Random Forest": RandomForestClassifier,
+    "SVM (RBF)": SVC,
+    "Gradient Boosting": GradientBoostingClassifier,
+    "Logistic Regression": LogisticRegression,
+    "KNN": KNeighborsClassifier
+}
+
+def build_pipeline(algo_name, random_state=42):
+    if algo_name == "Random Forest":
+        model = RandomForestClassifier(n_estimators=200, random_state=random_state)
+        return Pipeline([("scaler", StandardScaler()), ("clf", model)])
+    elif algo_name == "SVM (RBF)":
+        model = SVC(probability=True, C=1.0, gamma="scale", random_state=random_state)
+        return Pipeline([("scaler", StandardScaler()), ("clf", model)])
+    elif algo_name == "Gradient Boosting":
+        model = GradientBoostingClassifier(random_state=random_state)
+        return Pipeline([("scaler", StandardScaler()), ("clf", model)])
+    elif algo_name == "Logistic Regression":
+        model = LogisticRegression(max_iter=200, random_state=random_state)
+        return Pipeline([("scaler", StandardScaler()), ("clf", model)])
+    elif algo_name == "KNN":
+        model = KNeighborsClassifier(n_neighbors=7)
+        return Pipeline([("scaler", StandardScaler()), ("clf", model)])
+    else:
+        raise ValueError(f"Unknown algorithm: {algo_name}")
+
+class TrainingCancelled(Exception):
+    """Raised by fit_pipeline when the training run is cancelled."""
+
+def fit_pipeline(pipe, X, y, progress=None, cancel_event=None, step=10):
+    """
+    Fit a build_pipeline() pipeline in steps, reporting progress and honouring cancellation.
+
+    Random forests are grown `step` trees at a time with warm_start, which gives the
+    same forest as a single fit; gradient boosting reports every stage through its
+    fit monitor. The other estimators are fitted in one call and can only be
+    cancelled once it returns.
+
+    Args:
+        pipe: Pipeline with "scaler" and "clf" steps
+        X: Training features
+        y: Training labels
+        progress: Optional callable progress(done, total)
+        cancel_event: Optional threading.Event; training stops once it is set
+        step: Trees added per random forest step
+
+    Raises:
+        TrainingCancelled: If cancel_event was set before training finished
+    """
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelled()
+
+    def report(done, total):
+        if progress is not None:
+            progress(done, total)
+
+    scaler = pipe.named_steps["scaler"]
+    clf = pipe.named_steps["clf"]
+    check_cancelled()
+    X_scaled = scaler.fit_transform(X)
+
+    if isinstance(clf, RandomForestClassifier):
+        total = clf.n_estimators
+        clf.set_params(warm_start=True)
+        done = 0
+        while done < total:
+            done = min(done + step, total)
+            clf.set_params(n_estimators=done)
+            clf.fit(X_scaled, y)
+            report(done, total)
+            check_cancelled()
+        clf.set_params(warm_start=False)
+    elif isinstance(clf, GradientBoostingClassifier):
+        total = clf.n_estimators
+
+        def monitor(i, estimator, local_vars):
+            report(i + 1, total)
+            return cancel_event is not None and cancel_event.is_set()
+
+        clf.fit(X_scaled, y, monitor=monitor)
+        check_cancelled()
+    else:
+        clf.fit(X_scaled, y)
+        report(1, 1)
+        check_cancelled()
+    return pipe
+
+FEATURE_COLUMNS = ["D10","D30","D60","Cu","Cc","LL","PL","PI","FinesPct"]
+
+def validate_dataset(df):
+    missing_cols = [c for c in FEATURE_COLUMNS + ["USCS"] if c not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Dataset missing columns: {missing_cols}")
+    if df[FEATURE_COLUMNS].isnull().any().any() or df["USCS"].isnull().any():
+        raise ValueError("Dataset contains missing values; please clean your CSV.")
+
+
+# ---------------- Model selection ----------------
+# Hyperparameters searched per algorithm (names of the "clf" step's parameters);
+# the values build_pipeline uses are always part of the grid
+PARAM_GRIDS = {
+    "Random Forest": {"n_estimators": [100, 200], "max_depth": [None, 12], "min_samples_leaf": [1, 2]},
+    "SVM (RBF)": {"C": [0.3, 1.0, 3.0, 10.0], "gamma": ["scale", 0.1]},
+    "Gradient Boosting": {"n_estimators": [100, 200], "learning_rate": [0.05, 0.1], "max_depth": [2, 3]},
+    "Logistic Regression": {"C": [0.1, 1.0, 10.0]},
+    "KNN": {"n_neighbors": [3, 5, 7, 11], "weights": ["uniform", "distance"]},
+}
+
+LEADERBOARD_COLUMNS = ["rank", "algo", "params", "accuracy", "accuracy_std", "macro_f1", "macro_f1_std",
+                       "fit_s", "predict_us_per_row", "predict_one_ms"]
+
+
+def configured_pipeline(algo_name, params=None, random_state=42):
+    """build_pipeline() with the given "clf" step parameters applied."""
+    pipe = build_pipeline(algo_name, random_state=random_state)
+    if params:
+        pipe.set_params(**{f"clf__{k}": v for k, v in params.items()})
+    return pipe
+
+
+def _evaluate_fold(config, algo_name, params, X, y, train_idx, test_idx):
+    """Fit one configuration on one fold and score it (runs in a worker process)."""
+    pipe = configured_pipeline(algo_name, params)
+    start = time.perf_counter()
+    pipe.fit(X[train_idx], y[train_idx])
+    fit_s = time.perf_counter() - start
+
+    X_test = X[test_idx]
+    start = time.perf_counter()
+    y_pred = pipe.predict(X_test)
+    predict_s = time.perf_counter() - start
+
+    # Single-row latency, as for the app's "Predict current sample"
+    one = []
+    for i in range(min(5, len(X_test))):
+        start = time.perf_counter()
+        pipe.predict(X_test[i:i + 1])
+        one.append(time.perf_counter() - start)
+
+    return config, {
+        "accuracy": accuracy_score(y[test_idx], y_pred),
+        "macro_f1": f1_score(y[test_idx], y_pred, average="macro", zero_division=0),
+        "fit_s": fit_s,
+        "predict_us_per_row": predict_s / len(X_test) * 1e6,
+        "predict_one_ms": float(np.median(one)) * 1e3,
+    }
+
+
+def select_model(X, y, grids: Optional[Dict[str, Dict[str, list]]] = None, n_splits: int = 5,
+                 n_jobs: int = -1, random_state: int = 42,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 cancel_event=None) -> List[Dict[str, object]]:
+    """
+    Cross-validate every configuration of every algorithm and rank them.
+
+    Args:
+        X: Features (FEATURE_COLUMNS order)
+        y: Labels
+        grids: Parameter grid per algorithm name (default PARAM_GRIDS); algorithms
+            left out are not evaluated
+        n_splits: Number of stratified folds (reduced to the size of the smallest class)
+        n_jobs: Worker processes (-1 for all cores)
+        random_state: Seed for the fold shuffling
+        progress: Optional callable progress(done, total), called per finished fit
+        cancel_event: Optional threading.Event; selection stops once it is set
+
+    Returns:
+        Leaderboard entries, best first (highest mean macro-F1, then accuracy,
+        then fastest fit), with the LEADERBOARD_COLUMNS keys
+
+    Raises:
+        ValueError: For an algorithm that is not in ML_ALGOS
+        TrainingCancelled: If cancel_event was set before selection finished
+    """
+    grids = PARAM_GRIDS if grids is None else grids
+    unknown = [algo for algo in grids if algo not in ML_ALGOS]
+    if unknown:
+        raise ValueError(f"Unknown algorithm: {unknown}")
+
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+    smallest_class = np.unique(y, return_counts=True)[1].min()
+    n_splits = max(2, min(n_splits, smallest_class))
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X, y))
+    configs = [(algo, params) for algo, grid in grids.items() for params in ParameterGrid(grid)]
+
+    total = len(configs) * len(folds)
+    scores = [[] for _ in configs]
+    outputs = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(_evaluate_fold)(c, algo, params, X, y, train_idx, test_idx)
+        for c, (algo, params) in enumerate(configs) for train_idx, test_idx in folds)
+    try:
+        for done, (config, fold_scores) in enumerate(outputs, 1):
+            scores[config].append(fold_scores)
+            if progress is not None:
+                progress(done, total)
+            if cancel_event is not None and cancel_event.is_set():
+                raise TrainingCancelled()
+    finally:
+        # Stops dispatching the remaining fits when leaving early
+        outputs.close()
+
+    leaderboard = []
+    for (algo, params), fold_scores in zip(configs, scores):
+        entry = {"algo": algo, "params": dict(params)}
+        for key in ("accuracy", "macro_f1", "fit_s", "predict_us_per_row", "predict_one_ms"):
+            entry[key] = float(np.mean([s[key] for s in fold_scores]))
+        entry["accuracy_std"] = float(np.std([s["accuracy"] for s in fold_scores]))
+        entry["macro_f1_std"] = float(np.std([s["macro_f1"] for s in fold_scores]))
+        leaderboard.append(entry)
+    leaderboard.sort(key=lambda e: (-e["macro_f1"], -e["accuracy"], e["fit_s"]))
+    for rank, entry in enumerate(leaderboard, 1):
+        entry["rank"] = rank
+    return leaderboard
+
+
+def leaderboard_path(model_path: str) -> str:
+    """Where the leaderboard of a selected model is stored."""
+    return os.path.splitext(model_path)[0] + "_leaderboard.csv"
+
+
+def save_leaderboard(leaderboard: List[Dict[str, object]], path: str) -> None:
+    """Write the leaderboard to CSV (parameters as JSON)."""
+    import csv
+
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_COLUMNS)
+        writer.writeheader()
+        for entry in leaderboard:
+            writer.writerow({**entry, "params": json.dumps(entry["params"], sort_keys=True)})
+
+
+def persist_winner(leaderboard: List[Dict[str, object]], X, y, model_path: str):
+    """
+    Refit the best configuration on all data and save it with its leaderboard.
+
+    Returns:
+        The fitted winning pipeline
+    """
+    winner = leaderboard[0]
+    pipe = configured_pipeline(winner["algo"], winner["params"])
+    pipe.fit(np.asarray(X, dtype=float), np.asarray(y))
+    save_model(pipe, model_path)
+    save_leaderboard(leaderboard, leaderboard_path(model_path))
+    return pipe
+
+
+def format_leaderboard(leaderboard: List[Dict[str, object]], top: Optional[int] = None) -> str:
+    """Render the leaderboard as a text table."""
+    header = (f"{'#':>3} {'algorithm':<20} {'accuracy':>14} {'macro-F1':>14} {'fit s':>8} "
+              f"{'us/row':>8} {'1-row ms':>9}  params")
+    lines = [header, "-" * len(header)]
+    for e in leaderboard[:top]:
+        lines.append(
+            f"{e['rank']:>3} {e['algo']:<20} {e['accuracy']:>7.3f} ±{e['accuracy_std']:.3f} "
+            f"{e['macro_f1']:>7.3f} ±{e['macro_f1_std']:.3f} {e['fit_s']:>8.3f} {e['predict_us_per_row']:>8.1f} "
+            f"{e['predict_one_ms']:>9.2f}  {json.dumps(e['params'], sort_keys=True)}"
+        )
+    return "\n".join(lines)
+
+
+# ---------------- Batch prediction ----------------
+CURVE_COLUMNS = ["Sizes", "Finer", "LL", "PL", "FinesPct"]
+
+
+def features_from_curves(sizes, finer, ll, pl, fines) -> np.ndarray:
+    """
+    Build FEATURE_COLUMNS rows from raw grain size curves.
+
+    D-values are read from the PCHIP curve through (size, percent finer) with
+    grain_curve.d_values_batch, the batch form of compute_d_values, so a
+    percentage a curve never reaches takes the nearest knot as everywhere else.
+    Rows whose sizes and percentages do not form a curve get NaN features.
+
+    Args:
+        sizes: Particle sizes, shape (samples, sieves), any order
+        finer: Percent finer, same shape
+        ll: Liquid limits, shape (samples,)
+        pl: Plastic limits
+        fines: Fines percentages
+
+    Returns:
+        Array of shape (samples, len(FEATURE_COLUMNS))
+    """
+    d10, d30, d60 = grain_curve.d_values_batch(sizes, finer).T
+    cu, cc = grain_curve.coefficients(d10, d30, d60)
+    ll = np.asarray(ll, dtype=float)
+    pl = np.asarray(pl, dtype=float)
+    return np.column_stack([d10, d30, d60, cu, cc, ll, pl, ll - pl, np.asarray(fines, dtype=float)])
+
+
+def _parse_curves(sizes: List[str], finer: List[str]) -> Tuple[np.ndarray, List[np.ndarray], List[np.ndarray]]:
+    """Split comma-separated curve cells; returns per-row arrays and the indices of rows that parse."""
+    ok, xs, ys = [], [], []
+    for i, (s, f) in enumerate(zip(sizes, finer)):
+        try:
+            x = np.array([float(v) for v in str(s).split(",") if v.strip()])
+            y = np.array([float(v) for v in str(f).split(",") if v.strip()])
+        except ValueError:
+            continue
+        if len(x) >= 2 and len(x) == len(y):
+            ok.append(i)
+            xs.append(x)
+            ys.append(y)
+    return np.array(ok, dtype=np.intp), xs, ys
+
+
+def frame_features(df) -> np.ndarray:
+    """
+    Feature matrix of a DataFrame holding FEATURE_COLUMNS, or raw curves in
+    CURVE_COLUMNS ("Sizes" and "Finer" as comma-separated lists, as typed in the app).
+
+    Returns:
+        Array of shape (rows, len(FEATURE_COLUMNS)); NaN where a row cannot be used
+    """
+    import pandas as pd
+
+    if all(c in df.columns for c in FEATURE_COLUMNS):
+        return df[FEATURE_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    missing = [c for c in CURVE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Input needs either {FEATURE_COLUMNS} or {CURVE_COLUMNS}; missing {missing}")
+
+    X = np.full((len(df), len(FEATURE_COLUMNS)), np.nan)
+    rows, xs, ys = _parse_curves(df["Sizes"].tolist(), df["Finer"].tolist())
+    limits = df[["LL", "PL", "FinesPct"]].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    # Curves with the same number of sieves are processed as one batch
+    lengths = np.array([len(x) for x in xs], dtype=np.intp)
+    for n in np.unique(lengths):
+        same = np.flatnonzero(lengths == n)
+        idx = rows[same]
+        X[idx] = features_from_curves(np.stack([xs[i] for i in same]), np.stack([ys[i] for i in same]),
+                                      limits[idx, 0], limits[idx, 1], limits[idx, 2])
+    return X
+
+
+def save_model(pipe, path: str) -> None:
+    """Save a pipeline with joblib, replacing path atomically so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(pipe, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_model(path: str):
+    """Load a saved pipeline (.pkl) or a compiled random forest (.npz, see compiled_forest)."""
+    if path.lower().endswith(".npz"):
+        from compiled_forest import CompiledForest
+
+        return CompiledForest.load(path)
+    return joblib.load(path)
+
+
+def predict_batch(pipe, X, k: int = 3) -> Dict[str, np.ndarray]:
+    """
+    Predict labels and the top-k classes from one predict_proba call.
+
+    The label is the most probable class. For the random forest, gradient boosting,
+    logistic regression and KNN models this is what predict() returns; for the SVM
+    it follows the calibrated probabilities rather than the decision function.
+
+    Args:
+        pipe: Fitted pipeline with predict_proba
+        X: Feature rows (FEATURE_COLUMNS order)
+        k: Number of top classes to return (at most the number of classes)
+
+    Returns:
+        Dictionary with "label" (n,), "top_labels" (n, k) and "top_probs" (n, k)
+    """
+    proba = pipe.predict_proba(np.asarray(X, dtype=float))
+    classes = pipe.classes_
+    k = max(1, min(k, len(classes)))
+    # Highest probability first; ties keep the class order, as argmax does
+    top = np.argsort(-proba, axis=1, kind="stable")[:, :k]
+    return {
+        "label": classes[top[:, 0]],
+        "top_labels": classes[top],
+        "top_probs": np.take_along_axis(proba, top, axis=1),
+    }
+
+
+def predict_frame(pipe, df, k: int = 3):
+    """
+    Score a DataFrame (see frame_features) and append the prediction columns.
+
+    Returns:
+        Copy of df with "status", "Predicted USCS" and "Top<i>"/"Top<i> prob"
+        columns; rows without usable features get status "error" and no prediction
+    """
+    X = frame_features(df)
+    valid = np.isfinite(X).all(axis=1)
+    k = max(1, min(k, len(pipe.classes_)))
+    label = np.full(len(df), "", dtype=object)
+    top_labels = np.full((len(df), k), "", dtype=object)
+    top_probs = np.full((len(df), k), np.nan)
+    if valid.any():
+        result = predict_batch(pipe, X[valid], k)
+        label[valid] = result["label"]
+        top_labels[valid] = result["top_labels"]
+        top_probs[valid] = result["top_probs"]
+
+    out = df.copy()
+    out["status"] = np.where(valid, "ok", "error")
+    out["Predicted USCS"] = label
+    for i in range(k):
+        out[f"Top{i + 1}"] = top_labels[:, i]
+        out[f"Top{i + 1} prob"] = top_probs[:, i]
+    return out
+
+
+def predict_file(model_path: str, input_path: str, output: str, k: int = 3, chunk_size: int = 100000,
+                 progress: bool = True) -> Dict[str, int]:
+    """
+    Score a CSV file chunk by chunk with a saved model and stream the results to output.
+
+    An input without rows (0 bytes, or only a header line) gives an output with
+    just the header.
+
+    Returns:
+        Dictionary with "rows", "ok" and "failed" counts
+    """
+    import pandas as pd
+
+    pipe = load_model(model_path)
+    counts = {"rows": 0, "ok": 0, "failed": 0}
+    start = time.perf_counter()
+    header = True
+    try:
+        chunks = pd.read_csv(input_path, chunksize=max(1, chunk_size))
+    except pd.errors.EmptyDataError:
+        # 0-byte input (not even a header line)
+        chunks = []
+    try:
+        for chunk in chunks:
+            result = predict_frame(pipe, chunk, k)
+            result.to_csv(output, mode="w" if header else "a", header=header, index=False)
+            header = False
+            failed = int((result["status"] != "ok").sum())
+            counts["rows"] += len(result)
+            counts["failed"] += failed
+            counts["ok"] += len(result) - failed
+            if progress:
+                rate = counts["rows"] / max(time.perf_counter() - start, 1e-9)
+                print(f"\r{counts['rows']} rows ({counts['failed']} failed, {rate:.0f} rows/s)",
+                      end="", file=sys.stderr, flush=True)
+    finally:
+        if progress:
+            print(file=sys.stderr)
+    if header:
+        # Empty input: still write the header
+        try:
+            columns = list(pd.read_csv(input_path, nrows=0).columns)
+        except pd.errors.EmptyDataError:
+            columns = []
+        k = max(1, min(k, len(pipe.classes_)))
+        tops = [c for i in range(k) for c in (f"Top{i + 1}", f"Top{i + 1} prob")]
+        pd.DataFrame(columns=columns + ["status", "Predicted USCS"] + tops).to_csv(output, index=False)
+    return counts
+
+
+def _select_command(args) -> int:
+    import pandas as pd
+
+    df = pd.read_csv(args.dataset)
+    validate_dataset(df)
+    grids = None
+    if args.grid:
+        with open(args.grid, "r") as f:
+            grids = json.load(f)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=float)
+    y = df["USCS"].to_numpy()
+
+    def report(done, total):
+        print(f"\r{done}/{total} fits", end="", file=sys.stderr, flush=True)
+
+    leaderboard = select_model(X, y, grids, args.folds, args.jobs, progress=report)
+    print(file=sys.stderr)
+    persist_winner(leaderboard, X, y, args.output)
+    print(format_leaderboard(leaderboard))
+    print(f"Saved {leaderboard[0]['algo']} {leaderboard[0]['params']} to {args.output} "
+          f"(leaderboard: {leaderboard_path(args.output)})")
+    return 0
+
+
+def _predict_command(args) -> int:
+    counts = predict_file(args.model, args.input, args.output, args.top, args.chunk_size, not args.quiet)
+    print(f"Scored {counts['rows']} rows: {counts['ok']} ok, {counts['failed']} failed -> {args.output}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="SoilSmart model tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    select = commands.add_parser("select", help="Cross-validate all algorithms and save the best model")
+    select.add_argument("dataset", help="Training CSV (FEATURE_COLUMNS + USCS)")
+    select.add_argument("-o", "--output", default="soil_model.pkl", help="Model file for the winner")
+    select.add_argument("-k", "--folds", type=int, default=5, help="Stratified folds (default 5)")
+    select.add_argument("-j", "--jobs", type=int, default=-1, help="Worker processes (default: all cores)")
+    select.add_argument("--grid", default=None, help="JSON file with a parameter grid per algorithm")
+    select.set_defaults(func=_select_command)
+
+    predict = commands.add_parser("predict", help="Score a CSV of samples with a saved model")
+    predict.add_argument("model", help="Model file (.pkl, or .npz from compiled_forest.py)")
+    predict.add_argument("input", help=f"CSV with {','.join(FEATURE_COLUMNS)} or {','.join(CURVE_COLUMNS)}")
+    predict.add_argument("-o", "--output", required=True, help="Output CSV file")
+    predict.add_argument("-t", "--top", type=int, default=3, help="Number of top classes to report")
+    predict.add_argument("-c", "--chunk-size", type=int, default=100000, help="Rows per chunk")
+    predict.add_argument("-q", "--quiet", action="store_true", help="Do not report progress")
+    predict.set_defaults(func=_predict_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Local inference service for SoilSmart models.
+
+Loads a pipeline saved by SoilSmartApp (joblib pickle, or a random forest
+compiled to .npz by compiled_forest.py) once and serves USCS predictions over
+HTTP on localhost. Requests handled concurrently are coalesced into
+micro-batches: a single batching thread waits at most ``max_wait_ms`` after the
+first queued request, then scores everything that arrived (up to
+``max_batch_rows`` rows) with one predict_proba call. The model comes from the
+shared model cache, so several server processes on one machine map the same
+copy of its arrays.
+
+Endpoints:
+    POST /predict   {"features": [[D10, D30, D60, Cu, Cc, LL, PL, PI, FinesPct], ...]}
+                    or {"samples": [{"D10": ..., ...}, ...]} or a single sample object;
+                    optional "top" (default 3). Returns {"predictions": [{"label": ...,
+                    "top": [[label, probability], ...]}, ...]}
+    GET  /metrics   request/row/batch counts, queue depth, latency percentiles and
+                    model cache statistics
+    GET  /health    {"status": "ok"}
+
+Usage:
+    python soil_server.py soil_model.pkl --port 8765
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from model_cache import shared_cache
+from soil_ml import FEATURE_COLUMNS
+
+
+def _percentile_ms(seconds, pct: float) -> Optional[float]:
+    return float(np.percentile(seconds, pct)) * 1e3 if len(seconds) else None
+
+
+class MicroBatcher:
+    """Coalesces concurrent prediction requests into batched predict_proba calls."""
+
+    def __init__(self, pipe, max_batch_rows: int = 512, max_wait_ms: float = 2.0, window: int = 10000):
+        """
+        Args:
+            pipe: Fitted pipeline with predict_proba
+            max_batch_rows: Most rows scored by one predict_proba call (a larger single
+                request is still scored in one call)
+            max_wait_ms: Longest time the first request of a batch waits for others
+            window: Number of recent requests the latency percentiles are taken over
+        """
+        self.pipe = pipe
+        self.classes = pipe.classes_
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._latencies = deque(maxlen=window)
+        self._predict_times = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        """Queue a (rows x features) array; the future resolves to its probability rows."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batcher is closed")
+            self._pending.append((X, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, X: np.ndarray, top: int = 3, timeout: Optional[float] = 30.0) -> List[Dict[str, object]]:
+        """Score rows through the batcher and format label and top-k per row."""
+        proba = self.submit(X).result(timeout)
+        k = max(1, min(top, len(self.classes)))
+        order = np.argsort(-proba, axis=1, kind="stable")[:, :k]
+        return [
+            {"label": str(self.classes[row[0]]),
+             "top": [[str(self.classes[i]), float(p[i])] for i in row]}
+            for row, p in zip(order, proba)
+        ]
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for the next batch."""
+        return len(self._pending)
+
+    def _take_batch(self) -> List[tuple]:
+        """Block for the first request, then gather more until the batch is full or the wait is over."""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+            deadline = time.perf_counter() + self.max_wait
+            batch = [self._pending.popleft()]
+            rows = len(batch[0][0])
+            while rows < self.max_batch_rows:
+                if self._pending:
+                    if rows + len(self._pending[0][0]) > self.max_batch_rows:
+                        break
+                    item = self._pending.popleft()
+                    batch.append(item)
+                    rows += len(item[0])
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            start = time.perf_counter()
+            try:
+                proba = self.pipe.predict_proba(np.concatenate([item[0] for item in batch]))
+            except Exception as e:
+                self.errors += len(batch)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            offset = 0
+            for X, future, queued in batch:
+                future.set_result(proba[offset:offset + len(X)])
+                offset += len(X)
+                self._latencies.append(done - queued)
+            self._predict_times.append(done - start)
+            self.requests += len(batch)
+            self.rows += offset
+            self.batches += 1
+
+    def metrics(self) -> Dict[str, object]:
+        latencies = list(self._latencies)
+        predict_times = list(self._predict_times)
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "batches": self.batches,
+            "errors": self.errors,
+            "mean_batch_requests": self.requests / self.batches if self.batches else None,
+            "queue_depth": self.queue_depth,
+            # Queueing plus scoring, per request, over the recent window
+            "latency_p50_ms": _percentile_ms(latencies, 50),
+            "latency_p99_ms": _percentile_ms(latencies, 99),
+            "predict_p50_ms": _percentile_ms(predict_times, 50),
+        }
+
+    def close(self) -> None:
+        """Finish the queued requests and stop the batching thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+def parse_features(payload: Dict[str, object]) -> np.ndarray:
+    """
+    Feature rows from a request body.
+
+    Raises:
+        ValueError: If the body holds no rows or a row is malformed
+    """
+    if "features" in payload:
+        rows = payload["features"]
+        if rows and not isinstance(rows[0], (list, tuple)):
+            rows = [rows]
+    else:
+        samples = payload.get("samples", [payload])
+        missing = sorted({c for s in samples for c in FEATURE_COLUMNS if c not in s})
+        if missing:
+            raise ValueError(f"Samples missing columns: {missing}")
+        rows = [[s[c] for c in FEATURE_COLUMNS] for s in samples]
+    try:
+        X = np.asarray(rows, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Features must be numbers")
+    if X.ndim != 2 or X.shape[0] == 0 or X.shape[1] != len(FEATURE_COLUMNS):
+        raise ValueError(f"Expected rows of {len(FEATURE_COLUMNS)} features: {FEATURE_COLUMNS}")
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite")
+    return X
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """HTTP front end; the server carries the batcher."""
+
+    def _send_json(self, status: int, body: Dict[str, object]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, {**self.server.batcher.metrics(), "model_cache": shared_cache().stats()})
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("Body must be a JSON object")
+            X = parse_features(payload)
+            top = int(payload.get("top", 3))
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            predictions = self.server.batcher.predict(X, top)
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(200, {"predictions": predictions})
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the output; /metrics covers it
+        pass
+
+
+def make_server(model_path: str, host: str = "127.0.0.1", port: int = 8765,
+                max_batch_rows: int = 512, max_wait_ms: float = 2.0) -> ThreadingHTTPServer:
+    """Load the model and build the HTTP server (call serve_forever() on it)."""
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(shared_cache().get(model_path), max_batch_rows, max_wait_ms)
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve SoilSmart USCS predictions on localhost")
+    parser.add_argument("model", help="Model file saved by SoilSmart (.pkl) or compiled forest (.npz)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default 8765)")
+    parser.add_argument("--max-batch", type=int, default=512, help="Most rows per predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="Longest wait for more requests before scoring a batch")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.model, args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"[INFO] Serving {args.model} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import generators
+
+pytest.importorskip("sklearn")
+from compiled_forest import CompiledForest, compile_pipeline  # noqa: E402
+from soil_ml import FEATURE_COLUMNS, build_pipeline  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    df = generators.ml_dataset(600, seed=9)
+    X = df[FEATURE_COLUMNS].values
+    pipe = build_pipeline("Random Forest")
+    pipe.fit(X[:400], df["USCS"].values[:400])
+    return pipe, X
+
+
+def test_compiled_forest_matches_predict_proba(fitted):
+    pipe, X = fitted
+    compiled = compile_pipeline(pipe)
+    np.testing.assert_array_equal(compiled.predict_proba(X), pipe.predict_proba(X))
+    np.testing.assert_array_equal(compiled.predict(X), pipe.predict(X))
+    assert list(compiled.classes_) == list(pipe.classes_)
+
+
+def test_compiled_forest_matches_in_chunks(fitted):
+    pipe, X = fitted
+    compiled = compile_pipeline(pipe)
+    np.testing.assert_array_equal(compiled.predict_proba(X, chunk_size=7), pipe.predict_proba(X))
+
+
+def test_compiled_forest_round_trips_through_npz(fitted, tmp_path):
+    pipe, X = fitted
+    path = str(tmp_path / "forest.npz")
+    compile_pipeline(pipe).save(path)
+    np.testing.assert_array_equal(CompiledForest.load(path).predict_proba(X), pipe.predict_proba(X))
+
+
+def test_compiled_forest_matches_rows_with_missing_values(fitted):
+    pipe, X = fitted
+    X = X.copy()
+    rng = np.random.default_rng(1)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    np.testing.assert_array_equal(compile_pipeline(pipe).predict_proba(X), pipe.predict_proba(X))
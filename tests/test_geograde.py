@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_leaves_the_heavy_modules_to_the_tools():
+    # A fresh interpreter: the test session has imported these modules already
+    script = ("import json, sys, GeoGrade; "
+              "print(json.dumps([m for m in ('matplotlib', 'sklearn', 'pandas') if m in sys.modules]))")
+    out = subprocess.run([sys.executable, "-c", script], cwd=REPO_DIR, capture_output=True, text=True,
+                         check=True).stdout
+    assert json.loads(out) == []
+
+
+def test_project_needs_a_path(capsys):
+    import GeoGrade
+
+    with pytest.raises(SystemExit) as exc:
+        GeoGrade.main(["--startup-report", "--project"])
+    assert exc.value.code == 2
+    assert "--project" in capsys.readouterr().err
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import generators
+import grain_curve
+import soil_ml
+from sieve_batch import calculate_batch
+from sieve_core import SieveAnalysisModel
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+
+def test_d_values_match_batch():
+    curves = generators.gradation_curves(300, seed=12)
+    sizes = np.array([c[0] for c in curves])
+    finer = np.array([c[1] for c in curves])
+    percents = (5.0, 10.0, 30.0, 50.0, 60.0, 90.0)
+    batch = grain_curve.d_values_batch(sizes, finer, percents)
+    single = np.array([grain_curve.d_values(s, f, percents) for s, f in curves])
+    assert not np.isnan(batch).any()
+    np.testing.assert_allclose(single, batch, rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("fallback", grain_curve.FALLBACKS)
+def test_crossings_match_inverted_batch(fallback):
+    curves = generators.gradation_curves(300, seed=15)
+    x, y = grain_curve.sort_curves(np.array([c[0] for c in curves]), np.array([c[1] for c in curves]))
+    percents = (5.0, 10.0, 30.0, 50.0, 60.0, 90.0)
+    batch = grain_curve.invert_curves(x, y, grain_curve.pchip_slopes(x, y), percents, fallback)
+    single = np.array([grain_curve.fit_curve(s, f).crossings(percents, fallback) for s, f in curves])
+    np.testing.assert_array_equal(np.isnan(single), np.isnan(batch))
+    np.testing.assert_allclose(single, batch, rtol=1e-12, atol=0)
+
+
+def test_every_path_gives_the_same_unreached_d_values():
+    # Passing runs from 40 % down to 0 %: D60 is never reached and takes the
+    # coarsest sieve, the knot closest to 60 %
+    sizes = [4.75, 2.0, 0.425, 0.075]
+    retained = [60.0, 20.0, 10.0, 10.0]
+    finer = [40.0, 20.0, 10.0, 0.0]
+    expected = grain_curve.d_values(sizes, finer)
+    assert expected[2] == 4.75 and np.isfinite(expected).all()
+    np.testing.assert_array_equal(grain_curve.d_values_batch([sizes], [finer])[0], expected)
+
+    model = SieveAnalysisModel()
+    model.calculate(sum(retained), [(s, str(i), m) for i, (s, m) in enumerate(zip(sizes, retained))])
+    assert [model.intersections[f"D{p}"] for p in (10, 30, 60)] == list(np.round(expected, 4))
+
+    batch = calculate_batch([sum(retained)], [sizes], [retained])
+    assert [batch[f"D{p}"][0] for p in (10, 30, 60)] == list(np.round(expected, 4))
+
+    features = soil_ml.features_from_curves([sizes], [finer], [40.0], [20.0], [12.0])[0]
+    np.testing.assert_array_equal(features[:3], expected)
+
+    # The SoilSmart script selects the Tk backend on import, so it gets its own interpreter
+    pytest.importorskip("tkinter")
+    script = ("import json, sys, run_benchmarks; app = run_benchmarks.load_soilsmart(); "
+              "print(json.dumps(list(app.compute_d_values(*json.loads(sys.argv[1])).values())))")
+    out = subprocess.run([sys.executable, "-c", script, json.dumps([sizes, finer])], cwd=BENCHMARKS_DIR,
+                         capture_output=True, text=True, check=True).stdout
+    assert json.loads(out) == list(expected)
+
+
+def test_curve_matches_scipy_pchip():
+    interpolate = pytest.importorskip("scipy.interpolate")
+    for sizes, finer in generators.gradation_curves(100, seed=13):
+        curve = grain_curve.fit_curve(sizes, finer)
+        x = np.sort(sizes)
+        reference = interpolate.PchipInterpolator(x, finer[np.argsort(sizes)])
+        x_new = np.linspace(x[0], x[-1], 200)
+        np.testing.assert_allclose(curve(x_new), reference(x_new), rtol=1e-12, atol=1e-12)
+
+
+def test_d_values_lie_on_the_curve():
+    for sizes, finer in generators.gradation_curves(100, seed=14, spanning=True):
+        d = grain_curve.d_values(sizes, finer)
+        np.testing.assert_allclose(grain_curve.fit_curve(sizes, finer)(d), grain_curve.D_PERCENTS, atol=1e-9)
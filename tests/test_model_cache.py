@@ -0,0 +1,102 @@
+import os
+import stat
+
+import joblib
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.dummy import DummyClassifier  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+
+import model_cache  # noqa: E402
+from model_cache import ModelCache  # noqa: E402
+
+X = np.random.default_rng(0).normal(size=(40, 3))
+Y = np.where(X[:, 0] > 0, "CL", "SW")
+
+
+def save_model(path, seed=0):
+    model = LogisticRegression(random_state=seed).fit(X + seed, Y)
+    joblib.dump(model, path)
+    return model
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    save_model(path)
+    return path
+
+
+def test_get_misses_then_hits(tmp_path, model_path):
+    cache = ModelCache(cache_dir=str(tmp_path / "cache"))
+    first = cache.get(model_path)
+    assert cache.get(model_path) is first
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["artifact_writes"]) == (1, 1, 1)
+    assert stats["mapped_bytes"] > 0
+    np.testing.assert_array_equal(first.predict(X), joblib.load(model_path).predict(X))
+
+
+def test_rewritten_model_is_loaded_again(tmp_path, model_path):
+    cache = ModelCache(cache_dir=str(tmp_path / "cache"))
+    cache.get(model_path)
+    expected = save_model(model_path, seed=3)
+    os.utime(model_path, ns=(1, 1))
+    np.testing.assert_array_equal(cache.get(model_path).coef_, expected.coef_)
+    assert cache.stats()["misses"] == 2 and cache.stats()["entries"] == 1
+
+
+def test_artifact_is_shared_between_caches(tmp_path, model_path):
+    ModelCache(cache_dir=str(tmp_path / "cache")).get(model_path)
+    cache = ModelCache(cache_dir=str(tmp_path / "cache"))
+    cache.get(model_path)
+    assert cache.stats()["artifact_writes"] == 0
+
+
+def artifact_of(cache, path):
+    return os.path.join(cache.cache_dir, f"{model_cache.file_digest(path)}.joblib")
+
+
+def test_stale_artifact_is_written_again(tmp_path, model_path):
+    cache_dir = str(tmp_path / "cache")
+    ModelCache(cache_dir=cache_dir).get(model_path)
+    cache = ModelCache(cache_dir=cache_dir)
+    with open(artifact_of(cache, model_path), "wb") as f:
+        f.write(b"truncated")
+    model = cache.get(model_path)
+    assert cache.stats()["stale_artifacts"] == 1 and cache.stats()["artifact_writes"] == 1
+    np.testing.assert_array_equal(model.predict(X), joblib.load(model_path).predict(X))
+
+
+def test_planted_artifact_is_not_loaded(tmp_path, model_path):
+    cache = ModelCache(cache_dir=str(tmp_path / "cache"))
+    os.makedirs(cache.cache_dir, mode=0o700)
+    # An artifact without the hash this cache records for its own artifacts
+    joblib.dump(DummyClassifier().fit(X, Y), artifact_of(cache, model_path))
+    assert isinstance(cache.get(model_path), LogisticRegression)
+    assert cache.stats()["stale_artifacts"] == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_shared_directory_is_not_used(tmp_path, model_path, capsys):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    cache_dir.chmod(0o777)
+    cache = ModelCache(cache_dir=str(cache_dir))
+    model = cache.get(model_path)
+    assert list(cache_dir.iterdir()) == []
+    assert cache.stats()["mapped_bytes"] == 0
+    assert isinstance(model, LogisticRegression)
+    assert "not a private directory" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_default_directory_is_per_user_and_private(tmp_path, model_path, monkeypatch):
+    monkeypatch.setattr(model_cache.tempfile, "tempdir", str(tmp_path))
+    cache = ModelCache()
+    assert cache.cache_dir == str(tmp_path / f"soilsmart-models-{os.getuid()}")
+    cache.get(model_path)
+    assert stat.S_IMODE(os.stat(cache.cache_dir).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(artifact_of(cache, model_path)).st_mode) == 0o600
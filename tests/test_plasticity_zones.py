@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import plasticity_zones as zones
+import uscs_engine
+
+
+def test_lookup_matches_exact_regions():
+    rng = np.random.default_rng(3)
+    ll = rng.uniform(-5, 130, 100000)
+    pi = rng.uniform(-5, 90, 100000)
+    np.testing.assert_array_equal(zones.classify_points(ll, pi), zones.classify_exact(ll, pi))
+
+
+def test_below_a_line_follows_the_drawn_line():
+    rng = np.random.default_rng(4)
+    ll = np.concatenate([rng.uniform(0, 110, 50000), [25.49, 25.5, 25.51, 60.0]])
+    pi = np.concatenate([rng.uniform(0, 70, 50000), [4.005, 3.99, 4.0, 0.73 * 40]])
+    below = zones.below_a_line(ll, pi)
+    np.testing.assert_array_equal(below, pi < zones.a_line(ll))
+    assert [zones.below_a_line(float(a), float(b)) for a, b in zip(ll[-4:], pi[-4:])] == list(below[-4:])
+
+
+def boundary_points():
+    """A lattice over the chart plus points on, just below and just above both lines."""
+    ll, pi = (a.ravel() for a in np.meshgrid(np.arange(0, 110.01, 0.5), np.arange(0, 70.01, 0.25),
+                                             indexing="ij"))
+    line_ll = np.arange(0, 110.01, 0.1)
+    on_lines = [zones.a_line(line_ll), zones.u_line(line_ll), np.full_like(line_ll, 4.0),
+                np.full_like(line_ll, 7.0)]
+    lls, pis = [ll], [pi]
+    for line_pi in on_lines:
+        for p in (line_pi, np.nextafter(line_pi, -np.inf), np.nextafter(line_pi, np.inf)):
+            lls.append(line_ll)
+            pis.append(p)
+    named = np.array([(60, 29.2), (30, 7.3), (50, 21.9), (25.5, 4.0), (25.49, 4.005), (50, 0.0)])
+    return np.concatenate(lls + [named[:, 0]]), np.concatenate(pis + [named[:, 1]])
+
+
+@pytest.mark.parametrize("organic", [False, True])
+def test_zones_match_uscs_engine(organic):
+    ll, pi = boundary_points()
+    np.testing.assert_array_equal(zones.classify_points(ll, pi), zones.classify_exact(ll, pi))
+    zone = zones.classify_points(ll, pi, np.full(ll.shape, organic))
+    engine = uscs_engine.symbols(uscs_engine.classify(100.0, 0.0, 0.0, 0.0, 0.0, ll, pi, organic))
+    # The index leaves points above the U-line unzoned; everything else must agree
+    charted = zone != zones.NONE
+    assert charted.sum() > 0.5 * len(ll)
+    np.testing.assert_array_equal(zones.zone_names(zone)[charted], engine[charted])
+    assert np.all(pi[~charted] > zones.u_line(ll[~charted]))
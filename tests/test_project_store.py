@@ -0,0 +1,147 @@
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+import generators
+import project_store
+from model_cache import file_digest
+from project_store import ProjectStore
+from sieve_core import SieveAnalysisModel
+from sieve_results import SieveResult
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ProjectStore(str(tmp_path / "project.db")) as store:
+        yield store
+
+
+def make_samples(n, seed=0):
+    samples = []
+    for i, (total_weight, sieve_data) in enumerate(generators.sieve_samples(n, seed=seed)):
+        model = SieveAnalysisModel()
+        model.calculate(total_weight, sieve_data)
+        samples.append({"name": f"S{i}", "borehole": f"BH{i % 2}", "depth_top": float(i), "depth_bottom": i + 0.5,
+                        "total_weight": total_weight, "sieve_data": sieve_data,
+                        "atterberg": {"ll": 30.0 + i, "pl": 20.0}, "result": SieveResult.from_model(model)})
+    return samples
+
+
+def test_import_samples_round_trip(store):
+    samples = make_samples(5)
+    samples[4]["result"] = {"d10": 0.1, "d30": None, "d60": 1.2, "uscs_symbol": "SP"}
+    ids = store.import_samples(iter(samples), chunk_size=2)
+    assert ids == [1, 2, 3, 4, 5]
+    assert store.stats() == {"boreholes": 2, "samples": 5, "sieve_rows": sum(len(s["sieve_data"]) for s in samples),
+                             "atterberg": 5, "results": 5, "models": 0}
+
+    assert [s["name"] for s in store.samples(borehole="BH1")] == ["S1", "S3"]
+    assert store.samples(name="S2")[0]["depth_bottom"] == 2.5
+    total_weight, sieve_data = store.sieve_data(ids[3])
+    assert total_weight == samples[3]["total_weight"]
+    assert sieve_data == [(float(s), str(n), float(m)) for s, n, m in samples[3]["sieve_data"]]
+    assert store.atterberg(ids[0]) == {"ll": 30.0, "pl": 20.0, "air_dry_ll": None, "oven_dry_ll": None}
+    with pytest.raises(KeyError):
+        store.sieve_data(99)
+
+
+def test_results_filter_by_borehole_and_symbol(store):
+    samples = make_samples(4, seed=3)
+    samples[3]["result"] = {"d10": 0.1, "d60": 1.2, "uscs_symbol": "SP"}
+    ids = store.import_samples(samples)
+
+    found_ids, results, symbols = store.results()
+    np.testing.assert_array_equal(found_ids, ids)
+    assert symbols == [None, None, None, "SP"]
+    assert results[1] == samples[1]["result"]
+    assert np.isnan(results.column("d30")[3])
+
+    found_ids, results, _ = store.results(borehole="BH0")
+    np.testing.assert_array_equal(found_ids, [ids[0], ids[2]])
+    assert list(results) == [samples[0]["result"], samples[2]["result"]]
+    assert store.results(uscs_symbol="SP")[0].tolist() == [ids[3]]
+
+    assert store.save_results([(ids[0], {"d10": 0.2, "uscs_symbol": "GW"})]) == 1
+    found_ids, results, _ = store.results(uscs_symbol="GW")
+    assert found_ids.tolist() == [ids[0]] and results[0].d10 == 0.2
+    store.delete_samples([ids[0]])
+    assert store.stats()["results"] == 3
+
+
+def test_register_model_versions(store, tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"first")
+    first = store.register_model("soil_model", str(path), "KNN", {"accuracy": 0.9})
+    path.write_bytes(b"second")
+    second = store.register_model("soil_model", str(path))
+    store.register_model("other", str(path))
+
+    versions = store.models("soil_model")
+    assert [(m["id"], m["version"]) for m in versions] == [(second, 2), (first, 1)]
+    assert versions[1]["metrics"] == {"accuracy": 0.9} and versions[0]["metrics"] is None
+    assert versions[0]["sha256"] == file_digest(str(path))
+    assert store.latest_model("soil_model")["id"] == second
+    assert store.latest_model("missing") is None
+
+
+def test_old_schema_is_migrated(tmp_path):
+    path = str(tmp_path / "project.db")
+    # A project written before the schema was versioned: two tables, user_version 0
+    with sqlite3.connect(path) as db:
+        db.executescript(
+            "CREATE TABLE boreholes (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, x REAL, y REAL, "
+            "ground_level REAL, created REAL NOT NULL);"
+            "CREATE TABLE samples (id INTEGER PRIMARY KEY, borehole_id INTEGER REFERENCES boreholes(id), "
+            "name TEXT NOT NULL, depth_top REAL, depth_bottom REAL, total_weight REAL, created REAL NOT NULL);"
+            "INSERT INTO boreholes (name, created) VALUES ('BH1', 0);"
+            "INSERT INTO samples (borehole_id, name, total_weight, created) VALUES (1, 'old', 500, 0);")
+    db.close()
+
+    with ProjectStore(path) as store:
+        assert store.samples(borehole="BH1")[0]["name"] == "old"
+        new_id = store.add_sample("new", "BH1", atterberg={"ll": 40.0, "pl": 25.0})
+        assert new_id == 2 and store.stats()["atterberg"] == 1
+    with sqlite3.connect(path) as db:
+        assert db.execute("PRAGMA user_version").fetchone()[0] == project_store.SCHEMA_VERSION
+        indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    db.close()
+    assert {"idx_samples_borehole", "idx_results_symbol"} <= indexes
+    ProjectStore(path).close()
+
+
+def test_newer_schema_is_refused(tmp_path):
+    path = str(tmp_path / "project.db")
+    with sqlite3.connect(path) as db:
+        db.execute(f"PRAGMA user_version={project_store.SCHEMA_VERSION + 1}")
+    db.close()
+    with pytest.raises(ValueError):
+        ProjectStore(path)
+
+
+def test_cli_import_streams_files(tmp_path, monkeypatch, capsys):
+    data = tmp_path / "data"
+    data.mkdir()
+    for i, (total_weight, sieve_data) in enumerate(generators.sieve_samples(5, seed=9)):
+        rows = [{"size": s, "number": n, "retained": r} for s, n, r in sieve_data]
+        (data / f"sieve_{i}.json").write_text(json.dumps({"total_weight": total_weight, "sieve_data": rows}))
+    (data / "uscs.json").write_text(json.dumps({"gravel": 10, "sand": 60, "fines": 30, "ll": 35, "pl": 20}))
+    (data / "broken.json").write_text("{")
+
+    received = []
+    original = ProjectStore.import_samples
+    monkeypatch.setattr(ProjectStore, "import_samples",
+                        lambda self, samples, *a: received.append(samples) or original(self, samples, *a))
+    db_path = str(tmp_path / "project.db")
+    assert project_store.main([db_path, "import", str(data), "--borehole", "BH7"]) == 0
+    assert not isinstance(received[0], (list, tuple))
+    captured = capsys.readouterr()
+    assert "Imported 6 samples" in captured.out and "(1 files skipped)" in captured.out
+    assert "broken.json" in captured.err
+
+    with ProjectStore(db_path, readonly=True) as store:
+        assert len(store.samples(borehole="BH7")) == 6
+        assert store.stats()["atterberg"] == 1
+        uscs_id = store.samples(name="uscs")[0]["id"]
+        assert store.uscs_inputs(uscs_id)["sand"] == 60 and store.uscs_inputs(uscs_id)["d10"] == 0
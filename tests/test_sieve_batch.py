@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import generators
+from sieve_batch import calculate_batch
+from sieve_core import SieveAnalysisModel, SieveDataError
+
+RESULT_KEYS = ["D10", "D30", "D60", "Cu", "Cc",
+               "Boulders (> 300 mm)", "Cobbles (75 - 300 mm)", "Gravel (4.75 - 75 mm)",
+               "Sand (0.075 - 4.75 mm)", "Fines (< 0.075 mm)"]
+
+# SAMPLE_DATA["Poorly Graded Gravel"] of the Sieve Analysis tool
+GRAVEL_WITH_PAN = (1000, [(25.0, "1 inch", 400), (19.0, "3/4 inch", 300), (12.5, "1/2 inch", 200),
+                          (4.75, "No. 4", 100), (0.0, "Pan", 0)])
+
+
+def with_pan(samples):
+    """Add the pan row (the mass not retained on any sieve) to generated samples."""
+    return [(w, rows + [(0.0, "Pan", round(w - sum(r[2] for r in rows), 1))]) for w, rows in samples]
+
+
+def model_results(total_weight, sieve_data):
+    model = SieveAnalysisModel()
+    model.calculate(total_weight, sieve_data)
+    values = {**model.intersections, **model.coefficients, **model.particle_distribution}
+    return [np.nan if values[k] is None else values[k] for k in RESULT_KEYS]
+
+
+def assert_batch_matches_model(samples):
+    expected, usable = [], []
+    for i, sample in enumerate(samples):
+        try:
+            expected.append(model_results(*sample))
+            usable.append(i)
+        except SieveDataError:
+            pass
+    assert usable
+    batch = calculate_batch([s[0] for s in samples],
+                            [[row[0] for row in s[1]] for s in samples],
+                            [[row[2] for row in s[1]] for s in samples])
+    got = np.column_stack([batch[k] for k in RESULT_KEYS])[usable]
+    np.testing.assert_array_equal(got, np.array(expected, dtype=float))
+
+
+def test_batch_matches_model():
+    assert_batch_matches_model(generators.sieve_samples(300, seed=11))
+
+
+@pytest.mark.parametrize("seed", [3, 17])
+def test_batch_matches_model_with_pan(seed):
+    assert_batch_matches_model(with_pan(generators.sieve_samples(300, seed=seed)))
+
+
+def test_batch_matches_model_on_sample_data_with_pan():
+    batch = calculate_batch([GRAVEL_WITH_PAN[0]], [[r[0] for r in GRAVEL_WITH_PAN[1]]],
+                            [[r[2] for r in GRAVEL_WITH_PAN[1]]])
+    assert not np.isnan(batch["D10"][0])
+    assert_batch_matches_model([GRAVEL_WITH_PAN])
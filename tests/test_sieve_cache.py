@@ -0,0 +1,105 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import generators
+import sieve_cache
+from sieve_cache import SieveResultCache
+from sieve_core import SieveAnalysisModel
+
+
+def last_used(path):
+    with sqlite3.connect(path) as db:
+        return dict(db.execute("SELECT key, last_used FROM sieve_results"))
+
+
+def test_cache_hit_skips_the_curve_until_needed(monkeypatch):
+    cache = SieveResultCache()
+    sample = generators.sieve_samples(1, seed=4)[0]
+    SieveAnalysisModel().calculate(*sample, cache=cache)
+    expected = SieveAnalysisModel()
+    expected.calculate(*sample)
+
+    model = SieveAnalysisModel()
+    fits = []
+    original = SieveAnalysisModel.create_smooth_curve
+    monkeypatch.setattr(SieveAnalysisModel, "create_smooth_curve",
+                        lambda self: fits.append(1) or original(self))
+    model.calculate(*sample, cache=cache)
+    assert cache.hits == 1 and not fits
+    assert model.pchip_interpolator is None
+    assert model.intersections == expected.intersections
+
+    x, y = model.smooth_curve(50)
+    assert fits == [1]
+    np.testing.assert_array_equal(y, expected.smooth_curve(50)[1])
+    np.testing.assert_array_equal(model.ys, expected.ys)
+    assert model.calculate_percentiles([50]) == expected.calculate_percentiles([50])
+
+
+def test_disk_hits_write_times_of_use_in_batches(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SieveResultCache(db_path=path)
+    for i in range(3):
+        cache.put(f"k{i}", {"i": i})
+    cache.close()
+
+    before = last_used(path)
+    cache = SieveResultCache(db_path=path)
+    assert cache.get("k0") == {"i": 0}
+    assert last_used(path) == before
+    cache.flush()
+    assert last_used(path)["k0"] > before["k0"]
+    cache.close()
+
+
+def test_disk_hits_flush_after_a_full_batch(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SieveResultCache(max_entries=1, db_path=path)
+    for i in range(SieveResultCache.TOUCH_BATCH + 1):
+        cache.put(f"k{i}", {"i": i})
+    before = last_used(path)
+    for i in range(SieveResultCache.TOUCH_BATCH):
+        assert cache.get(f"k{i}") == {"i": i}
+    after = last_used(path)
+    assert all(after[f"k{i}"] > before[f"k{i}"] for i in range(SieveResultCache.TOUCH_BATCH))
+    cache.close()
+
+
+@pytest.mark.parametrize("limit", [1, 5])
+def test_disk_tier_evicts_least_recently_used_beyond_limit(tmp_path, limit):
+    path = str(tmp_path / "cache.db")
+    cache = SieveResultCache(max_entries=1, db_path=path, max_disk_entries=limit)
+    for i in range(limit):
+        cache.put(f"k{i}", {"i": i})
+    assert cache.disk_evictions == 0
+    # Touch the oldest record on disk, so the next oldest goes first
+    assert cache.get("k0") == {"i": 0}
+    cache.put("new", {"i": -1})
+    cache.put("new", {"i": -2})
+    cache.close()
+
+    kept = set(last_used(path))
+    assert len(kept) == limit
+    assert "new" in kept
+    if limit > 1:
+        assert "k0" in kept and "k1" not in kept
+    assert SieveResultCache(db_path=path).get("new") == {"i": -2}
+
+
+def test_records_of_another_version_are_not_used(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    sample = generators.sieve_samples(1, seed=6)[0]
+    monkeypatch.setattr(sieve_cache, "CACHE_VERSION", sieve_cache.CACHE_VERSION - 1)
+    old_key = SieveResultCache.key(*sample)
+    cache = SieveResultCache(db_path=path)
+    SieveAnalysisModel().calculate(*sample, cache=cache)
+    cache.close()
+
+    monkeypatch.undo()
+    assert SieveResultCache.key(*sample) != old_key
+    cache = SieveResultCache(db_path=path)
+    SieveAnalysisModel().calculate(*sample, cache=cache)
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 0, 1)
+    cache.close()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import generators
+from sieve_core import SieveAnalysisModel, SieveDataError
+
+
+def calculated(sample):
+    model = SieveAnalysisModel()
+    model.calculate(sample[0], list(sample[1]))
+    return model
+
+
+def test_update_retained_matches_calculate():
+    rng = np.random.default_rng(5)
+    for total_weight, sieve_data in generators.sieve_samples(200, seed=21):
+        model = calculated((total_weight, sieve_data))
+        index = int(rng.integers(len(sieve_data)))
+        # Lighter only, so the masses stay within the total weight
+        mass = round(sieve_data[index][2] * float(rng.uniform(0, 1)), 1)
+        model.update_retained(index, mass)
+
+        edited = list(sieve_data)
+        edited[index] = (edited[index][0], edited[index][1], mass)
+        expected = calculated((total_weight, edited))
+        assert model.intersections == expected.intersections
+        assert model.coefficients == expected.coefficients
+        assert model.particle_distribution == expected.particle_distribution
+
+
+@pytest.mark.parametrize("index", [-1, 14, 100])
+def test_update_retained_rejects_rows_outside_the_data(index):
+    total_weight, sieve_data = generators.sieve_samples(1, seed=2)[0]
+    model = calculated((total_weight, sieve_data))
+    before = list(model.retained_masses)
+    with pytest.raises(SieveDataError):
+        model.update_retained(index, 1.0)
+    assert model.retained_masses == before
+
+
+def test_update_retained_rejects_negative_mass():
+    model = calculated(generators.sieve_samples(1, seed=2)[0])
+    with pytest.raises(SieveDataError):
+        model.update_retained(0, -1.0)
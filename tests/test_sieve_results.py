@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import generators
+from sieve_batch import calculate_batch
+from sieve_core import SieveAnalysisModel
+from sieve_results import FIELD_NAMES, SieveResult, SieveResultSet
+
+
+def calculated(samples):
+    models = []
+    for total_weight, sieve_data in samples:
+        model = SieveAnalysisModel()
+        model.calculate(total_weight, sieve_data)
+        models.append(model)
+    return models
+
+
+def test_record_round_trip():
+    for model in calculated(generators.sieve_samples(50, seed=31)):
+        result = model.result()
+        record = result.to_dict()
+        assert record == {"intersections": model.intersections, "coefficients": model.coefficients,
+                          "particle_distribution": model.particle_distribution}
+        assert SieveResult.from_dicts(**record) == result
+        assert eval(repr(result)) == result
+
+
+def test_missing_values_follow_one_convention():
+    partial = SieveResult.from_dicts({"D10": 0.1}, {"Cu": None}, {"Sand (0.075 - 4.75 mm)": 60.0})
+    assert (partial.d30, partial.cu, partial.gravel, partial.sand) == (None, None, 0.0, 60.0)
+    assert SieveResult(sand=None) == SieveResult()
+
+    result_set = SieveResultSet(capacity=1)
+    result_set.append(partial)
+    result_set.append(SieveResult())
+    assert list(result_set) == [partial, SieveResult()]
+    assert np.isnan(result_set.column("d30")).all()
+    np.testing.assert_array_equal(result_set.column("gravel"), [0.0, 0.0])
+
+    columns = {name: np.full(2, np.nan) for name in FIELD_NAMES}
+    columns["d10"][0] = 0.2
+    from_columns = SieveResultSet.from_columns(columns)
+    assert from_columns[0] == SieveResult(d10=0.2)
+    np.testing.assert_array_equal(from_columns.column("fines"), [0.0, 0.0])
+    assert from_columns[1].d10 is None
+
+
+def test_result_set_matches_the_model():
+    samples = generators.sieve_samples(40, seed=32)
+    models = calculated(samples)
+    batch = calculate_batch([s[0] for s in samples], [[row[0] for row in s[1]] for s in samples],
+                            [[row[2] for row in s[1]] for s in samples])
+    from_batch = SieveResultSet.from_columns(batch)
+
+    appended = SieveResultSet(capacity=3)
+    for model in models:
+        appended.append(model.result())
+    assert len(appended) == len(from_batch) == 40
+    assert list(appended) == [model.result() for model in models]
+    np.testing.assert_array_equal(appended.values, from_batch.values)
+    assert appended[-1] == models[-1].result()
+    assert appended.nbytes == 40 * len(FIELD_NAMES) * 8
+
+    appended.extend(from_batch)
+    assert len(appended) == 80 and appended[40] == models[0].result()
+    np.testing.assert_array_equal(appended.to_dict()["D10"][:40], batch["D10"])
+    with pytest.raises(IndexError):
+        appended[80]
@@ -0,0 +1,27 @@
+import csv
+import json
+
+import generators
+import sieve_runner
+
+
+def write_samples(directory, samples):
+    for i, (total_weight, sieve_data) in enumerate(samples):
+        data = {"total_weight": total_weight,
+                "sieve_data": [{"size": s, "number": n, "retained": r} for s, n, r in sieve_data]}
+        (directory / f"sample_{i:03d}.json").write_text(json.dumps(data))
+
+
+def test_run_writes_rows_in_file_order(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    write_samples(data, generators.sieve_samples(40, seed=8))
+    (data / "sample_007.json").write_text("not json")
+    output = tmp_path / "results.csv"
+
+    counts = sieve_runner.run([str(data)], str(output), workers=3, chunk_size=1, progress=False)
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["file"] for row in rows] == sieve_runner.discover_files([str(data)])
+    assert counts == {"files": 40, "ok": 39, "failed": 1}
+    assert rows[7]["status"] == "error"
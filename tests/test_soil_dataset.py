@@ -0,0 +1,71 @@
+import pytest
+
+from soil_dataset import DatasetStore
+
+COLUMNS = ["D10", "LL", "USCS"]
+ROWS = [{"D10": 0.1, "LL": 30.0, "USCS": "SW"}, {"D10": 0.02, "LL": 55.5, "USCS": "CH"}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path / "data.csv"), COLUMNS)
+
+
+def test_append_and_read(store):
+    store.append(ROWS[0])
+    assert store.append_many([ROWS[1], ROWS[0]]) == 2
+    df = store.read()
+    assert list(df.columns) == COLUMNS
+    assert df["USCS"].tolist() == ["SW", "CH", "SW"]
+    with open(store.path) as f:
+        assert f.read().count("D10") == 1
+
+
+def test_append_follows_the_file_header(store):
+    with open(store.path, "w", newline="") as f:
+        f.write("USCS,Note,LL,D10\r\nGP,old,20,1.5\r\n")
+    store.append(ROWS[0])
+    with open(store.path, newline="") as f:
+        assert f.read().endswith("SW,,30.0,0.1\r\n")
+    assert store.read()["Note"].isna().tolist() == [False, True]
+
+
+def test_append_rejects_missing_columns(store):
+    with pytest.raises(ValueError):
+        store.append({"D10": 0.1})
+    store.append(ROWS[0])
+    other = DatasetStore(store.path, COLUMNS + ["PI"])
+    with pytest.raises(ValueError):
+        other.append({**ROWS[0], "PI": 1.0})
+
+
+@pytest.mark.parametrize("tail", ["0.3,41", "0.3,41.0,S", "0.3,41.0,SW", "0"])
+def test_torn_tail_is_dropped(store, tail):
+    # A tail cut inside the last field still has every field ("SW" -> "S")
+    store.append_many(ROWS)
+    with open(store.path, "a", newline="") as f:
+        f.write(tail)
+    assert store.read()["USCS"].tolist() == ["SW", "CH"]
+    assert not store.repair()
+
+
+def test_append_after_torn_tail(store):
+    store.append(ROWS[0])
+    with open(store.path, "a", newline="") as f:
+        f.write("0.5,2")
+    store.append(ROWS[1])
+    assert store.read()["USCS"].tolist() == ["SW", "CH"]
+
+
+def test_repair_terminates_a_lone_header(store):
+    with open(store.path, "w", newline="") as f:
+        f.write("D10,LL,USCS")
+    assert store.repair()
+    store.append(ROWS[0])
+    assert store.read()["USCS"].tolist() == ["SW"]
+
+
+def test_repair_leaves_complete_files_alone(store):
+    assert not store.repair()
+    store.append_many(ROWS)
+    assert not store.repair()
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+import generators  # noqa: E402
+import soil_ml  # noqa: E402
+
+GRIDS = {"KNN": {"n_neighbors": [1, 5]}, "Logistic Regression": {"C": [1.0]}}
+
+
+def rule(ll, pl, fines, cu, cc):
+    return "CL" if ll - pl > 10 else "SW"
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return generators.ml_dataset(120, seed=5, classify=rule)
+
+
+@pytest.fixture
+def model_path(tmp_path, dataset):
+    path = str(tmp_path / "model.pkl")
+    pipe = soil_ml.configured_pipeline("KNN", {"n_neighbors": 3})
+    soil_ml.save_model(pipe.fit(dataset[soil_ml.FEATURE_COLUMNS].to_numpy(), dataset["USCS"]), path)
+    return path
+
+
+def test_predict_file_scores_features_and_curves(tmp_path, dataset, model_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    frame = dataset[soil_ml.FEATURE_COLUMNS].head(10).copy()
+    frame.loc[3, "LL"] = np.nan
+    frame.to_csv(source, index=False)
+    counts = soil_ml.predict_file(model_path, str(source), str(output), k=2, chunk_size=4, progress=False)
+    assert counts == {"rows": 10, "ok": 9, "failed": 1}
+    result = pd.read_csv(output, keep_default_na=False)
+    assert result["status"].tolist() == ["ok"] * 3 + ["error"] + ["ok"] * 6
+    expected = soil_ml.load_model(model_path).predict(frame.drop(index=3).to_numpy())
+    assert result["Predicted USCS"].drop(index=3).tolist() == list(expected)
+
+    curves = pd.DataFrame({"Sizes": ["4.75,2,0.425,0.075", "1,1"], "Finer": ["100,80,35,12", "50,40"],
+                           "LL": [45, 30], "PL": [20, 25], "FinesPct": [12, 40]})
+    curves.to_csv(source, index=False)
+    counts = soil_ml.predict_file(model_path, str(source), str(output), progress=False)
+    assert counts == {"rows": 2, "ok": 1, "failed": 1}
+    assert list(pd.read_csv(output).columns[:5]) == soil_ml.CURVE_COLUMNS
+
+
+@pytest.mark.parametrize("content, columns", [("", []), (",".join(soil_ml.FEATURE_COLUMNS) + "\n",
+                                                        soil_ml.FEATURE_COLUMNS)])
+def test_predict_file_writes_header_for_empty_input(tmp_path, model_path, content, columns):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    source.write_text(content)
+    counts = soil_ml.predict_file(model_path, str(source), str(output), k=5, progress=False)
+    assert counts == {"rows": 0, "ok": 0, "failed": 0}
+    # Two classes, so two top columns
+    assert list(pd.read_csv(output).columns) == columns + ["status", "Predicted USCS", "Top1", "Top1 prob",
+                                                           "Top2", "Top2 prob"]
+
+
+def test_select_model_ranks_and_persists_the_winner(tmp_path, dataset):
+    X = dataset[soil_ml.FEATURE_COLUMNS].to_numpy()
+    y = dataset["USCS"].to_numpy()
+    calls = []
+    leaderboard = soil_ml.select_model(X, y, GRIDS, n_splits=3, n_jobs=1,
+                                       progress=lambda done, total: calls.append((done, total)))
+    assert calls[-1] == (9, 9)
+    assert [e["rank"] for e in leaderboard] == [1, 2, 3]
+    assert sorted((e["algo"], e["params"].get("n_neighbors")) for e in leaderboard) == [
+        ("KNN", 1), ("KNN", 5), ("Logistic Regression", None)]
+    scores = [(-e["macro_f1"], -e["accuracy"], e["fit_s"]) for e in leaderboard]
+    assert scores == sorted(scores)
+    assert all(set(soil_ml.LEADERBOARD_COLUMNS) <= set(e) for e in leaderboard)
+
+    model_path = str(tmp_path / "model.pkl")
+    pipe = soil_ml.persist_winner(leaderboard, X, y, model_path)
+    winner = leaderboard[0]
+    assert type(pipe.named_steps["clf"]) is soil_ml.ML_ALGOS[winner["algo"]]
+    np.testing.assert_array_equal(soil_ml.load_model(model_path).predict(X), pipe.predict(X))
+    saved = pd.read_csv(soil_ml.leaderboard_path(model_path))
+    assert list(saved.columns) == soil_ml.LEADERBOARD_COLUMNS
+    assert saved["algo"].tolist() == [e["algo"] for e in leaderboard]
+    assert len(soil_ml.format_leaderboard(leaderboard, top=2).splitlines()) == 4
+
+
+def test_select_model_rejects_unknown_algorithms():
+    with pytest.raises(ValueError):
+        soil_ml.select_model(np.zeros((4, 9)), ["CL", "SW"] * 2, {"Perceptron": {}}, n_jobs=1)
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+import uscs_batch
+
+ROW = {"boulders": 0, "cobbles": 0, "gravel": 40, "sand": 55, "fines": 5, "ll": 30, "pl": 20,
+       "d10": 0.07, "d30": 0.3, "d60": 1.1, "air_dry_ll": 0, "oven_dry_ll": 0}
+
+
+@pytest.mark.parametrize("content, columns", [("", []), ("gravel,sand,fines\n", ["gravel", "sand", "fines"])])
+def test_run_writes_header_for_empty_input(tmp_path, content, columns):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    source.write_text(content)
+    counts = uscs_batch.run(str(source), str(output), progress=False)
+    assert counts == {"rows": 0, "ok": 0, "failed": 0}
+    assert list(pd.read_csv(output).columns) == columns + uscs_batch.RESULT_COLUMNS
+
+
+def test_run_rounds_coefficients(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    pd.DataFrame([ROW]).to_csv(source, index=False)
+    assert uscs_batch.run(str(source), str(output), progress=False)["ok"] == 1
+    result = pd.read_csv(output).iloc[0]
+    assert result["Cu"] == round(1.1 / 0.07, 4)
+    assert result["Cc"] == round(0.3 ** 2 / (1.1 * 0.07), 4)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import generators
+import uscs_engine
+
+uscs = pytest.importorskip("uscs")
+GUI = uscs.USCS_Classifier
+
+
+def gui_result(func, args):
+    """
+    Symbol and group name from a GUI classifier method (None where it raises), without
+    the stray spaces and with the "CL-ML" symbol of the engine.
+    """
+    try:
+        symbol, desc, _ = func(None, *args)
+    except Exception:
+        return None
+    return symbol.strip().replace("CL_ML", "CL-ML"), desc.strip()
+
+
+def engine_result(p200, gravel, sand, cu, cc, ll, pi, organic):
+    symbols, groups = uscs_engine.classify(p200, gravel, sand, cu, cc, ll, pi, organic, with_groups=True)
+    return list(zip(uscs_engine.symbols(symbols), uscs_engine.group_names(groups)))
+
+
+def test_fine_grained_matches_gui():
+    # GUI arguments: (ll, pi, organic, sand, gravel, coarse fraction)
+    rows = generators.uscs_inputs(3000, seed=6)["fine"]
+    ll, pi, organic, sand, gravel, coarse = (np.array(col) for col in zip(*rows))
+    got = engine_result(100 - coarse, gravel, sand, 0.0, 0.0, ll, pi, organic)
+
+    compared = 0
+    for args, result in zip(rows, got):
+        # Inorganic soils with 30% or more coarse material are named by the dominant
+        # fraction in the engine (see the uscs_engine module docstring)
+        if not args[2] and args[5] >= 30:
+            continue
+        expected = gui_result(GUI.classify_fine_grained, args)
+        assert expected is not None, args
+        assert result == expected, args
+        compared += 1
+    assert compared > 1000
+
+
+def test_fine_grained_symbols_match_gui_with_major_coarse_fraction():
+    rows = [args for args in generators.uscs_inputs(3000, seed=7)["fine"] if not args[2] and args[5] >= 30]
+    ll, pi, organic, sand, gravel, coarse = (np.array(col) for col in zip(*rows))
+    got = engine_result(100 - coarse, gravel, sand, 0.0, 0.0, ll, pi, organic)
+    for args, (symbol, name) in zip(rows, got):
+        expected = gui_result(GUI.classify_fine_grained, args)
+        if expected is not None:
+            assert symbol == expected[0], args
+        assert name.startswith("Sandy " if args[3] >= args[4] else "Gravelly "), args
+
+
+def test_coarse_grained_matches_gui():
+    # GUI arguments: (p200, gravel, sand, cu, cc, ll, pi)
+    rows = generators.uscs_inputs(3000, seed=8)["coarse"]
+    got = engine_result(*(np.array(col) for col in zip(*rows)), False)
+
+    for args, result in zip(rows, got):
+        assert result == gui_result(GUI.classify_coarse_grained, args), args
+
+
+def test_fine_grained_details_differ_from_gui_only_as_documented():
+    # 85% fines: the GUI text puts the 15% coarse fraction behind "fines" and prints reprs
+    gui = GUI.classify_fine_grained(None, 42.5, 20.0, False, 10.0, 5.0, 15.0)[2]
+    engine = uscs_engine.details(85.0, 5.0, 10.0, 0.0, 0.0, 42.5, 20.0)[()]
+    assert engine == (gui.replace("Contains 15.0% fines", "Contains 85% fines")
+                      .replace(".0%", "%").replace("PI=20.0", "PI=20"))
@@ -9,6 +9,9 @@ import webbrowser
 import time
 from threading import Thread
 import sys
+import grain_curve
+import plasticity_zones
+from project_overlay import ProjectOverlay, load_points
 class USCS_Classifier:
     def __init__(self, root):
         self.root = root
@@ -404,6 +407,14 @@ class USCS_Classifier:
                                style='Accent.TButton')
         export_btn.pack(pady=10)
         
+        # Project overlay buttons
+        overlay_frame = ttk.Frame(left_frame)
+        overlay_frame.pack(pady=5)
+        ttk.Button(overlay_frame, text="Load Project Overlay...",
+                   command=self.load_project_overlay).pack(side='left', padx=5)
+        ttk.Button(overlay_frame, text="Clear Overlay",
+                   command=self.clear_project_overlay).pack(side='left', padx=5)
+        
         # Plasticity chart
         chart_frame = ttk.LabelFrame(right_frame, text="Plasticity Chart", padding=10)
         chart_frame.pack(fill='both', expand=True, padx=5, pady=5)
@@ -414,6 +425,12 @@ class USCS_Classifier:
         
         self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        # The static chart is cached after every full redraw (including toolbar zoom/pan
+        # and resizes) so the current soil point can be blitted on top of it
+        self._chart_background = None
+        self._chart_overlay = {}
+        self._project_overlay = None
+        self.canvas.mpl_connect('draw_event', self._on_chart_draw)
         
         # Add navigation toolbar with custom style
         toolbar = NavigationToolbar2Tk(self.canvas, chart_frame)
@@ -449,14 +466,10 @@ class USCS_Classifier:
         ll_max = 100 # Chart limit, image goes to 120, but 100 is common
         
         # A-line: Horizontally PI=4 till LL=25.5, then PI = 0.73 * (LL - 20)
-        def a_line_func(ll_values):
-            # Ensure that PI doesn't go below 0
-            return np.maximum(0, np.where(ll_values <= 25.5, 4.0, 0.73 * (ll_values - 20.0)))
-
-        # U-line: PI = 0.9 * (LL - 8)
-        def u_line_func(ll_values):
-            # Ensure that PI doesn't go below 0
-            return np.maximum(7, 0.9 * (ll_values - 8.0))
+        # U-line: PI = 0.9 * (LL - 8), at least 7
+        # (the lines the classifiers and the zone index use)
+        a_line_func = plasticity_zones.a_line
+        u_line_func = plasticity_zones.u_line
 
         # --- Plot A-line ---
         ll_a_plot = np.linspace(0, ll_max, 200) # Use a single linspace for the whole A-line
@@ -564,6 +577,11 @@ class USCS_Classifier:
         
         self.ax.legend(unique_handles.values(), unique_handles.keys(), fontsize=8, framealpha=0.9, facecolor='white', loc='lower right')
 
+        # Current soil artists, hidden until a sample is classified
+        self._create_chart_overlay()
+        if getattr(self, '_project_overlay', None) is not None:
+            self._project_overlay.attach(self.ax)
+
         # Robust check for canvas existence and validity before drawing
         if hasattr(self, 'canvas') and self.canvas is not None:
             self.canvas.draw()
@@ -571,29 +589,61 @@ class USCS_Classifier:
             # This indicates a setup problem where canvas is not available.
             # This print is for debugging purposes; you might remove it in a final version.
             print("Error: self.canvas is not initialized or is None. Chart cannot be drawn.")
+    def _create_chart_overlay(self):
+        """Create the animated artists for the current soil point (excluded from the cached background)"""
+        style = dict(color=self.accent_color, animated=True, visible=False)
+        point, = self.ax.plot([], [], 'o', markersize=10, markeredgecolor='white',
+                              markeredgewidth=1.5, **style)
+        v_line, = self.ax.plot([], [], '--', alpha=0.5, linewidth=1, **style)
+        h_line, = self.ax.plot([], [], '--', alpha=0.5, linewidth=1, **style)
+        annotation = self.ax.annotate("", xy=(0, 0), xytext=(5, 5),
+                                      arrowprops=dict(facecolor='black', shrink=0.05),
+                                      bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8),
+                                      animated=True, visible=False)
+        ll_text = self.ax.text(0, -2, "", ha='center', va='top', **style)
+        pi_text = self.ax.text(-5, 0, "", ha='right', va='center', **style)
+        self._chart_overlay = dict(point=point, v_line=v_line, h_line=h_line, annotation=annotation,
+                                   ll_text=ll_text, pi_text=pi_text)
+
+    def _on_chart_draw(self, event):
+        """Cache the freshly drawn static chart and draw the current soil point on top"""
+        self._chart_background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._chart_overlay.values():
+            self.fig.draw_artist(artist)
+
+    def _blit_chart_overlay(self):
+        """Redraw only the current soil artists over the cached chart background"""
+        if self._chart_background is None:
+            # Nothing cached yet; a full draw caches the background and draws the overlay
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._chart_background)
+        for artist in self._chart_overlay.values():
+            self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+
     def update_plasticity_chart(self, ll, pi, classification):
         """Update plasticity chart with the current soil point"""
-        self.draw_blank_plasticity_chart()
-        
-        # Plot the point with better styling
-        self.ax.plot(ll, pi, 'o', markersize=10, color=self.accent_color, 
-                    markeredgecolor='white', markeredgewidth=1.5, label="Current Soil")
-        
-        # Add classification text with arrow
-        self.ax.annotate(classification, xy=(ll, pi), xytext=(ll + 5, pi + 5),
-                        arrowprops=dict(facecolor='black', shrink=0.05),
-                        bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8))
-        
-        # Add connecting lines to axes
-        self.ax.plot([ll, ll], [0, pi], '--', color=self.accent_color, alpha=0.5, linewidth=1)
-        self.ax.plot([0, ll], [pi, pi], '--', color=self.accent_color, alpha=0.5, linewidth=1)
-        
-        # Add axis labels for the point
-        self.ax.text(ll, -2, f"{ll:.1f}", ha='center', va='top', color=self.accent_color)
-        self.ax.text(-5, pi, f"{pi:.1f}", ha='right', va='center', color=self.accent_color)
-        
-        self.ax.legend(loc='upper right')
-        self.canvas.draw()
+        overlay = self._chart_overlay
+        overlay['point'].set_data([ll], [pi])
+        overlay['v_line'].set_data([ll, ll], [0, pi])
+        overlay['h_line'].set_data([0, ll], [pi, pi])
+        overlay['annotation'].set_text(classification)
+        overlay['annotation'].xy = (ll, pi)
+        overlay['annotation'].set_position((ll + 5, pi + 5))
+        overlay['ll_text'].set_text(f"{ll:.1f}")
+        overlay['ll_text'].set_x(ll)
+        overlay['pi_text'].set_text(f"{pi:.1f}")
+        overlay['pi_text'].set_y(pi)
+        for artist in overlay.values():
+            artist.set_visible(True)
+        self._blit_chart_overlay()
+
+    def clear_plasticity_point(self):
+        """Remove the current soil point from the plasticity chart"""
+        for artist in self._chart_overlay.values():
+            artist.set_visible(False)
+        self._blit_chart_overlay()
 
     def create_help_tab(self):
         # Help tab
@@ -728,35 +778,6 @@ class USCS_Classifier:
         except ValueError:
             messagebox.showerror("Error", "Please enter valid LL and PL values")
     
-    def calculate_coefficients(self):
-        """Calculate Cu and Cc from D values"""
-        try:
-            d10 = self.d10.get()
-            d30 = self.d30.get()
-            d60 = self.d60.get()
-            
-            if d10 <= 0:
-                raise ValueError("D10 must be greater than zero")
-            if d30 <= 0:
-                raise ValueError("D30 must be greater than zero")
-            if d60 <= 0:
-                raise ValueError("D60 must be greater than zero")
-            if d60 < d30 or d30 < d10:
-                raise ValueError("D values must be in order: D60 ≥ D30 ≥ D10")
-            
-            cu = d60 / d10
-            cc = (d30 ** 2) / (d10 * d60)
-            
-            self.cu.set(round(cu, 2))
-            self.cc.set(round(cc, 2))
-            
-            # Switch to coefficients view to show results
-            self.input_mode.set("coefficients")
-            self.toggle_input_mode()
-            
-        except ValueError as e:
-            messagebox.showerror("Error", f"Invalid input: {str(e)}")
-    
     def calculate_pi(self):
         """Calculate Plasticity Index from LL and PL"""
         try:
@@ -788,8 +809,7 @@ class USCS_Classifier:
             if d60 < d30 or d30 < d10:
                 raise ValueError("D values must be in order: D60 ≥ D30 ≥ D10")
             
-            cu = d60 / d10
-            cc = (d30 ** 2) / (d10 * d60)
+            cu, cc = (float(v) for v in grain_curve.coefficients(d10, d30, d60))
             
             self.cu.set(round(cu, 2))
             self.cc.set(round(cc, 2))
@@ -800,6 +820,37 @@ class USCS_Classifier:
             
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
+    def load_project_overlay(self):
+        """Plot the LL/PI pairs of a project CSV file (LL and PI or PL columns) on the chart."""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Load Project Overlay"
+        )
+        if not file_path:
+            return
+        try:
+            ll, pi, organic = load_points(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not load project data: {str(e)}")
+            return
+        if len(ll) == 0:
+            messagebox.showwarning("Warning", "The file contains no LL/PI pairs.")
+            return
+
+        if self._project_overlay is not None:
+            self._project_overlay.detach()
+        self._project_overlay = ProjectOverlay(ll, pi, organic)
+        self._project_overlay.attach(self.ax)
+        self.canvas.draw_idle()
+
+    def clear_project_overlay(self):
+        """Remove the project overlay from the chart."""
+        if self._project_overlay is None:
+            return
+        self._project_overlay.detach()
+        self._project_overlay = None
+        self.canvas.draw_idle()
+
     def export_results(self):
         """Export classification results to a text file."""
         result_text = (
@@ -880,9 +931,8 @@ class USCS_Classifier:
                     messagebox.showerror("Error", "D values must be in order: D10 ≤ D30 ≤ D60")
                     return
                     
-                # Calculate coefficients
-                cu = d60 / d10 if d10 != 0 else 0
-                cc = (d30 ** 2) / (d10 * d60) if (d10 != 0 and d60 != 0) else 0
+                # Calculate coefficients (0 where D10 or D60 is zero)
+                cu, cc = (float(v) for v in grain_curve.coefficients(d10, d30, d60, undefined=0.0))
             else:
                 cu = self.cu.get()
                 cc = self.cc.get()
@@ -926,7 +976,7 @@ class USCS_Classifier:
             
             # Update plasticity chart
             if p200 < 5:
-                self.draw_blank_plasticity_chart()
+                self.clear_plasticity_point()
             else:
                 self.update_plasticity_chart(ll, pi, classification)
             
@@ -934,8 +984,8 @@ class USCS_Classifier:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
     
     def classify_fine_grained(self, ll, pi, organic, percent_sand=0, percent_gravel=0, percent_plus_200=0):
-        # Determine position relative to A-line (corrected formula)
-        below_a_line = (pi < 4) or (pi < 0.73 * (ll - 20))
+        # Determine position relative to A-line
+        below_a_line = plasticity_zones.below_a_line(ll, pi)
         
         # Determine coarse fraction characteristics
         has_sand = percent_sand >= 15
@@ -1008,7 +1058,7 @@ class USCS_Classifier:
     )
             if ll >= 50:
                 # INORGANIC FINE-GRAINED SOIL CLASSIFICATION
-                if (pi < 4) or (pi < 0.73 * (ll - 20)):
+                if below_a_line:
                     # SILT classification
                     base_name = "MH"
                     base_type = "elastic silt"
@@ -1016,11 +1066,11 @@ class USCS_Classifier:
                     base_name = "CH"
                     base_type = "fat clay"
             else:
-                if (pi < 4) or (pi < 0.73 * (ll - 20)):
+                if below_a_line:
                     base_name = "ML"
                     base_type = "silt"
                     # CLAY classification
-                elif (pi > 7) and (pi >= 0.73 * (ll - 20)):
+                elif pi > 7:
                     base_name = "CL"
                     base_type = "lean clay"
                 else:
@@ -1147,7 +1197,7 @@ class USCS_Classifier:
                 gradation = "poorly-graded"
 
             # Determine fines type
-            if pi >= 4 and not (ll > 25.5 and pi < 0.73 * (ll - 20)):
+            if not plasticity_zones.below_a_line(ll, pi):
                 # Clayey fines
                 symbol = f"{base_class}-{first_letter}C"
                 if other_pct >= 15:
@@ -1172,7 +1222,7 @@ class USCS_Classifier:
 
         else:
             # Dirty soil (more than 12% fines)
-            if pi > 7 and not (ll > 25.5 and pi < 0.73 * (ll - 20)):
+            if pi > 7 and not plasticity_zones.below_a_line(ll, pi):
                 # Clayey fines
                 symbol = f"{first_letter}C"
                 if other_pct >= 15:
@@ -1243,7 +1293,7 @@ class USCS_Classifier:
         self.toggle_input_mode()
         
         # Reset chart
-        self.draw_blank_plasticity_chart()
+        self.clear_plasticity_point()
     
     def load_example_data(self):
         """Return dictionary of example soil data"""
@@ -0,0 +1,184 @@
+"""
+Command-line batch USCS classification of CSV exports.
+
+Reads a CSV with the fields ``USCS_Classifier.save_data`` writes (boulders,
+cobbles, gravel, sand, fines, ll, pl, d10, d30, d60, air_dry_ll, oven_dry_ll;
+column names are matched case-insensitively) in chunks and classifies every
+chunk with the vectorized rule engine, following ``classify_soil``:
+
+    - PI is the "pi" column where present and non-zero, otherwise LL - PL
+    - Cu and Cc come from the D-values; without D10/D30/D60 columns the "cu"
+      and "cc" columns are used as entered (the coefficients input mode); the
+      output reports them to 4 decimals
+    - the soil is organic when oven-dried LL / air-dried LL < 0.75
+    - soils with 50% or more fines are fine-grained, the rest coarse-grained
+
+Rows that classify_soil would reject (percentages outside 0-100 or not summing
+to 100 within 0.1, negative LL/PL, negative or unordered D-values, negative
+coefficients, non-numeric values) get status "error" and the reason instead of
+stopping the run. Only one chunk is held in memory at a time.
+
+Usage:
+    python uscs_batch.py export.csv -o classified.csv
+    python uscs_batch.py export.csv -o classified.csv --chunk-size 200000 --no-details
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import uscs_engine as engine
+
+PERCENT_FIELDS = ["boulders", "cobbles", "gravel", "sand", "fines"]
+D_FIELDS = ["d10", "d30", "d60"]
+RESULT_COLUMNS = ["status", "error", "PI", "Cu", "Cc", "organic", "USCS Symbol", "Group Name", "Details"]
+
+
+def _column(chunk: pd.DataFrame, columns: Dict[str, str], name: str, default: float = 0.0) -> np.ndarray:
+    """Numeric column by lower-case field name (NaN for non-numeric cells, default when absent)."""
+    if name not in columns:
+        return np.full(len(chunk), default)
+    return pd.to_numeric(chunk[columns[name]], errors="coerce").to_numpy(dtype=float)
+
+
+def _first_error(checks: List[tuple], n: int) -> np.ndarray:
+    """Message of the first failing check per row ("" where all pass), in the order classify_soil checks."""
+    error = np.full(n, "", dtype=object)
+    for failed, message in reversed(checks):
+        error = np.where(failed, message, error)
+    return error
+
+
+def classify_chunk(chunk: pd.DataFrame, details: bool = True) -> pd.DataFrame:
+    """
+    Classify one chunk of rows.
+
+    Args:
+        chunk: Input rows
+        details: Also build the detailed description column (one string per row)
+
+    Returns:
+        The chunk with RESULT_COLUMNS appended
+    """
+    columns = {str(c).strip().lower(): c for c in chunk.columns}
+    n = len(chunk)
+    values = {name: _column(chunk, columns, name) for name in PERCENT_FIELDS + ["ll", "pl", "air_dry_ll", "oven_dry_ll"]}
+
+    checks = []
+    for name in PERCENT_FIELDS:
+        label = name.capitalize()
+        v = values[name]
+        checks += [(np.isnan(v), f"{label} must be a number"),
+                   (v < 0, f"{label} cannot be negative"),
+                   (v > 100, f"{label} cannot exceed 100%")]
+    total = sum(values[name] for name in PERCENT_FIELDS)
+    checks.append((np.abs(total - 100) > 0.1, "Percentages do not sum to 100%"))
+
+    ll, pl = values["ll"], values["pl"]
+    checks += [(np.isnan(ll) | np.isnan(pl), "LL and PL must be numbers"),
+               ((ll < 0) | (pl < 0), "LL and PL cannot be negative")]
+    pi = engine.plasticity_index(ll, pl, _column(chunk, columns, "pi") if "pi" in columns else None)
+
+    if any(name in columns for name in D_FIELDS):
+        d10, d30, d60 = (_column(chunk, columns, name) for name in D_FIELDS)
+        checks += [(np.isnan(d10) | np.isnan(d30) | np.isnan(d60), "D values must be numbers"),
+                   ((d10 < 0) | (d30 < 0) | (d60 < 0), "D values cannot be negative"),
+                   ((d10 > d30) | (d30 > d60), "D values must be in order: D10 ≤ D30 ≤ D60")]
+        cu, cc = engine.coefficients_from_d(d10, d30, d60)
+    else:
+        cu, cc = _column(chunk, columns, "cu"), _column(chunk, columns, "cc")
+        checks += [(np.isnan(cu) | np.isnan(cc), "Coefficients must be numbers"),
+                   ((cu < 0) | (cc < 0), "Coefficients cannot be negative")]
+
+    with np.errstate(invalid="ignore"):
+        error = _first_error(checks, n)
+    ok = error == ""
+    organic = engine.organic_flag(values["air_dry_ll"], values["oven_dry_ll"])
+    # Rejected rows stay unclassified
+    p200 = np.where(ok, values["fines"], np.nan)
+    gravel, sand = values["gravel"], values["sand"]
+    symbol_codes, group_codes = engine.classify(p200, gravel, sand, cu, cc, ll, pi, organic, with_groups=True)
+
+    out = chunk.copy()
+    out["status"] = np.where(ok, "ok", "error")
+    out["error"] = error
+    out["PI"] = pi
+    # Classified with the full values, reported to 4 decimals
+    out["Cu"] = np.round(cu, 4)
+    out["Cc"] = np.round(cc, 4)
+    out["organic"] = organic
+    out["USCS Symbol"] = engine.symbols(symbol_codes)
+    out["Group Name"] = engine.group_names(group_codes)
+    out["Details"] = (engine.details(p200, gravel, sand, cu, cc, ll, pi, organic, groups=group_codes)
+                      if details else "")
+    return out
+
+
+def run(input_path: str, output: str, chunk_size: int = 100000, details: bool = True,
+        progress: bool = True) -> Dict[str, int]:
+    """
+    Classify a CSV file chunk by chunk and stream the result to output.
+
+    Args:
+        input_path: Input CSV file
+        output: Output CSV file (input columns plus RESULT_COLUMNS)
+        chunk_size: Rows read and classified at a time
+        details: Build the detailed description column
+        progress: Report progress on stderr
+
+    Returns:
+        Dictionary with "rows", "ok" and "failed" counts
+    """
+    counts = {"rows": 0, "ok": 0, "failed": 0}
+    start = time.perf_counter()
+    header = True
+    try:
+        chunks = pd.read_csv(input_path, chunksize=max(1, chunk_size))
+    except pd.errors.EmptyDataError:
+        # 0-byte input (not even a header line)
+        chunks = []
+    try:
+        for chunk in chunks:
+            result = classify_chunk(chunk, details)
+            result.to_csv(output, mode="w" if header else "a", header=header, index=False)
+            header = False
+            failed = int((result["status"] != "ok").sum())
+            counts["rows"] += len(result)
+            counts["failed"] += failed
+            counts["ok"] += len(result) - failed
+            if progress:
+                rate = counts["rows"] / max(time.perf_counter() - start, 1e-9)
+                print(f"\r{counts['rows']} rows ({counts['failed']} failed, {rate:.0f} rows/s)",
+                      end="", file=sys.stderr, flush=True)
+    finally:
+        if progress:
+            print(file=sys.stderr)
+    if header:
+        # Empty input: still write the header
+        try:
+            columns = list(pd.read_csv(input_path, nrows=0).columns)
+        except pd.errors.EmptyDataError:
+            columns = []
+        pd.DataFrame(columns=columns + RESULT_COLUMNS).to_csv(output, index=False)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch USCS classification of a CSV export")
+    parser.add_argument("input", help="CSV file with the USCS classifier's input fields")
+    parser.add_argument("-o", "--output", required=True, help="Output CSV file")
+    parser.add_argument("-c", "--chunk-size", type=int, default=100000, help="Rows per chunk")
+    parser.add_argument("--no-details", action="store_true", help="Leave the Details column empty (faster)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not report progress")
+    args = parser.parse_args(argv)
+
+    counts = run(args.input, args.output, args.chunk_size, not args.no_details, not args.quiet)
+    print(f"Classified {counts['rows']} rows: {counts['ok']} ok, {counts['failed']} failed -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
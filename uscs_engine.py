@@ -0,0 +1,299 @@
+"""
+Vectorized USCS rule engine.
+
+Applies the classification rules of ``USCS_Classifier.classify_fine_grained`` and
+``classify_coarse_grained`` to whole NumPy arrays at once. classify() returns
+integer symbol codes (and optionally group-name codes); the strings are only
+materialized by symbols(), group_names() and details() when asked for, so
+millions of records can be classified without building a string per row.
+
+Differences from the GUI methods:
+    - Inorganic fine-grained soils with 30% or more coarse material get "Sandy ..."
+      or "Gravelly ..." names according to the dominant coarse fraction, as the
+      organic branch does. The GUI method always names sand-dominant soils
+      "Gravelly ..." and fails when gravel dominates.
+    - Symbols and names carry no stray spaces, and the silty clay symbol is "CL-ML".
+    - details() reports the true fines percentage (p200) in "Contains ...% fines";
+      the GUI method puts the coarse fraction (100 - p200) there.
+    - details() formats numbers with :g ("PI=20"), where the GUI method prints
+      their repr ("PI=20.0").
+"""
+import numpy as np
+from typing import Optional, Tuple
+
+import grain_curve
+import plasticity_zones
+
+UNCLASSIFIED = 0
+
+# Fine-grained base groups: (symbol for inorganic soils, group name stem)
+FINE_BASES = [
+    ("OL", "Organic clay"),
+    ("OL", "Organic silt"),
+    ("MH", "elastic silt"),
+    ("CH", "fat clay"),
+    ("ML", "silt"),
+    ("CL", "lean clay"),
+    ("CL-ML", "silty clay"),
+]
+FINE_MODIFIERS = [
+    "{}",
+    "{} with sand",
+    "{} with gravel",
+    "Sandy {}",
+    "Sandy {} with gravel",
+    "Gravelly {}",
+    "Gravelly {} with sand",
+]
+(_PLAIN, _WITH_SAND, _WITH_GRAVEL, _SANDY, _SANDY_WITH_GRAVEL,
+ _GRAVELLY, _GRAVELLY_WITH_SAND) = range(len(FINE_MODIFIERS))
+
+# Coarse-grained variants: (symbol pattern, name without / with >= 15% of the other fraction)
+COARSE_VARIANTS = [
+    ("{L}W", "Well-graded {c}", "Well-graded {c} with {o}"),
+    ("{L}P", "Poorly-graded {c}", "Poorly-graded {c} with {o}"),
+    ("{L}W-{L}C", "Well-graded {c} with clay", "Well-graded {c} with clay and {o}"),
+    ("{L}W-{L}M", "Well-graded {c} with silt", "Well-graded {c} with silt and {o}"),
+    ("{L}P-{L}C", "Poorly-graded {c} with clay", "Poorly-graded {c} with clay and {o}"),
+    ("{L}P-{L}M", "Poorly-graded {c} with silt", "Poorly-graded {c} with silt and {o}"),
+    ("{L}C", "Clayey {C}", "Clayey {C} with {o}"),
+    ("{L}M", "Silty {C}", "Silty {C} with {o}"),
+    ("{L}C-{L}M", "Silty clayey {C}", "Silty clayey {C} with {o}"),
+]
+# Coarse fractions: (first letter, coarse type, other type, Cu needed for well-graded)
+COARSE_TYPES = [("G", "gravel", "sand", 4), ("S", "sand", "gravel", 6)]
+
+
+def _build_tables():
+    symbols = [""]
+    for symbol in ["OL", "OH", "MH", "CH", "ML", "CL", "CL-ML"]:
+        symbols.append(symbol)
+    for letter, _, _, _ in COARSE_TYPES:
+        for pattern, _, _ in COARSE_VARIANTS:
+            symbols.append(pattern.format(L=letter))
+
+    names = [""]
+    for _, stem in FINE_BASES:
+        for modifier in FINE_MODIFIERS:
+            names.append(modifier.format(stem))
+    for _, coarse, other, _ in COARSE_TYPES:
+        for _, without_other, with_other in COARSE_VARIANTS:
+            for template in (without_other, with_other):
+                names.append(template.format(c=coarse, C=coarse.capitalize(), o=other))
+    return np.array(symbols, dtype=object), np.array(names, dtype=object)
+
+
+SYMBOLS, GROUP_NAMES = _build_tables()
+SYMBOL_CODES = {symbol: code for code, symbol in enumerate(SYMBOLS) if symbol}
+
+_COARSE_SYMBOL_OFFSET = 8
+_FINE_NAME_OFFSET = 1
+_COARSE_NAME_OFFSET = 1 + len(FINE_BASES) * len(FINE_MODIFIERS)
+# Symbol code of each fine base for inorganic soils (organic soils use OL/OH)
+_FINE_BASE_SYMBOL = np.array([SYMBOL_CODES[s] for s, _ in FINE_BASES])
+
+
+def _fine_base(ll, pi, organic) -> np.ndarray:
+    """Index into FINE_BASES from the position on the plasticity chart."""
+    below = plasticity_zones.below_a_line(ll, pi)
+    return np.where(
+        organic, np.where(below, 1, 0),
+        np.where(ll >= 50, np.where(below, 2, 3),
+                 np.where(below, 4, np.where(pi > 7, 5, 6))))
+
+
+def _classify_fine(ll, pi, organic, sand, gravel, p200) -> Tuple[np.ndarray, np.ndarray]:
+    """Symbol and group-name codes following classify_fine_grained."""
+    coarse = 100 - p200
+    high = ll >= 50
+    base = _fine_base(ll, pi, organic)
+    symbol = np.where(organic, np.where(high, SYMBOL_CODES["OH"], SYMBOL_CODES["OL"]), _FINE_BASE_SYMBOL[base])
+
+    sand_dominant = sand >= gravel
+    modifier_major = np.where(sand_dominant,
+                              np.where(gravel >= 15, _SANDY_WITH_GRAVEL, _SANDY),
+                              np.where(sand >= 15, _GRAVELLY_WITH_SAND, _GRAVELLY))
+    # The organic branch keeps the plain name below 15% coarse, the inorganic one up to 15%
+    plain = np.where(organic, coarse < 15, coarse <= 15)
+    modifier_minor = np.where(plain, _PLAIN, np.where(sand_dominant, _WITH_SAND, _WITH_GRAVEL))
+    modifier = np.where(coarse >= 30, modifier_major, modifier_minor)
+    return symbol, _FINE_NAME_OFFSET + base * len(FINE_MODIFIERS) + modifier
+
+
+def _classify_coarse(p200, gravel, sand, cu, cc, ll, pi) -> Tuple[np.ndarray, np.ndarray]:
+    """Symbol and group-name codes following classify_coarse_grained."""
+    sand_type = ~(gravel > sand)
+    cu_min = np.where(sand_type, 6, 4)
+    other = np.where(sand_type, gravel, sand)
+    well_graded = (cu >= cu_min) & (cc >= 1) & (cc <= 3)
+    below_a_line = plasticity_zones.below_a_line(ll, pi)
+
+    clean = p200 < 5
+    dual = (p200 >= 5) & (p200 <= 12)
+    dual_clay = ~below_a_line
+    variant = np.select(
+        [clean & well_graded, clean,
+         dual & well_graded & dual_clay, dual & well_graded, dual & dual_clay, dual,
+         (pi > 7) & ~below_a_line, pi < 4],
+        [0, 1, 2, 3, 4, 5, 6, 7],
+        8,
+    )
+    letter = sand_type.astype(np.int64)
+    symbol = _COARSE_SYMBOL_OFFSET + letter * len(COARSE_VARIANTS) + variant
+    name = _COARSE_NAME_OFFSET + (letter * len(COARSE_VARIANTS) + variant) * 2 + (other >= 15)
+    return symbol, name
+
+
+def classify(p200, gravel, sand, cu, cc, ll, pi, organic=False,
+             with_groups: bool = False):
+    """
+    Classify a batch of soils.
+
+    Soils with 50% or more fines follow the fine-grained rules (plasticity chart and
+    coarse-fraction modifiers), the others the coarse-grained rules (gradation and
+    fines type). All inputs broadcast against each other.
+
+    Args:
+        p200: Percent passing the No. 200 sieve (fines)
+        gravel: Percent gravel
+        sand: Percent sand
+        cu: Coefficient of uniformity (only used for coarse-grained soils)
+        cc: Coefficient of curvature (only used for coarse-grained soils)
+        ll: Liquid limit
+        pi: Plasticity index
+        organic: Organic flag (only used for fine-grained soils)
+        with_groups: Also return the group-name codes
+
+    Returns:
+        Array of symbol codes (index into SYMBOLS; 0 where p200 is missing), or a
+        tuple (symbol_codes, group_codes) when with_groups is True
+    """
+    p200, gravel, sand, cu, cc, ll, pi = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (p200, gravel, sand, cu, cc, ll, pi)))
+    organic = np.broadcast_to(np.asarray(organic, dtype=bool), p200.shape)
+
+    with np.errstate(invalid="ignore"):
+        fine_symbol, fine_name = _classify_fine(ll, pi, organic, sand, gravel, p200)
+        coarse_symbol, coarse_name = _classify_coarse(p200, gravel, sand, cu, cc, ll, pi)
+        fine = p200 >= 50
+
+    valid = ~np.isnan(p200)
+    symbols_ = np.where(valid, np.where(fine, fine_symbol, coarse_symbol), UNCLASSIFIED).astype(np.int16)
+    if not with_groups:
+        return symbols_
+    groups = np.where(valid, np.where(fine, fine_name, coarse_name), UNCLASSIFIED).astype(np.int16)
+    return symbols_, groups
+
+
+def symbols(codes) -> np.ndarray:
+    """Map symbol codes to strings (e.g. "SW", "CL-ML")."""
+    return SYMBOLS[np.asarray(codes)]
+
+
+def group_names(codes) -> np.ndarray:
+    """Map group-name codes to strings (e.g. "Well-graded sand with gravel")."""
+    return GROUP_NAMES[np.asarray(codes)]
+
+
+def _fine_detail(ll, pi, organic, sand, gravel, p200) -> str:
+    below = bool(plasticity_zones.below_a_line(ll, pi))
+    coarse = 100 - p200
+    if organic:
+        text = (f"Organic soil with LL={ll:g} ({'≥50' if ll >= 50 else '<50'}). "
+                f"PI={pi:g} places it {'below' if below else 'above'} A-line. "
+                f"Contains {p200:g}% fines with ")
+        if coarse >= 30:
+            return text + f"significant coarse fraction ({sand:g}% sand, {gravel:g}% gravel)."
+        return text + f"minimal coarse fraction ({sand:g}% sand, {gravel:g}% gravel)."
+
+    text = (f"Inorganic soil with LL={ll:g} ({'≥50' if ll >= 50 else '<50'}), "
+            f"PI={pi:g} ({'≥7' if pi >= 7 else '<7'}) places it {'below' if below else 'above'} A-line. "
+            f"Contains {p200:g}% fines with ")
+    if coarse >= 30:
+        return text + (f"significant coarse fraction ({sand:g}% sand, {gravel:g}% gravel). "
+                       f"{'Sandy' if sand >= gravel else 'Gravelly'} dominant coarse fraction.")
+    _, stem = FINE_BASES[int(_fine_base(ll, pi, organic))]
+    return text + (f"minimal coarse fraction ({sand:g}% sand, {gravel:g}% gravel). "
+                   f"Typical {stem} behavior expected with "
+                   f"{'high' if ll >= 50 else 'moderate'} plasticity characteristics.")
+
+
+def _coarse_detail(group: int) -> str:
+    index = group - _COARSE_NAME_OFFSET
+    letter, other15 = divmod(index, 2)
+    letter, variant = divmod(letter, len(COARSE_VARIANTS))
+    _, coarse, other, cu_min = COARSE_TYPES[letter]
+    share = "≥15%" if other15 else "<15%"
+    if variant == 0:
+        return (f"Good particle size distribution with Cᵤ ≥ {cu_min} and 1 ≤ C꜀ ≤ 3. "
+                f"Contains {share} {other}.")
+    if variant == 1:
+        if other15:
+            return f"Uniform or gap-graded {coarse} with ≥15% {other}. Cᵤ < {cu_min} or C꜀ outside 1-3 range"
+        return (f"Uniform or gap-graded {coarse} with Cᵤ < {cu_min} or C꜀ outside 1-3 range. "
+                f"Contains <15% {other}")
+    fines = {2: "5-12% clayey fines", 3: "5-12% silty fines", 4: "5-12% clayey fines", 5: "5-12% silty fines",
+             6: ">12% clay fines", 7: ">12% silty fines", 8: ">12% clayey-silty fines"}[variant]
+    return f"{coarse.capitalize()} with {fines} and {share} {other}."
+
+
+def details(p200, gravel, sand, cu, cc, ll, pi, organic=False,
+            groups: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Build the detailed description of every soil (one Python string per row).
+
+    Args:
+        p200, gravel, sand, cu, cc, ll, pi, organic: As for classify()
+        groups: Group-name codes from classify(..., with_groups=True), to avoid
+            classifying again
+
+    Returns:
+        Object array of description strings ("" for unclassified rows)
+    """
+    p200, gravel, sand, cu, cc, ll, pi = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (p200, gravel, sand, cu, cc, ll, pi)))
+    organic = np.broadcast_to(np.asarray(organic, dtype=bool), p200.shape)
+    if groups is None:
+        _, groups = classify(p200, gravel, sand, cu, cc, ll, pi, organic, with_groups=True)
+    groups = np.broadcast_to(groups, p200.shape)
+
+    out = np.empty(p200.shape, dtype=object)
+    for idx in np.ndindex(p200.shape):
+        group = int(groups[idx])
+        if group == UNCLASSIFIED:
+            out[idx] = ""
+        elif group >= _COARSE_NAME_OFFSET:
+            out[idx] = _coarse_detail(group)
+        else:
+            out[idx] = _fine_detail(float(ll[idx]), float(pi[idx]), bool(organic[idx]),
+                                    float(sand[idx]), float(gravel[idx]), float(p200[idx]))
+    return out
+
+
+def plasticity_index(ll, pl, pi=None) -> np.ndarray:
+    """
+    Plasticity index as the classifier uses it: the entered PI, or LL - PL where it is 0 or missing.
+    """
+    ll = np.asarray(ll, dtype=float)
+    derived = ll - np.asarray(pl, dtype=float)
+    if pi is None:
+        return derived
+    pi = np.asarray(pi, dtype=float)
+    return np.where((pi == 0) | np.isnan(pi), derived, pi)
+
+
+def organic_flag(air_dry_ll, oven_dry_ll) -> np.ndarray:
+    """
+    Organic soils have an oven-dried LL below 75% of the air-dried LL (both must be entered).
+    """
+    air = np.asarray(air_dry_ll, dtype=float)
+    oven = np.asarray(oven_dry_ll, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (air > 0) & (oven > 0) & (oven / air < 0.75)
+
+
+def coefficients_from_d(d10, d30, d60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cu and Cc from D-values as the classifier computes them (0 where D10 or D60 is 0).
+    """
+    return grain_curve.coefficients(d10, d30, d60, undefined=0.0)